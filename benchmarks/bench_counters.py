@@ -0,0 +1,61 @@
+"""Measures how long CounterStore takes to rate the error counters of a large
+
+fleet
+
+Run from the repository root with python benchmarks/bench_counters.py. A
+fleet of SWITCHES switches with PORTS ports each is sampled DEPTH times,
+with some counters wrapping and some reset, then the ports whose receive
+errors exceed a rate are found over the last interval and over the whole
+buffer. numpy must be installed, see the analytics extra.
+
+"""
+import random
+import time
+import timeit
+
+from hp_procurvearuba.counters import CounterStore
+
+SWITCHES = 2000
+PORTS = 50
+DEPTH = 10
+NUMBER = 10
+
+
+def filled_store():
+    """Returns a CounterStore holding DEPTH samples of every port"""
+    store = CounterStore(depth=DEPTH)
+    random.seed(1)
+    base = [random.randrange(2**32) for _ in range(PORTS)]
+    started = time.time()
+    for sample in range(DEPTH):
+        for switch in range(SWITCHES):
+            output = [
+                {
+                    "port": str(port),
+                    "total_bytes": str((base[port] + sample * 10**8) % 2**32),
+                    "total_frames": "0",
+                    "errors_rx": str(sample * port),
+                    "drops_tx": "0",
+                }
+                for port in range(PORTS)
+            ]
+            store.add(f"switch_{switch}", output, taken_at=started + sample * 60)
+    return store
+
+
+def main():
+    store = filled_store()
+    print(f"{store}")
+    for name, code in {
+        "errors_rx > 30/min, last interval": lambda: store.exceeding("errors_rx", 30),
+        "errors_rx > 30/min, whole buffer": lambda: store.exceeding(
+            "errors_rx", 30, window=DEPTH
+        ),
+        "total_bytes rates, last interval": lambda: store.rates("total_bytes"),
+    }.items():
+        elapsed = min(timeit.repeat(code, number=1, repeat=NUMBER))
+        print(f"{name:<40}{elapsed * 1e3:>10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Measures how long importing the package takes in a fresh interpreter
+
+and which heavy libraries each entry point loads
+
+Run from the repository root with python benchmarks/bench_import.py. Each
+scenario runs in a new python process, so nothing is imported beforehand,
+and reports the best of REPEAT runs. Run python -X importtime -c
+"import hp_procurvearuba" for the breakdown per module.
+
+"""
+import os
+import subprocess
+import sys
+
+CAPTURES = os.path.join(os.path.dirname(__file__), "..", "tests", "captures", "HP_1")
+HEAVY = ("netmiko", "paramiko", "textfsm", "yaml")
+REPEAT = 5
+
+SCENARIOS = {
+    "import hp_procurvearuba": "import hp_procurvearuba",
+    "from hp_procurvearuba import HP": "from hp_procurvearuba import HP",
+    "replay captures": (
+        "from hp_procurvearuba import HP\n"
+        f"hp = HP.from_captures({CAPTURES!r})\n"
+        "hp.find_stp_mode()\n"
+        "hp.find_ports_up()"
+    ),
+    "import netmiko.hp": "import netmiko.hp",
+}
+
+TIMER = """
+import sys, time
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+loaded = sorted({{name.split('.')[0] for name in sys.modules}} & set({heavy!r}))
+print(elapsed, ','.join(loaded))
+"""
+
+
+def run(code):
+    """Returns the seconds taken by the code in a fresh interpreter and the
+    heavy libraries it loaded"""
+    output = subprocess.run(
+        [sys.executable, "-c", TIMER.format(code=code, heavy=HEAVY)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.split()
+    return float(output[0]), output[1] if len(output) > 1 else "-"
+
+
+def main():
+    for name, code in SCENARIOS.items():
+        results = [run(code) for _ in range(REPEAT)]
+        elapsed = min(seconds for seconds, _ in results)
+        print(f"{name:<35}{elapsed * 1e3:>10.1f} ms  {results[0][1]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Compares the single pass spanning tree parser of the stp module with the
+
+regex searches the STP methods of the HP class ran before it
+
+Run from the repository root with python benchmarks/bench_stp_parser.py. The
+captured show spanning-tree output of tests/captures/HP_1 is extended to the
+port count of a chassis switch, then every STP question answered by the HP
+class is asked of it both ways. The former port loops only match substrings
+such as "Forwarding" in line, so they neither parse the port rows nor tell a
+port state from the same word elsewhere on the line, which the single pass
+does for every row.
+
+"""
+import os
+import re
+import timeit
+
+from hp_procurvearuba.stp import parse_spanning_tree
+
+CAPTURE = os.path.join(
+    os.path.dirname(__file__),
+    "..",
+    "tests",
+    "captures",
+    "HP_1",
+    "show_spanning-tree.txt",
+)
+PORTS = 384
+NUMBER = 200
+
+
+def chassis_output():
+    """Returns the captured output with its port table extended to PORTS rows"""
+    with open(CAPTURE, "r") as f:
+        output = f.read()
+    row = "  {:<5} 100/1000T | 20000     128      Forwarding | 288023-4c77c0     2     Yes Yes"
+    rows = [row.format(f"A{port}") for port in range(1, PORTS + 1)]
+    return output.rstrip() + "\n" + "\n".join(rows) + "\n"
+
+
+def legacy(output):
+    """The regex searches and line loops of the HP class STP methods, one
+    per method"""
+    try:
+        mode = re.search(r"^\s+Mode\s+:\s+(?P<mode>RPVST)", output, flags=re.M)
+        mode = mode.group("mode")
+    except AttributeError:
+        try:
+            mode = re.search(
+                r"^\s+Force\s+Version\s+:\s+(?P<mode>MSTP)", output, flags=re.M
+            ).group("mode")
+        except AttributeError:
+            try:
+                mode = re.search(
+                    r"^\s+Force\s+Version\s+:\s+(?P<mode>RSTP)", output, flags=re.M
+                ).group("mode")
+            except AttributeError:
+                try:
+                    mode = re.search(
+                        r"^\s+Force\s+Version\s+:\s+(?P<mode>STP-compatible)",
+                        output,
+                        flags=re.M,
+                    ).group("mode")
+                except AttributeError:
+                    mode = None
+    disabled = re.search(
+        r"^\s+STP\s+Enabled\s+(\[No\]\s+:\s+No|:\s+No)", output, flags=re.M
+    )
+    enabled = re.search(
+        r"^\s+STP\s+Enabled\s+(\[No\]\s+:\s+Yes|:\s+Yes)", output, flags=re.M
+    )
+    root = re.search(r"(This switch is root)", output, flags=re.M)
+    switch_mac = re.search(
+        r"^\s+Switch MAC Address\s+:\s+(\S{6}-\S{6}.*)", output, flags=re.M
+    ).group(1)
+    # the port loops of find_stp_forwarding_port, find_stp_blocking_port and
+    # find_stp_disabled_port, collecting the lines they printed
+    ports = {}
+    for state in ("Forwarding", "Blocking", "Disabled"):
+        ports[state] = []
+        for line in output.strip().splitlines():
+            if state in line:
+                ports[state].append(line)
+    return mode, disabled, enabled, root, switch_mac, ports
+
+
+def single_pass(output):
+    """The same questions answered from one SpanningTree model"""
+    stp = parse_spanning_tree(output, "HP_1")
+    ports = {}
+    for state in ("Forwarding", "Blocking", "Disabled"):
+        ports[state] = [port for port in stp.ports if port.state == state]
+    return stp.mode, stp.enabled, stp.is_root, stp.switch_mac, ports
+
+
+def main():
+    output = chassis_output()
+    for name, func in (("legacy regex", legacy), ("single pass", single_pass)):
+        seconds = min(timeit.repeat(lambda: func(output), number=NUMBER, repeat=5))
+        print(f"{name:<15}{seconds / NUMBER * 1e6:>10.1f} us per switch")
+
+
+if __name__ == "__main__":
+    main()
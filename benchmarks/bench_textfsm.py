@@ -0,0 +1,63 @@
+"""Compares parsing with the compiled templates of the templates module with
+
+the netmiko path taken by send_command(..., use_textfsm=True)
+
+Run from the repository root with python benchmarks/bench_textfsm.py. The
+captured show mac-address and show int brief output of tests/captures/HP_1
+is extended to the size of a chassis switch and parsed both ways.
+
+"""
+import os
+import timeit
+
+from netmiko.utilities import structured_data_converter
+
+from hp_procurvearuba import templates
+
+CAPTURES = os.path.join(os.path.dirname(__file__), "..", "tests", "captures", "HP_1")
+MACS = 4000
+NUMBER = 20
+
+
+def capture(command):
+    """Returns the captured output of a command"""
+    with open(os.path.join(CAPTURES, command.replace(" ", "_") + ".txt")) as f:
+        return f.read()
+
+
+def mac_table():
+    """Returns show mac-address output with MACS rows"""
+    rows = [f"  3c4a92-{number:06x} {number % 48 + 1:<6} 300" for number in range(MACS)]
+    return capture("show mac-address").rstrip() + "\n" + "\n".join(rows) + "\n"
+
+
+def main():
+    outputs = {
+        "show mac-address": mac_table(),
+        "show int brief": capture("show int brief"),
+    }
+    for command, output in outputs.items():
+        assert templates.parse(command, output) == structured_data_converter(
+            output, command=command, platform="hp_procurve", use_textfsm=True
+        )
+        stock = min(
+            timeit.repeat(
+                lambda: structured_data_converter(
+                    output, command=command, platform="hp_procurve", use_textfsm=True
+                ),
+                number=NUMBER,
+                repeat=5,
+            )
+        )
+        compiled = min(
+            timeit.repeat(
+                lambda: templates.parse(command, output), number=NUMBER, repeat=5
+            )
+        )
+        print(f"{command}")
+        print(f"  {'netmiko':<15}{stock / NUMBER * 1e3:>10.2f} ms")
+        print(f"  {'compiled':<15}{compiled / NUMBER * 1e3:>10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
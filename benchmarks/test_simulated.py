@@ -0,0 +1,181 @@
+"""Benchmarks the find_* methods, transfers and fleet operations of the HP
+
+class against simulated switches
+
+Run from the repository root with python -m pytest benchmarks --benchmark-only,
+which needs pytest-benchmark, see the benchmark extra. Every find_* method is
+timed on a switch of each spanning tree mode twice: over SSH to a
+SimulatorServer with the cache turned off, so each call pays for the round
+trip and the parse, and replayed from the output of the same switch, so the
+parse is timed alone. The fleet operations run against 1 to BENCH_SWITCHES
+switches linked in a chain. Set BENCH_LATENCY to add a delay in seconds to
+every command of the simulated switches.
+
+"""
+import os
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from hp_procurvearuba import HP, HPFleet, MacIndex, Topology  # noqa: E402
+from hp_procurvearuba.replay import ReplayConnection  # noqa: E402
+from hp_procurvearuba.simulator import SimulatorServer, simulated_fleet  # noqa: E402
+
+SWITCHES = int(os.environ.get("BENCH_SWITCHES", "8"))
+LATENCY = float(os.environ.get("BENCH_LATENCY", "0"))
+FLEET_SIZES = sorted({1, min(4, SWITCHES), SWITCHES})
+STP_MODES = ("RSTP", "MSTP", "RPVST")
+SIZES = {"ports": 48, "vlans": 16, "macs": 2000, "arps": 1000}
+
+FIND_METHODS = {
+    "find_stp_mode": lambda switch: (),
+    "find_stp_disabled_switch": lambda switch: (),
+    "find_stp_enabled_switch": lambda switch: (),
+    "find_stp_root": lambda switch: (_rpvst_vlan(switch),),
+    "find_stp_forwarding_port": lambda switch: (_rpvst_vlan(switch),),
+    "find_stp_blocking_port": lambda switch: (_rpvst_vlan(switch),),
+    "find_stp_disabled_port": lambda switch: (_rpvst_vlan(switch),),
+    "find_mac_address_port": lambda switch: (_column(switch, 0),),
+    "find_vlans": lambda switch: (switch.vlans[1:4],),
+    "find_interface_errors": lambda switch: (),
+    "find_intrusion_alerts": lambda switch: (),
+    "find_firmware_version": lambda switch: (),
+    "find_switch_mac_address": lambda switch: ([switch.mac],),
+    "find_switch_serial_number": lambda switch: (),
+    "find_ports_down": lambda switch: (),
+    "find_ports_up": lambda switch: (),
+    "find_ip_from_mac_address": lambda switch: (_column(switch, 0),),
+    "find_mac_from_ip_address": lambda switch: (_column(switch, 3),),
+    "find_port_security_enabled_ports": lambda switch: (),
+    "find_port_security_disabled_ports": lambda switch: (),
+    "find_jumbo_vlan": lambda switch: (switch.vlans[2:3],),
+    "find_voice_vlan": lambda switch: (switch.vlans[1],),
+    "find_poe_enabled_ports": lambda switch: (),
+    "find_poe_disabled_ports": lambda switch: (),
+    "find_poe_switch_status": lambda switch: (),
+    "list_vlans_on_trunk": lambda switch: (),
+    "find_vlans_on_trunk": lambda switch: (switch.vlans[1:4],),
+    "find_trunk_port_speed": lambda switch: (),
+    "find_ntp_config": lambda switch: (),
+    "find_ntp_status": lambda switch: (),
+}
+
+TRANSFERS = {
+    "tftp_backup_config": lambda hp: hp.tftp_backup_config("192.168.1.3"),
+    "sftp_backup_config": lambda hp: hp.sftp_backup_config(
+        "192.168.1.3", "backup", "secret"
+    ),
+    "tftp_load_firmware": lambda hp: hp.tftp_load_firmware(
+        "192.168.1.3", "WB_16_10.swi", "secondary"
+    ),
+    "sftp_load_firmware": lambda hp: hp.sftp_load_firmware(
+        "192.168.1.3", "WB_16_10.swi", "secondary"
+    ),
+}
+
+REBOOTS = {
+    "tftp_load_config": lambda hp: hp.tftp_load_config("192.168.1.3", "config"),
+    "sftp_load_config": lambda hp: hp.sftp_load_config("192.168.1.3", "config"),
+    "boot_system_flash": lambda hp: hp.boot_system_flash("secondary"),
+}
+
+
+def _rpvst_vlan(switch):
+    return switch.vlans[1] if switch.stp_mode == "RPVST" else None
+
+
+def _column(switch, column):
+    """Returns a few entries of a column of the arp table"""
+    return [entry[column] for entry in switch.arp_table[::250]]
+
+
+@pytest.fixture(scope="module")
+def server():
+    switches = simulated_fleet(
+        max(SWITCHES, len(STP_MODES)), stp_modes=STP_MODES, latency=LATENCY, **SIZES
+    )
+    with SimulatorServer(switches) as server:
+        yield server
+
+
+@pytest.fixture(scope="module")
+def sessions(server):
+    """Returns an uncached SSH session to the first switch of each mode"""
+    sessions = {}
+    for switch, device in zip(server.switches, server.devices(cache_ttl=0)):
+        if switch.stp_mode not in sessions:
+            sessions[switch.stp_mode] = (switch, HP(**device))
+    yield sessions
+    for _, hp in sessions.values():
+        hp.disconnect()
+
+
+@pytest.mark.parametrize("mode", STP_MODES)
+@pytest.mark.parametrize("method", list(FIND_METHODS))
+def test_find_ssh(benchmark, sessions, mode, method):
+    switch, hp = sessions[mode]
+    benchmark.group = f"ssh {method}"
+    benchmark(getattr(hp, method), *FIND_METHODS[method](switch))
+
+
+@pytest.mark.parametrize("mode", STP_MODES)
+@pytest.mark.parametrize("method", list(FIND_METHODS))
+def test_find_replay(benchmark, sessions, mode, method):
+    switch, _ = sessions[mode]
+    hp = HP(
+        switch.hostname,
+        connection=ReplayConnection(switch.hostname, switch.outputs()),
+        cache_ttl=0,
+    )
+    benchmark.group = f"replay {method}"
+    benchmark(getattr(hp, method), *FIND_METHODS[method](switch))
+
+
+@pytest.mark.parametrize("transfer", list(TRANSFERS))
+def test_transfer(benchmark, sessions, transfer):
+    _, hp = sessions["RSTP"]
+    result = benchmark(TRANSFERS[transfer], hp)
+    assert result.success
+
+
+@pytest.mark.parametrize("transfer", list(REBOOTS))
+def test_reboot(benchmark, server, transfer):
+    device = server.devices()[0]
+    result = benchmark.pedantic(
+        REBOOTS[transfer], setup=lambda: ((HP(**device),), {}), rounds=5
+    )
+    assert result.success
+
+
+@pytest.mark.parametrize("size", FLEET_SIZES)
+def test_fleet_run(benchmark, server, size):
+    fleet = HPFleet(server.devices()[:size])
+    benchmark.group = "fleet run find_ports_up"
+    results = benchmark.pedantic(fleet.run_all, ("find_ports_up",), rounds=3)
+    assert all(result.ok for result in results)
+
+
+@pytest.mark.parametrize("size", FLEET_SIZES)
+def test_fleet_mac_index(benchmark, server, size):
+    fleet = HPFleet(server.devices()[:size])
+    benchmark.group = "fleet MacIndex.from_fleet"
+    index = benchmark.pedantic(MacIndex.from_fleet, (fleet,), rounds=3)
+    assert len(index)
+
+
+@pytest.mark.parametrize("size", FLEET_SIZES)
+def test_fleet_topology(benchmark, server, size):
+    fleet = HPFleet(server.devices()[:size])
+    benchmark.group = "fleet Topology.discover"
+    topology = benchmark.pedantic(Topology.discover, (fleet,), rounds=3)
+    assert len(topology.switches()) >= size
+
+
+@pytest.mark.parametrize("size", FLEET_SIZES)
+def test_fleet_port_table(benchmark, server, size):
+    pytest.importorskip("numpy")
+    fleet = HPFleet(server.devices()[:size])
+    benchmark.group = "fleet port_table"
+    table = benchmark.pedantic(fleet.port_table, rounds=3)
+    assert len(table.hostnames) == size
@@ -1,17 +1,16 @@
-from hp_procurvearuba import HP
-import yaml
+from hp_procurvearuba import HPFleet
 
-with open('devices.yml', 'r') as f:
-    device_data = yaml.safe_load(f)
-    device_data = device_data.pop('devices')
-    device_data = device_data
 
 def main():
-    for device in device_data:
-        hp_obj = HP(**device)
-        hp_obj.find_switch_serial_number()
-        hp_obj.disconnect()
+    # timeout bounds the wait for each result, the conn_timeout and
+    # read_timeout_override of each device in devices.yml bound its session
+    fleet = HPFleet.from_yaml('devices.yml', max_workers=32, timeout=120)
+    for result in fleet.run('find_switch_serial_number'):
+        if not result.ok:
+            print(f"{result.hostname} failed: {result.error}")
+            continue
+        for record in result.result:
+            print(f"{record.hostname}: {record.serial_number}")
 
 if __name__=='__main__':
     main()
-
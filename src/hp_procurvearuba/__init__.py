@@ -1 +1,34 @@
-from .procurvearuba import HP
+import importlib
+
+_EXPORTS = {
+    "HP": ".procurvearuba",
+    "HPFleet": ".fleet",
+    "FleetResult": ".fleet",
+    "FleetBackup": ".backup",
+    "ConfigArchive": ".archive",
+    "DeviceSnapshot": ".snapshot",
+    "SnapshotPoller": ".probe",
+    "MacIndex": ".macindex",
+    "ConnectionPool": ".pool",
+    "Topology": ".topology",
+    "CounterStore": ".counters",
+    "PortTable": ".porttable",
+    "MetricsExporter": ".exporter",
+    "Instrumentation": ".instrument",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    # the public classes are imported on first access, so that importing one
+    # does not load the modules of the others
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
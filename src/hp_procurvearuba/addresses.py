@@ -0,0 +1,85 @@
+"""The addresses module normalizes the mac addresses, IP addresses and vlan
+
+ids given to the HP class to the format displayed by HP Procurve and Aruba
+switches
+
+Mac addresses may be given separated by colons (3c:4a:92:0a:0b:0c), dashes
+(3c-4a-92-0a-0b-0c), dots (3c4a.920a.0b0c), in the ProCurve format
+(3c4a92-0a0b0c) or as twelve bare hexadecimal digits, in any case. IP addresses are
+compared in the compressed form returned by the ipaddress module.
+
+"""
+import ipaddress
+import re
+
+MAC_DIGITS = re.compile(r"[0-9a-f]{12}")
+MAC_SEPARATORS = re.compile(r"[\s:.\-]")
+
+
+def normalize_mac(mac):
+    """Returns the mac address in the ProCurve xxxxxx-xxxxxx format.
+
+    Raises ValueError if the mac address is not valid.
+
+    Parameters
+    ----------
+    mac : str
+        The mac address in any of the supported formats.
+    """
+    digits = MAC_SEPARATORS.sub("", str(mac)).lower()
+    if not MAC_DIGITS.fullmatch(digits):
+        raise ValueError(f"'{mac}' is not a mac address")
+    return digits[:6] + "-" + digits[6:]
+
+
+def normalize_ip(ip):
+    """Returns the IP address in its compressed form, such as 192.168.1.3 for
+    192.168.001.003.
+
+    Raises ValueError if the IP address is not valid.
+
+    Parameters
+    ----------
+    ip : str
+        The IPv4 or IPv6 address.
+    """
+    text = str(ip).strip()
+    if "." in text and ":" not in text:
+        # ipaddress rejects leading zeros in IPv4 octets
+        text = ".".join(
+            str(int(octet)) if octet.isdigit() else octet for octet in text.split(".")
+        )
+    return str(ipaddress.ip_address(text))
+
+
+def normalize_vlan(vlan):
+    """Returns the vlan id as the string displayed by the switch, such as
+    '100' for 100 or ' 100'.
+
+    Raises ValueError if the vlan id is not a number.
+    """
+    return str(int(str(vlan).strip()))
+
+
+def lookup_normalized(index, value, normalize, default=None):
+    """Returns the entry of an index keyed on normalized values for a value
+    given in any format, or the default if the value is not in the index or
+    cannot be normalized, so that one malformed value of a bulk lookup does
+    not fail the others.
+
+    Parameters
+    ----------
+    index : dict
+        The entries keyed on normalized values.
+    value : str or int
+        The value to look up.
+    normalize : callable
+        normalize_mac, normalize_ip or normalize_vlan.
+    default : object
+        The entry of a value which is not found.
+    """
+    try:
+        key = normalize(value)
+    except ValueError:
+        return default
+    return index.get(key, default)
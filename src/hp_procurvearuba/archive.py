@@ -0,0 +1,202 @@
+"""The archive module consists of a class ConfigArchive which keeps the running
+
+configuration of each switch in a local content addressed store
+
+Configurations are pulled over the existing session with show run rather
+than pushed to a tftp or sftp server. Volatile lines, such as the output
+header and the comment lines written by the configuration editor, are
+removed, and the normalized configuration is stored once, gzip compressed,
+under its sha256 hash. Each switch has a history of the hashes it was seen
+with, so an unchanged configuration only adds a pointer to the history of
+its switch and identical configurations of different switches share one
+object.
+
+"""
+from collections import namedtuple
+from datetime import datetime, timezone
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+
+from .stream import iter_lines
+
+CONFIG_COMMAND = "show run"
+
+VOLATILE = (
+    re.compile(r"^Running configuration:"),
+    re.compile(r"^;"),
+)
+
+ArchiveEntry = namedtuple(
+    "ArchiveEntry", ["hostname", "sha256", "size", "taken_at", "changed"]
+)
+ArchiveEntry.__doc__ = """A configuration of a switch in the history of the
+archive. size is the size of the normalized configuration, and changed is
+False when it is the same as the configuration before it."""
+
+
+def normalize_config(config, volatile=VOLATILE):
+    """Returns a configuration without its volatile lines, trailing blanks
+    and blank lines before and after it.
+
+    Parameters
+    ----------
+    config : str or iterable of str
+        The configuration as one string or line by line.
+    volatile : tuple of re.Pattern
+        The patterns of the lines to remove.
+    """
+    if isinstance(config, str):
+        config = iter_lines(config)
+    lines = [
+        line
+        for line in (line.rstrip() for line in config)
+        if not any(pattern.match(line) for pattern in volatile)
+    ]
+    return "\n".join(lines).strip("\n") + "\n"
+
+
+class ConfigArchive:
+    """Class ConfigArchive stores the configurations of switches once per
+    distinct content and records the history of each switch"""
+
+    def __init__(self, path, volatile=VOLATILE):
+        """
+        Parameters
+        ----------
+        path : str
+            The directory of the archive, created on first use. Objects are
+            written under objects/ and the history of each switch under
+            refs/<hostname>.json.
+        volatile : tuple of re.Pattern
+            The patterns of the configuration lines to leave out.
+        """
+        self.path = path
+        self.volatile = volatile
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"ConfigArchive({self.path})"
+
+    def __contains__(self, sha256):
+        return os.path.exists(self._object_path(sha256))
+
+    def archive(self, hp_obj):
+        """Pulls the running configuration of a switch and stores it.
+
+        Parameters
+        ----------
+        hp_obj : HP
+            The HP object of the switch.
+
+        Returns
+        -------
+        ArchiveEntry
+            The entry added to the history of the switch.
+        """
+        config = normalize_config(hp_obj.stream_command(CONFIG_COMMAND), self.volatile)
+        return self._add(hp_obj.hostname, config, None)
+
+    def store(self, hostname, config, taken_at=None):
+        """Stores a configuration of a switch, writing a new object only if no
+        switch has been archived with the same configuration before.
+
+        Parameters
+        ----------
+        hostname : str
+            The hostname of the switch.
+        config : str
+            The configuration, as output by show run.
+        taken_at : str
+            The ISO 8601 time the configuration was taken, defaults to now.
+
+        Returns
+        -------
+        ArchiveEntry
+            The entry added to the history of the switch.
+        """
+        return self._add(hostname, normalize_config(config, self.volatile), taken_at)
+
+    def history(self, hostname):
+        """Returns the list of ArchiveEntry of a switch, oldest first"""
+        try:
+            with open(self._ref_path(hostname), "r", encoding="utf-8") as f:
+                return [ArchiveEntry(**entry) for entry in json.load(f)]
+        except FileNotFoundError:
+            return []
+
+    def latest(self, hostname):
+        """Returns the latest ArchiveEntry of a switch, or None if the switch
+        has not been archived"""
+        history = self.history(hostname)
+        return history[-1] if history else None
+
+    def changes(self, hostname):
+        """Returns the ArchiveEntry of each configuration change of a switch,
+        leaving out the runs which found it unchanged"""
+        return [entry for entry in self.history(hostname) if entry.changed]
+
+    def read(self, sha256):
+        """Returns the normalized configuration stored under a hash"""
+        with gzip.open(self._object_path(sha256), "rt", encoding="utf-8") as f:
+            return f.read()
+
+    def checkout(self, hostname, index=-1):
+        """Returns the normalized configuration of a switch from its history,
+        the latest by default"""
+        history = self.history(hostname)
+        if not history:
+            raise KeyError(f"{hostname} has not been archived")
+        return self.read(history[index].sha256)
+
+    def hostnames(self):
+        """Returns the sorted hostnames of the archived switches"""
+        try:
+            filenames = os.listdir(os.path.join(self.path, "refs"))
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-5] for name in filenames if name.endswith(".json"))
+
+    def _add(self, hostname, config, taken_at):
+        """Writes the object of a normalized configuration if it is new and
+        appends it to the history of the switch"""
+        data = config.encode("utf-8")
+        sha256 = hashlib.sha256(data).hexdigest()
+        if sha256 not in self:
+            _write_atomic(self._object_path(sha256), gzip.compress(data, mtime=0))
+        taken_at = taken_at or datetime.now(timezone.utc).isoformat(timespec="seconds")
+        with self._lock:
+            history = self.history(hostname)
+            changed = not history or history[-1].sha256 != sha256
+            entry = ArchiveEntry(hostname, sha256, len(data), taken_at, changed)
+            history.append(entry)
+            _write_atomic(
+                self._ref_path(hostname),
+                json.dumps([e._asdict() for e in history], indent=1).encode("utf-8"),
+            )
+        return entry
+
+    def _object_path(self, sha256):
+        return os.path.join(self.path, "objects", sha256[:2], sha256[2:] + ".gz")
+
+    def _ref_path(self, hostname):
+        return os.path.join(self.path, "refs", hostname + ".json")
+
+
+def _write_atomic(path, data):
+    """Writes a file through a temporary file, so that readers and other
+    threads never see it half written"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -0,0 +1,291 @@
+"""The backup module consists of a class FleetBackup which backs up the startup
+
+configuration of a fleet of switches to tftp or sftp servers
+
+Switches are backed up in parallel on the thread pool of an HPFleet, while a
+semaphore per transfer server caps how many switches copy to the same server
+at once, so a single tftp server is not overwhelmed. Failed backups are
+retried with exponential backoff, and every switch ends in a BackupRecord of
+the file name, size, hash, duration and status, which write_manifest() saves
+as a json manifest.
+
+"""
+from collections import namedtuple
+from datetime import datetime, timezone
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+
+from .fleet import HPFleet, device_hostname
+from .procurvearuba import HP
+
+PROTOCOLS = ("tftp", "sftp")
+
+BackupRecord = namedtuple(
+    "BackupRecord",
+    [
+        "hostname",
+        "server",
+        "filename",
+        "success",
+        "attempts",
+        "size",
+        "sha256",
+        "duration",
+        "error",
+    ],
+)
+BackupRecord.__doc__ = """The outcome of backing up the startup configuration
+of one switch. size and sha256 are None unless the directory the transfer
+server writes to is readable locally."""
+
+
+class FleetBackup:
+    """Class FleetBackup backs up the startup configuration of every switch of
+    an HPFleet, with a limit on the number of concurrent transfers to each
+    server"""
+
+    def __init__(
+        self,
+        fleet,
+        server,
+        protocol="tftp",
+        per_server=4,
+        retries=2,
+        backoff=5.0,
+        username=None,
+        password=None,
+        server_dirs=None,
+    ):
+        """
+        Parameters
+        ----------
+        fleet : HPFleet
+            The switches to back up. Its max_workers caps the number of
+            switches backed up at once across all servers, and its timeout
+            limits each transfer, not the time a switch waits for a free
+            transfer slot. With the default HP factory the sessions open
+            once a slot is free; a custom factory is called as is, so it
+            should connect lazily for the same effect.
+        server : str
+            The IP address of the transfer server. A device dictionary may
+            name its own server under the 'backup_server' key.
+        protocol : str
+            'tftp' or 'sftp'.
+        per_server : int
+            Maximum number of switches copying to the same server at once.
+        retries : int
+            Number of times a failed backup is tried again.
+        backoff : int or float
+            Number of seconds to wait before the first retry, doubled before
+            each later retry.
+        username : str
+            The username of the sftp server.
+        password : str
+            The password of the sftp server.
+        server_dirs : str or dict
+            The local directory the transfer server writes its files to, or
+            a dictionary of the directory of each server, used to record the
+            size and sha256 hash of each backup.
+        """
+        if protocol not in PROTOCOLS:
+            raise ValueError(f"protocol must be one of {PROTOCOLS}, not {protocol!r}")
+        self.fleet = fleet
+        self.server = server
+        self.protocol = protocol
+        self.per_server = per_server
+        self.retries = retries
+        self.backoff = backoff
+        self.username = username
+        self.password = password
+        self.server_dirs = server_dirs
+        self._servers = {
+            device_hostname(device): device.get("backup_server", server)
+            for device in fleet.devices
+        }
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return (
+            f"FleetBackup({len(self.fleet)} devices, {self.protocol}, "
+            f"{self.per_server} per server)"
+        )
+
+    def run(self):
+        """Backs up every switch, yielding a BackupRecord for each switch as
+        soon as it finishes"""
+        factory = self.fleet.factory
+        if factory is HP:
+            # sessions open once a transfer slot is free, not while queued
+            factory = functools.partial(HP, lazy=True)
+        # the timeout applies to each transfer, not to waiting for a slot
+        fleet = HPFleet(
+            [_without_server(device) for device in self.fleet.devices],
+            max_workers=self.fleet.max_workers,
+            factory=factory,
+            disconnect=self.fleet.disconnect,
+            pool=self.fleet.pool,
+        )
+        for result in fleet.run(self._backup):
+            if result.ok:
+                yield result.result
+            else:
+                yield BackupRecord(
+                    result.hostname,
+                    self._servers.get(result.hostname, self.server),
+                    None,
+                    False,
+                    0,
+                    None,
+                    None,
+                    result.elapsed,
+                    str(result.error),
+                )
+
+    def run_all(self, manifest=None):
+        """Backs up every switch and returns the list of BackupRecord once all
+        switches have finished.
+
+        Parameters
+        ----------
+        manifest : str
+            Path of a json manifest to write the records to.
+        """
+        started = datetime.now(timezone.utc)
+        records = list(self.run())
+        if manifest is not None:
+            write_manifest(records, manifest, protocol=self.protocol, started=started)
+        return records
+
+    def _backup(self, hp_obj):
+        """Backs up one switch, retrying failed transfers"""
+        server = self._servers.get(hp_obj.hostname, self.server)
+        semaphore = self._semaphore(server)
+        started = time.monotonic()
+        error = None
+        for attempt in range(1, self.retries + 2):
+            if attempt > 1:
+                time.sleep(self.backoff * 2 ** (attempt - 2))
+            with semaphore:
+                try:
+                    result = self._transfer(hp_obj, server)
+                except Exception as exc:
+                    error = str(exc) or type(exc).__name__
+                    _disconnect(hp_obj)
+                    continue
+            filename = result.command.split()[-1]
+            if result.success:
+                size, sha256 = self._digest(server, filename)
+                return BackupRecord(
+                    hp_obj.hostname,
+                    server,
+                    filename,
+                    True,
+                    attempt,
+                    size,
+                    sha256,
+                    time.monotonic() - started,
+                    None,
+                )
+            error = result.message
+        return BackupRecord(
+            hp_obj.hostname,
+            server,
+            None,
+            False,
+            attempt,
+            None,
+            None,
+            time.monotonic() - started,
+            error,
+        )
+
+    def _transfer(self, hp_obj, server):
+        kwargs = {} if self.fleet.timeout is None else {"timeout": self.fleet.timeout}
+        if self.protocol == "sftp":
+            return hp_obj.sftp_backup_config(
+                server, username=self.username, password=self.password, **kwargs
+            )
+        return hp_obj.tftp_backup_config(server, **kwargs)
+
+    def _semaphore(self, server):
+        """Returns the semaphore limiting the transfers to a server"""
+        with self._lock:
+            if server not in self._semaphores:
+                self._semaphores[server] = threading.BoundedSemaphore(self.per_server)
+            return self._semaphores[server]
+
+    def _digest(self, server, filename):
+        """Returns the size and sha256 hash of a backup file, or None and None
+        if the directory of the server is not readable locally"""
+        server_dir = self.server_dirs
+        if isinstance(server_dir, dict):
+            server_dir = server_dir.get(server)
+        if server_dir is None:
+            return None, None
+        path = os.path.join(server_dir, filename)
+        try:
+            return os.path.getsize(path), file_sha256(path)
+        except OSError:
+            return None, None
+
+
+def file_sha256(path):
+    """Returns the sha256 hash of a file, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(65536), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_manifest(records, path, protocol=None, started=None):
+    """Writes BackupRecord records to a json manifest.
+
+    Parameters
+    ----------
+    records : list of BackupRecord
+        The records of a fleet backup.
+    path : str
+        Path of the json manifest.
+    protocol : str
+        The transfer protocol of the backup, recorded in the manifest.
+    started : datetime
+        When the backup started, the time of writing when not given.
+    """
+    started = started or datetime.now(timezone.utc)
+    data = {
+        "started": started.isoformat(),
+        "protocol": protocol,
+        "succeeded": sum(record.success for record in records),
+        "failed": sum(not record.success for record in records),
+        "backups": [record._asdict() for record in records],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+
+def read_manifest(path):
+    """Returns the list of BackupRecord records of a json manifest"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return [BackupRecord(**record) for record in data["backups"]]
+
+
+def _without_server(device):
+    """Returns a device dictionary without its backup server, which is not an
+    argument to the HP class"""
+    return {key: value for key, value in device.items() if key != "backup_server"}
+
+
+def _disconnect(hp_obj):
+    """Closes a session before a retry, ignoring a session which has already
+    dropped"""
+    try:
+        hp_obj.disconnect()
+    except Exception:
+        pass
@@ -0,0 +1,119 @@
+"""The cache module provides the CommandCache class used by the HP class to
+
+keep the output of show commands for the duration of a session
+
+Entries are keyed on (command, use_textfsm) and are evicted either when they
+are older than the time to live or when the cache grows beyond its size limit,
+in which case the least recently used entry is dropped first.
+
+"""
+from collections import OrderedDict, namedtuple
+import threading
+import time
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize", "ttl"])
+
+_MISSING = object()
+
+
+class CommandCache:
+    """Least recently used cache of command output with a time to live"""
+
+    def __init__(self, ttl=60, maxsize=128):
+        """
+        Parameters
+        ----------
+        ttl : int or float
+            Number of seconds an entry stays valid. Set to None to keep
+            entries until they are invalidated or evicted, or to 0 to
+            disable caching.
+        maxsize : int
+            Maximum number of entries held before the least recently used
+            entry is evicted.
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING, count=False) is not _MISSING
+
+    @property
+    def enabled(self):
+        """True unless the cache was created with a ttl or maxsize of 0"""
+        return self.ttl != 0 and self.maxsize != 0
+
+    def get(self, key, default=None, count=True):
+        """Returns the cached value for key, or default if it is missing or
+        has expired.
+
+        Parameters
+        ----------
+        key : tuple
+            The (command, use_textfsm) key of the entry.
+        default :
+            Value returned when there is no valid entry for key.
+        count : bool
+            Set to False to look up the entry without updating the hit and
+            miss counters.
+        """
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                stored_at, value = entry
+                if self.ttl is None or time.monotonic() - stored_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    if count:
+                        self.hits += 1
+                    return value
+                del self._entries[key]
+            if count:
+                self.misses += 1
+            return default
+
+    def set(self, key, value):
+        """Stores value under key, evicting the least recently used entries
+        if the cache is full.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while self.maxsize is not None and len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, command=None):
+        """Removes cached entries.
+
+        Parameters
+        ----------
+        command : str
+            Only remove the entries for this command, parsed and unparsed.
+            All entries are removed when no command is given.
+        """
+        with self._lock:
+            if command is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == command]:
+                del self._entries[key]
+
+    def clear(self):
+        """Removes all entries and resets the hit and miss counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        """Returns a CacheInfo named tuple with the cache statistics"""
+        return CacheInfo(
+            self.hits, self.misses, self.maxsize, len(self._entries), self.ttl
+        )
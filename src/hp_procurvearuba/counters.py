@@ -0,0 +1,196 @@
+"""The counters module consists of a class CounterStore which keeps the recent
+
+port counters of a fleet of switches and turns them into rates
+
+Each collection sends one show interfaces to a switch and writes the total
+bytes, total frames, receive errors and transmit drops of every port into a
+ring buffer holding the last depth samples of each port. The buffers of all
+ports of the fleet are held in one numpy array, so the rate of a counter is
+computed for every port at once, without a Python loop over the ports.
+The counters of the switch are 32 bit and wrap around, and they are reset
+when the switch reboots or the counters are cleared. A counter lower than its
+previous sample counts as wrapped when the previous sample was in the upper
+half of the counter range, and as reset, counting up from zero, otherwise.
+
+numpy is an optional dependency, installed with the analytics extra.
+
+"""
+from collections import namedtuple
+import time
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    raise ImportError(
+        "the counters module needs numpy, install hp_procurvearuba[analytics]"
+    ) from None
+
+from .templates import parse_count
+
+COUNTER_COMMAND = "show interfaces"
+COUNTERS = ("total_bytes", "total_frames", "errors_rx", "drops_tx")
+COUNTER_MAX = 2**32
+DEPTH = 60
+
+PortRate = namedtuple("PortRate", ["hostname", "port", "counter", "per_minute"])
+PortRate.__doc__ = """The rate of a counter of a port, in counts per minute"""
+
+
+def counter_deltas(previous, current, maximum=COUNTER_MAX):
+    """Returns the increase of counters between two samples, as a numpy array,
+    counting a counter which went down as wrapped if it was in the upper half
+    of its range and as reset to zero otherwise"""
+    previous = np.asarray(previous, dtype=np.int64)
+    current = np.asarray(current, dtype=np.int64)
+    deltas = current - previous
+    lower = deltas < 0
+    wrapped = lower & (previous >= maximum // 2)
+    deltas[wrapped] += maximum
+    reset = lower & ~wrapped
+    deltas[reset] = current[reset]
+    return deltas
+
+
+class CounterStore:
+    """Class CounterStore holds a ring buffer of the port counters of every
+    port of a fleet and computes their rates"""
+
+    def __init__(self, depth=DEPTH, counters=COUNTERS, maximum=COUNTER_MAX):
+        """
+        Parameters
+        ----------
+        depth : int
+            Number of samples kept for each port, the oldest being dropped
+            first.
+        counters : tuple of str
+            The fields of the show interfaces output to keep.
+        maximum : int
+            The value at which the counters of the switch wrap around.
+        """
+        self.depth = depth
+        self.counters = tuple(counters)
+        self.maximum = maximum
+        self.ports = []
+        self.errors = {}
+        self._index = {}
+        self._values = np.zeros((0, depth, len(self.counters)), dtype=np.int64)
+        self._times = np.zeros((0, depth))
+        self._count = np.zeros(0, dtype=np.int64)
+
+    def __repr__(self):
+        return f"CounterStore({len(self.ports)} ports, depth {self.depth})"
+
+    def __len__(self):
+        return len(self.ports)
+
+    def add(self, hostname, output, taken_at=None):
+        """Adds a sample of the counters of a switch.
+
+        Parameters
+        ----------
+        hostname : str
+            The hostname of the switch.
+        output : list of dict
+            The textfsm output of show interfaces.
+        taken_at : float
+            The epoch time of the sample, defaults to now.
+        """
+        if not isinstance(output, list) or not output:
+            return
+        rows = np.array([self._row(hostname, port["port"]) for port in output])
+        values = [[parse_count(port[c]) for c in self.counters] for port in output]
+        positions = self._count[rows] % self.depth
+        self._values[rows, positions] = values
+        self._times[rows, positions] = time.time() if taken_at is None else taken_at
+        self._count[rows] += 1
+
+    def collect(self, hp_obj):
+        """Adds a sample of the counters of a switch read with show interfaces,
+        leaving out any cached output"""
+        hp_obj.cache.invalidate(COUNTER_COMMAND)
+        self.add(
+            hp_obj.hostname, hp_obj.send_command(COUNTER_COMMAND, use_textfsm=True)
+        )
+
+    def poll(self, fleet):
+        """Collects a sample from every switch of an HPFleet, recording the
+        error of each switch which could not be read, and returns the number
+        of switches sampled"""
+        sampled = 0
+        for result in fleet.run(self.collect):
+            if result.ok:
+                self.errors.pop(result.hostname, None)
+                sampled += 1
+            else:
+                self.errors[result.hostname] = str(result.error)
+        return sampled
+
+    def rates(self, counter, window=1):
+        """Returns the rate of a counter of every port, in counts per second,
+        as a numpy array in the order of self.ports.
+
+        Parameters
+        ----------
+        counter : str
+            One of the counters, such as errors_rx.
+        window : int
+            Number of sample intervals the rate is averaged over, up to
+            depth - 1. Ports with fewer samples use the samples they have,
+            and ports with a single sample have a rate of nan.
+        """
+        column = self.counters.index(counter)
+        window = min(window, self.depth - 1)
+        count = self._count[: len(self.ports), None]
+        back = np.arange(window, -1, -1)
+        samples = count - 1 - back
+        valid = samples >= 0
+        positions = samples % self.depth
+        ports = np.arange(len(self.ports))[:, None]
+        values = self._values[ports, positions, column]
+        deltas = counter_deltas(values[:, :-1], values[:, 1:], self.maximum)
+        deltas[~(valid[:, :-1] & valid[:, 1:])] = 0
+        first = np.argmax(valid, axis=1)
+        times = self._times[ports, positions]
+        elapsed = times[:, -1] - times[np.arange(len(self.ports)), first]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(elapsed > 0, deltas.sum(axis=1) / elapsed, np.nan)
+
+    def exceeding(self, counter, per_minute, window=1):
+        """Returns the PortRate of every port whose counter rises faster than
+        per_minute counts a minute, highest rate first.
+
+        Parameters
+        ----------
+        counter : str
+            One of the counters, such as errors_rx.
+        per_minute : int or float
+            The rate not to exceed.
+        window : int
+            Number of sample intervals the rate is averaged over.
+        """
+        rates = self.rates(counter, window) * 60
+        with np.errstate(invalid="ignore"):
+            (rows,) = np.nonzero(rates > per_minute)
+        rows = rows[np.argsort(-rates[rows], kind="stable")]
+        return [PortRate(*self.ports[row], counter, float(rates[row])) for row in rows]
+
+    def _row(self, hostname, port):
+        """Returns the row of a port in the buffers, adding it if it is new"""
+        key = (hostname, port)
+        row = self._index.get(key)
+        if row is None:
+            row = len(self.ports)
+            if row == len(self._count):
+                self._grow(max(64, 2 * row))
+            self._index[key] = row
+            self.ports.append(key)
+        return row
+
+    def _grow(self, size):
+        """Extends the buffers to hold size ports"""
+        extra = size - len(self._count)
+        self._values = np.concatenate(
+            [self._values, np.zeros((extra,) + self._values.shape[1:], np.int64)]
+        )
+        self._times = np.concatenate([self._times, np.zeros((extra, self.depth))])
+        self._count = np.concatenate([self._count, np.zeros(extra, np.int64)])
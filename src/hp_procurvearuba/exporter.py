@@ -0,0 +1,338 @@
+"""The exporter module consists of a class MetricsExporter which polls a fleet
+
+in the background and serves the results as Prometheus metrics over HTTP
+
+Collection and serving are kept apart. A background thread polls every
+switch of an HPFleet on a fixed interval for its port status, interface
+errors, spanning tree state, POE+ ports and ntp status, and renders the
+Prometheus text exposition of the results once per poll. Each scrape of
+/metrics returns the last rendered page, so a scrape never opens an SSH
+session or waits for a switch, however many dashboards are refreshed.
+Switches which fail keep their last samples, flagged by hp_switch_up 0, and
+the error of each failed switch or collector is logged as a warning.
+
+"""
+from collections import namedtuple
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import logging
+import re
+import socketserver
+import threading
+import time
+
+from .templates import parse_count, rows
+
+INTERVAL = 60
+PORT = 9120
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+log = logging.getLogger(__name__)
+
+NTP_SYNCHRONIZED = re.compile(r"Synchronization Status\s+:\s+Synchronized", re.M)
+
+Sample = namedtuple("Sample", ["name", "labels", "value"])
+Sample.__doc__ = """A sample of a metric. labels is a tuple of (name, value)
+pairs, the hostname first."""
+
+METRICS = {
+    "hp_switch_up": ("gauge", "1 if the last poll of the switch succeeded"),
+    "hp_poll_duration_seconds": ("gauge", "Seconds the last poll of the switch took"),
+    "hp_last_poll_timestamp_seconds": (
+        "gauge",
+        "Epoch time of the last successful poll of the switch",
+    ),
+    "hp_collector_up": ("gauge", "1 if the collector succeeded in the last poll"),
+    "hp_port_up": ("gauge", "1 if the port link is up"),
+    "hp_port_enabled": ("gauge", "1 if the port is enabled"),
+    "hp_port_intrusion_alert": ("gauge", "1 if the port has an intrusion alert"),
+    "hp_port_rx_errors_total": ("counter", "Receive errors of the port"),
+    "hp_port_tx_drops_total": ("counter", "Transmit drops of the port"),
+    "hp_stp_enabled": ("gauge", "1 if spanning tree is enabled"),
+    "hp_stp_root": ("gauge", "1 if the switch is the spanning tree root"),
+    "hp_stp_port_forwarding": ("gauge", "1 if the spanning tree port is forwarding"),
+    "hp_poe_port_enabled": ("gauge", "1 if POE+ is enabled on the port"),
+    "hp_poe_port_delivering": ("gauge", "1 if the port is delivering POE+ power"),
+    "hp_ntp_enabled": ("gauge", "1 if ntp is enabled"),
+    "hp_ntp_synchronized": ("gauge", "1 if the switch clock is synchronized by ntp"),
+}
+
+
+def port_samples(hp_obj):
+    """Returns the samples of the status and counters of every port"""
+    hostname = hp_obj.hostname
+    samples = []
+    for port in rows(hp_obj.send_command("show int brief", use_textfsm=True)):
+        labels = (("hostname", hostname), ("port", port["port"]))
+        samples += [
+            Sample("hp_port_up", labels, int(port["status"] == "Up")),
+            Sample("hp_port_enabled", labels, int(port["enabled"] == "Yes")),
+            Sample(
+                "hp_port_intrusion_alert", labels, int(port["intrusion_alert"] == "Yes")
+            ),
+        ]
+    for port in rows(hp_obj.send_command("show interfaces", use_textfsm=True)):
+        labels = (("hostname", hostname), ("port", port["port"]))
+        samples += [
+            Sample("hp_port_rx_errors_total", labels, parse_count(port["errors_rx"])),
+            Sample("hp_port_tx_drops_total", labels, parse_count(port["drops_tx"])),
+        ]
+    return samples
+
+
+def stp_samples(hp_obj):
+    """Returns the samples of the spanning tree state of the switch"""
+    labels = (("hostname", hp_obj.hostname),)
+    stp = hp_obj.spanning_tree()
+    samples = [
+        Sample("hp_stp_enabled", labels, int(bool(stp.enabled))),
+        Sample("hp_stp_root", labels, int(stp.is_root)),
+    ]
+    samples += [
+        Sample(
+            "hp_stp_port_forwarding",
+            labels + (("port", port.port),),
+            int(port.state == "Forwarding"),
+        )
+        for port in stp.ports
+    ]
+    return samples
+
+
+def poe_samples(hp_obj):
+    """Returns the samples of the POE+ ports of the switch"""
+    output = hp_obj.send_command("show power-over-ethernet brief", use_textfsm=True)
+    samples = []
+    for port in rows(output):
+        labels = (("hostname", hp_obj.hostname), ("port", port["port"]))
+        samples += [
+            Sample("hp_poe_port_enabled", labels, int(port["power_enable"] == "Yes")),
+            Sample(
+                "hp_poe_port_delivering",
+                labels,
+                int(port["detection_status"] == "Delivering"),
+            ),
+        ]
+    return samples
+
+
+def ntp_samples(hp_obj):
+    """Returns the samples of the ntp status of the switch"""
+    labels = (("hostname", hp_obj.hostname),)
+    status = hp_obj.find_ntp_status()
+    synchronized = NTP_SYNCHRONIZED.search(hp_obj.send_command("show ntp status"))
+    return [
+        Sample(
+            "hp_ntp_enabled",
+            labels,
+            int(bool(status) and status[0].status == "Enabled"),
+        ),
+        Sample("hp_ntp_synchronized", labels, int(synchronized is not None)),
+    ]
+
+
+COLLECTORS = {
+    "ports": port_samples,
+    "stp": stp_samples,
+    "poe": poe_samples,
+    "ntp": ntp_samples,
+}
+
+
+def render_metrics(samples):
+    """Returns the Prometheus text exposition of a list of samples, grouped by
+    metric in the order of METRICS"""
+    by_name = {}
+    for sample in samples:
+        by_name.setdefault(sample.name, []).append(sample)
+    lines = []
+    for name in sorted(by_name, key=_metric_order):
+        kind, description = METRICS.get(name, ("untyped", name))
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+        for sample in by_name[name]:
+            labels = ",".join(f'{k}="{_escape(v)}"' for k, v in sample.labels)
+            lines.append(f"{name}{{{labels}}} {sample.value}")
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+class MetricsExporter:
+    """Class MetricsExporter polls an HPFleet on a schedule and serves the
+    last results of every switch on /metrics"""
+
+    def __init__(self, fleet, interval=INTERVAL, collectors=None):
+        """
+        Parameters
+        ----------
+        fleet : HPFleet
+            The switches to poll.
+        interval : int or float
+            Number of seconds from the start of one poll to the start of the
+            next. A poll which takes longer is followed by the next at once.
+        collectors : dict
+            The functions returning the samples of a switch, keyed on name,
+            all of COLLECTORS by default.
+        """
+        self.fleet = fleet
+        self.interval = interval
+        self.collectors = dict(COLLECTORS if collectors is None else collectors)
+        self.polls = 0
+        self._samples = {}
+        self._status = {}
+        self._page = b""
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._server = None
+
+    def __repr__(self):
+        return f"MetricsExporter({len(self.fleet)} devices, every {self.interval}s)"
+
+    def collect(self, hp_obj):
+        """Returns the samples of a switch from every collector, with an
+        hp_collector_up sample per collector. Cached output is left out, so
+        every poll reads the switch again.
+
+        The session is opened first, so a switch which cannot be reached
+        fails the poll, as does a switch on which every collector fails."""
+        hp_obj.cache.invalidate()
+        # a lazy or pooled HP object connects here rather than in a collector
+        hp_obj.HPProcurveSSH
+        labels = (("hostname", hp_obj.hostname),)
+        samples = []
+        errors = []
+        for name, collector in self.collectors.items():
+            try:
+                samples += collector(hp_obj)
+                up = 1
+            except Exception as exc:
+                # one failing command does not drop the samples of the others
+                log.warning(
+                    "collector %s failed on %s", name, hp_obj.hostname, exc_info=True
+                )
+                errors.append(exc)
+                up = 0
+            samples.append(
+                Sample("hp_collector_up", labels + (("collector", name),), up)
+            )
+        if errors and len(errors) == len(self.collectors):
+            raise errors[-1]
+        return samples
+
+    def poll(self):
+        """Polls every switch once and renders the page served on /metrics,
+        keeping the last samples of the switches which failed"""
+        for result in self.fleet.run(self.collect):
+            labels = (("hostname", result.hostname),)
+            status = [
+                Sample("hp_switch_up", labels, int(result.ok)),
+                Sample("hp_poll_duration_seconds", labels, round(result.elapsed, 3)),
+            ]
+            with self._lock:
+                if result.ok:
+                    self._samples[result.hostname] = result.result
+                    self._status[result.hostname] = status + [
+                        Sample(
+                            "hp_last_poll_timestamp_seconds", labels, int(time.time())
+                        )
+                    ]
+                else:
+                    log.warning(
+                        "poll of %s failed",
+                        result.hostname,
+                        exc_info=(
+                            type(result.error),
+                            result.error,
+                            result.error.__traceback__,
+                        ),
+                    )
+                    previous = self._status.get(result.hostname, [])
+                    self._status[result.hostname] = status + previous[2:]
+        with self._lock:
+            samples = [s for h in sorted(self._status) for s in self._status[h]]
+            samples += [s for h in sorted(self._samples) for s in self._samples[h]]
+            self._page = render_metrics(samples).encode("utf-8")
+            self.polls += 1
+
+    def metrics(self):
+        """Returns the last rendered page, without polling"""
+        with self._lock:
+            return self._page
+
+    def start(self):
+        """Starts polling in a background thread, the first poll at once"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="hp-metrics-poller", daemon=True
+        )
+        self._thread.start()
+
+    def serve(self, host="127.0.0.1", port=PORT):
+        """Starts polling and serves /metrics from a background thread,
+        returning the address the server listens on.
+
+        Parameters
+        ----------
+        host : str
+            The address to listen on, local only by default.
+        port : int
+            The port to listen on, 0 for any free port.
+        """
+        self.start()
+        self._server = _ThreadingHTTPServer((host, port), _MetricsHandler)
+        self._server.exporter = self
+        threading.Thread(
+            target=self._server.serve_forever, name="hp-metrics-server", daemon=True
+        ).start()
+        return self._server.server_address
+
+    def stop(self):
+        """Stops the poller and the server"""
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self.poll()
+            self._stop.wait(max(0, self.interval - (time.monotonic() - started)))
+
+
+class _ThreadingHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    """Serves each scrape in its own thread, as http.server.ThreadingHTTPServer
+    does from Python 3.7"""
+
+    daemon_threads = True
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Answers /metrics with the last page of the exporter of the server"""
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        page = self.server.exporter.metrics()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(page)))
+        self.end_headers()
+        self.wfile.write(page)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _metric_order(name):
+    names = list(METRICS)
+    return (names.index(name) if name in names else len(names), name)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,274 @@
+"""The fleet module consists of a class HPFleet which runs HP methods across
+
+an inventory of HP Procurve and Aruba switches on a bounded thread pool
+
+Results are yielded as each switch finishes, so a slow or unreachable switch
+only delays its own result.
+
+"""
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from collections import namedtuple
+import time
+
+from .procurvearuba import HP
+
+
+class FleetResult(
+    namedtuple("FleetResult", ["hostname", "result", "error", "elapsed"])
+):
+    """The outcome of running a method on one switch of the fleet.
+
+    result holds the return value of the method and error the exception it
+    raised, if any. elapsed is the number of seconds the switch took.
+    """
+
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        """True if the method completed without raising an exception"""
+        return self.error is None
+
+
+def device_hostname(device):
+    """Returns the hostname of a device dictionary from the inventory"""
+    return device.get("hostname") or device.get("host") or device.get("ip")
+
+
+class HPFleet:
+    """Class HPFleet runs HP methods concurrently across an inventory of
+    switches"""
+
+    def __init__(
+        self,
+        devices,
+        max_workers=16,
+        timeout=None,
+        factory=HP,
+        disconnect=True,
+        pool=None,
+    ):
+        """
+        Parameters
+        ----------
+        devices : list of dict
+            The device dictionaries, each holding the keyword arguments to
+            the HP class.
+        max_workers : int
+            Maximum number of switches worked on at the same time.
+        timeout : int or float
+            Number of seconds a switch may take, from the moment its worker
+            starts, before it is reported with a TimeoutError. The default
+            of None waits for every switch. A running worker cannot be
+            stopped, so a switch reported late keeps its worker until its
+            session gives up, and the switches queued behind it wait for the
+            worker. Bound the session itself with the netmiko conn_timeout
+            and read_timeout_override keys of the device dictionaries.
+        factory : callable
+            Called with a device dictionary to create the HP object.
+        disconnect : bool
+            Set to False to leave the session open once the method finishes.
+        pool : ConnectionPool
+            Lease the sessions from a pool, which keeps them open for later
+            runs, in place of factory and disconnect.
+        """
+        self.devices = list(devices)
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.factory = factory
+        self.disconnect = disconnect
+        self.pool = pool
+
+    def __repr__(self):
+        return f"HPFleet({len(self.devices)} devices)"
+
+    def __len__(self):
+        return len(self.devices)
+
+    @classmethod
+    def from_yaml(cls, path, **kwargs):
+        """Creates an HPFleet from a devices.yml inventory file.
+
+        Parameters
+        ----------
+        path : str
+            Path to a yaml file with a list of devices under the 'devices' key.
+        **kwargs :
+            Keyword arguments passed on to HPFleet.
+        """
+        import yaml
+
+        with open(path, "r") as f:
+            device_data = yaml.safe_load(f)
+        return cls(device_data["devices"], **kwargs)
+
+    def run(self, method, *args, **kwargs):
+        """Runs an HP method on every switch, yielding a FleetResult for each
+        switch as soon as it finishes.
+
+        Parameters
+        ----------
+        method : str or callable
+            The name of the HP method to run, or a callable which is passed
+            the HP object as its first argument.
+        *args :
+            Arguments passed on to the method.
+        **kwargs :
+            Keyword arguments passed on to the method.
+        """
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        pending = {}
+        try:
+            for device in self.devices:
+                started = [None]
+                future = executor.submit(
+                    self._run_device, device, started, method, args, kwargs
+                )
+                pending[future] = (device, started)
+            while pending:
+                done, _ = wait(
+                    pending,
+                    timeout=self._wait_time(pending),
+                    return_when=FIRST_COMPLETED,
+                )
+                for future in done:
+                    del pending[future]
+                    yield future.result()
+                for future in self._expired(pending):
+                    device, started = pending.pop(future)
+                    future.cancel()
+                    hostname = device_hostname(device)
+                    error = TimeoutError(
+                        f"{hostname} did not finish within {self.timeout} seconds"
+                    )
+                    yield FleetResult(
+                        hostname, None, error, time.monotonic() - started[0]
+                    )
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def run_all(self, method, *args, **kwargs):
+        """Runs an HP method on every switch and returns the list of
+        FleetResult once all switches have finished."""
+        return list(self.run(method, *args, **kwargs))
+
+    def backup(self, server, manifest=None, **kwargs):
+        """Backs up the startup configuration of every switch to a tftp or
+        sftp server and returns the list of BackupRecord, see FleetBackup.
+
+        Parameters
+        ----------
+        server : str
+            The IP address of the transfer server.
+        manifest : str
+            Path of a json manifest to write the records to.
+        **kwargs :
+            Keyword arguments passed on to FleetBackup, such as protocol,
+            per_server and retries.
+        """
+        from .backup import FleetBackup
+
+        return FleetBackup(self, server, **kwargs).run_all(manifest)
+
+    def archive_configs(self, archive):
+        """Pulls the running configuration of every switch into a local
+        ConfigArchive, which only writes the configurations it has not seen
+        before, and returns the list of FleetResult, each holding the
+        ArchiveEntry of its switch.
+
+        Parameters
+        ----------
+        archive : ConfigArchive or str
+            The archive, or the directory of the archive.
+        """
+        from .archive import ConfigArchive
+
+        if not isinstance(archive, ConfigArchive):
+            archive = ConfigArchive(archive)
+        return self.run_all(archive.archive)
+
+    def topology(self, seeds=None, cache=None, ttl=3600, max_hops=None):
+        """Returns the Topology of the fleet, crawled over lldp neighbors from
+        the seed switches, see Topology.discover().
+
+        Parameters
+        ----------
+        seeds : list of str
+            The hostnames to start from, every switch of the fleet by default.
+        cache : str
+            A json file to load the graph from while it is younger than ttl
+            seconds, and to save it to once discovered again.
+        ttl : int or float
+            Number of seconds a cached graph stays valid.
+        max_hops : int
+            Number of waves of neighbors polled after the seeds.
+        """
+        from .topology import Topology
+
+        if cache is None:
+            return Topology.discover(self, seeds=seeds, max_hops=max_hops)
+        return Topology.cached(cache, self, ttl=ttl, seeds=seeds, max_hops=max_hops)
+
+    def port_table(self):
+        """Returns the PortTable of every port of the fleet, read from the
+        switches concurrently. It needs numpy, see the analytics extra."""
+        from .porttable import PortTable
+
+        return PortTable.from_fleet(self)
+
+    def _wait_time(self, pending):
+        """Returns how long to wait before the next running switch times out"""
+        if self.timeout is None:
+            return None
+        now = time.monotonic()
+        remaining = [
+            started[0] + self.timeout - now
+            for _, started in pending.values()
+            if started[0] is not None
+        ]
+        # switches still queued behind the pool have not started their clock yet
+        return max(min(remaining, default=self.timeout), 0.05)
+
+    def _expired(self, pending):
+        """Returns the running futures which have exceeded the timeout"""
+        if self.timeout is None:
+            return []
+        now = time.monotonic()
+        return [
+            future
+            for future, (_, started) in pending.items()
+            if started[0] is not None
+            and now - started[0] >= self.timeout
+            and not future.done()
+        ]
+
+    def _run_device(self, device, started, method, args, kwargs):
+        """Creates the HP object for a device and runs the method on it"""
+        started[0] = time.monotonic()
+        hostname = device_hostname(device)
+        hp_obj = None
+        try:
+            if self.pool is not None:
+                with self.pool.lease(**device) as leased:
+                    result = _call(leased, method, args, kwargs)
+            else:
+                hp_obj = self.factory(**device)
+                result = _call(hp_obj, method, args, kwargs)
+            return FleetResult(hostname, result, None, time.monotonic() - started[0])
+        except Exception as error:
+            return FleetResult(hostname, None, error, time.monotonic() - started[0])
+        finally:
+            if hp_obj is not None and self.disconnect:
+                try:
+                    hp_obj.disconnect()
+                except Exception:
+                    pass
+
+
+def _call(hp_obj, method, args, kwargs):
+    """Runs an HP method, given by name or as a callable, on an HP object"""
+    if callable(method):
+        return method(hp_obj, *args, **kwargs)
+    return getattr(hp_obj, method)(*args, **kwargs)
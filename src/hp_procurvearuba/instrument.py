@@ -0,0 +1,345 @@
+"""The instrument module times the work of the HP class, split into the time
+
+spent waiting on the switch, parsing its output and rendering tables
+
+An Instrumentation passed to HP records an Event for every command sent,
+every parse of its output and every table printed, labelled with the
+hostname, the command and the find_* method which issued it. Wire time is
+the time spent reading from the switch, with the number of bytes received.
+Parse time leaves out any wire time spent inside the parser, so a parser
+reading output line by line as it arrives is charged only for its own work.
+Events go to pluggable sinks: a HistogramSink keeping latency histograms in
+memory, a JsonLogSink writing one json line per event, or any object with a
+record(event) method. A cProfile profile of the instrumented methods can be
+collected as well. An HP object without an Instrumentation skips all of it.
+
+"""
+from bisect import bisect_left
+from collections import namedtuple
+import cProfile
+import functools
+import json
+import pstats
+import threading
+import time
+
+PHASES = ("wire", "parse", "render", "method")
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60)
+
+Event = namedtuple(
+    "Event", ["hostname", "method", "command", "phase", "seconds", "size"]
+)
+Event.__doc__ = """A timed piece of work of an HP object. phase is one of
+PHASES, method the find_* method which issued it, or None, and size the
+number of bytes received for wire events."""
+
+Summary = namedtuple(
+    "Summary", ["key", "count", "seconds", "mean", "p50", "p95", "max", "size"]
+)
+Summary.__doc__ = """The events of one key of a HistogramSink. p50 and p95
+are the upper bounds of the buckets holding the median and 95th percentile."""
+
+
+class Instrumentation:
+    """Class Instrumentation times the commands, parses and renders of HP
+    objects and passes each Event to its sinks"""
+
+    def __init__(self, sinks=(), profile=False):
+        """
+        Parameters
+        ----------
+        sinks : list
+            The objects receiving each Event through their record() method.
+        profile : bool
+            Set to True to run the instrumented methods under cProfile, see
+            stats().
+        """
+        self.sinks = list(sinks)
+        self.profile = profile
+        self._local = threading.local()
+        self._profiles = []
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"Instrumentation({len(self.sinks)} sinks)"
+
+    def record(self, hostname, command, phase, seconds, size=0):
+        """Passes an Event to every sink, labelled with the current method"""
+        methods = getattr(self._local, "methods", None)
+        method = methods[-1] if methods else None
+        event = Event(hostname, method, command, phase, seconds, size)
+        for sink in self.sinks:
+            sink.record(event)
+
+    def timer(self, hostname, command, phase):
+        """Returns a context manager timing a phase. Pass the output read
+        from the switch to the received() method of the timer to record its
+        size."""
+        return _Timer(self, hostname, command, phase)
+
+    def stream(self, hostname, command, lines):
+        """Yields the lines of a streamed command, recording the time spent
+        waiting for them as wire time once the stream is closed"""
+        seconds = 0.0
+        size = 0
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    line = next(lines)
+                except StopIteration:
+                    break
+                finally:
+                    elapsed = time.perf_counter() - started
+                    seconds += elapsed
+                    self._add_wire(elapsed)
+                size += len(line.encode("utf-8")) + 1
+                yield line
+        finally:
+            lines.close()
+            self.record(hostname, command, "wire", seconds, size)
+
+    def method(self, hostname, name):
+        """Returns a context manager labelling the events inside it with a
+        method name and timing the method as a whole"""
+        return _Method(self, hostname, name)
+
+    def render(self, hostname, module):
+        """Returns a proxy of the render module timing each table printed"""
+        return _RenderProxy(self, hostname, module)
+
+    def stats(self):
+        """Returns the pstats.Stats of the methods run with profile=True, or
+        None if none has run"""
+        with self._lock:
+            profiles = list(self._profiles)
+        if not profiles:
+            return None
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+
+    def _add_wire(self, seconds):
+        self._local.wire = getattr(self._local, "wire", 0.0) + seconds
+
+    def _wire(self):
+        return getattr(self._local, "wire", 0.0)
+
+    def _profiler(self):
+        """Returns the profiler of the current thread"""
+        profiler = getattr(self._local, "profiler", None)
+        if profiler is None:
+            profiler = self._local.profiler = cProfile.Profile()
+            with self._lock:
+                self._profiles.append(profiler)
+        return profiler
+
+
+class _Timer:
+    """Times a phase, leaving out the wire time spent inside it unless it is
+    itself wire time"""
+
+    def __init__(self, instrumentation, hostname, command, phase):
+        self.instrumentation = instrumentation
+        self.hostname = hostname
+        self.command = command
+        self.phase = phase
+        self.size = 0
+
+    def __enter__(self):
+        self.wire = self.instrumentation._wire()
+        self.started = time.perf_counter()
+        return self
+
+    def received(self, output):
+        """Records the size of the output read from the switch"""
+        if isinstance(output, str):
+            self.size = len(output.encode("utf-8"))
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self.started
+        if self.phase == "wire":
+            self.instrumentation._add_wire(seconds)
+        else:
+            seconds -= self.instrumentation._wire() - self.wire
+        self.instrumentation.record(
+            self.hostname, self.command, self.phase, seconds, self.size
+        )
+
+
+class _NullTimer:
+    """Stands in for a _Timer when an HP object is not instrumented"""
+
+    def received(self, output):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+NULL_TIMER = _NullTimer()
+
+
+class _Method(_Timer):
+    """Times a method and labels the events inside it with its name"""
+
+    def __init__(self, instrumentation, hostname, name):
+        super().__init__(instrumentation, hostname, None, "method")
+        self.name = name
+
+    def __enter__(self):
+        local = self.instrumentation._local
+        if not hasattr(local, "methods"):
+            local.methods = []
+        local.methods.append(self.name)
+        self.profiler = None
+        if self.instrumentation.profile and len(local.methods) == 1:
+            self.profiler = self.instrumentation._profiler()
+            self.profiler.enable()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self.started
+        if self.profiler is not None:
+            self.profiler.disable()
+        self.instrumentation.record(self.hostname, None, "method", seconds)
+        self.instrumentation._local.methods.pop()
+
+
+class _RenderProxy:
+    """Times the functions of the render module"""
+
+    def __init__(self, instrumentation, hostname, module):
+        self._instrumentation = instrumentation
+        self._hostname = hostname
+        self._module = module
+
+    def __getattr__(self, name):
+        function = getattr(self._module, name)
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            with self._instrumentation.timer(self._hostname, name, "render"):
+                return function(*args, **kwargs)
+
+        return timed
+
+
+class HistogramSink:
+    """Class HistogramSink keeps a latency histogram of the events of each
+    phase, method, command and host in memory"""
+
+    def __init__(self, buckets=BUCKETS):
+        """
+        Parameters
+        ----------
+        buckets : tuple of float
+            The upper bounds, in seconds, of the histogram buckets. Longer
+            events fall in a last, unbounded bucket.
+        """
+        self.buckets = tuple(buckets)
+        self._counts = {}
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"HistogramSink({len(self._counts)} keys)"
+
+    def record(self, event):
+        key = (event.phase, event.method, event.command, event.hostname)
+        bucket = bisect_left(self.buckets, event.seconds)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._totals[key] = [0.0, 0.0, 0]
+            counts[bucket] += 1
+            totals = self._totals[key]
+            totals[0] += event.seconds
+            totals[1] = max(totals[1], event.seconds)
+            totals[2] += event.size
+
+    def histogram(self, phase, method=None, command=None, hostname=None):
+        """Returns the number of events in each bucket, adding up the keys
+        which match the phase and the labels given"""
+        wanted = (phase, method, command, hostname)
+        histogram = [0] * (len(self.buckets) + 1)
+        with self._lock:
+            for key, counts in self._counts.items():
+                if all(w is None or k == w for k, w in zip(key, wanted)):
+                    histogram = [a + b for a, b in zip(histogram, counts)]
+        return histogram
+
+    def summary(self, by=("phase", "command")):
+        """Returns the Summary of the events grouped by some of the labels
+        phase, method, command and hostname, slowest first"""
+        labels = ("phase", "method", "command", "hostname")
+        positions = [labels.index(label) for label in by]
+        groups = {}
+        with self._lock:
+            for key, counts in self._counts.items():
+                group = tuple(key[i] for i in positions)
+                merged = groups.setdefault(group, [[0] * len(counts), [0.0, 0.0, 0]])
+                merged[0] = [a + b for a, b in zip(merged[0], counts)]
+                totals = self._totals[key]
+                merged[1][0] += totals[0]
+                merged[1][1] = max(merged[1][1], totals[1])
+                merged[1][2] += totals[2]
+        summaries = []
+        for group, (counts, (seconds, longest, size)) in groups.items():
+            count = sum(counts)
+            summaries.append(
+                Summary(
+                    group,
+                    count,
+                    seconds,
+                    seconds / count,
+                    self._quantile(counts, 0.5, longest),
+                    self._quantile(counts, 0.95, longest),
+                    longest,
+                    size,
+                )
+            )
+        return sorted(summaries, key=lambda summary: -summary.seconds)
+
+    def _quantile(self, counts, quantile, longest):
+        """Returns the upper bound of the bucket holding a quantile"""
+        rank = quantile * sum(counts)
+        seen = 0
+        for bucket, count in enumerate(counts):
+            seen += count
+            if seen >= rank and count:
+                return self.buckets[bucket] if bucket < len(self.buckets) else longest
+        return longest
+
+
+class JsonLogSink:
+    """Class JsonLogSink writes each event as a line of json"""
+
+    def __init__(self, path):
+        """
+        Parameters
+        ----------
+        path : str or file
+            The file to append the events to, or an open text file.
+        """
+        self._file = (
+            open(path, "a", encoding="utf-8") if isinstance(path, str) else path
+        )
+        self._owns_file = isinstance(path, str)
+        self._lock = threading.Lock()
+
+    def record(self, event):
+        line = json.dumps(dict(event._asdict(), time=time.time()))
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self):
+        """Closes the file if the sink opened it"""
+        if self._owns_file:
+            self._file.close()
@@ -0,0 +1,210 @@
+"""The macindex module consists of a class MacIndex which maps every mac
+
+address learnt by a fleet of switches to the edge switch, port and vlan
+
+The index is built from one show mac-address table and one lldp neighbor
+table per switch. Mac addresses learnt on an uplink, a port whose lldp
+neighbor is another switch of the fleet, are learnt through that switch and
+are left out, so each mac address is located on the port its host is
+plugged into, including the hosts behind an IP phone or access point.
+Lookups are dictionary lookups, however many switches are indexed.
+
+"""
+import json
+
+from .addresses import normalize_mac
+from .records import MacAddressPort
+from .replay import open_recording
+
+
+def uplink_ports(lldp_output, switches=None):
+    """Returns the set of local ports with an lldp neighbor which names itself,
+    or which is one of the switches given
+
+    Parameters
+    ----------
+    lldp_output : list of dict
+        The textfsm output of show lldp info remote-device.
+    switches : set of str
+        The hostnames of the switches counted as uplink neighbors. Any
+        neighbor sending a system name counts when not given.
+    """
+    if not isinstance(lldp_output, list):
+        return set()
+    return {
+        neighbor["local_port"]
+        for neighbor in lldp_output
+        if neighbor["neighbor_sysname"]
+        and (switches is None or neighbor["neighbor_sysname"] in switches)
+    }
+
+
+def switch_macs(hp_obj):
+    """Returns the hostname, mac address table and lldp neighbor table of a
+    switch"""
+    mac_table = hp_obj.send_command("show mac-address", use_textfsm=True)
+    lldp_output = hp_obj.send_command("show lldp info remote-device", use_textfsm=True)
+    return hp_obj.hostname, mac_table, lldp_output
+
+
+class MacIndex:
+    """Class MacIndex locates mac addresses on the edge ports of a fleet of
+    switches"""
+
+    def __init__(self):
+        self.locations = {}
+        self.hostnames = set()
+        self.errors = {}
+
+    def __repr__(self):
+        return (
+            f"MacIndex({len(self.locations)} mac addresses, "
+            f"{len(self.hostnames)} switches)"
+        )
+
+    def __len__(self):
+        return len(self.locations)
+
+    def __contains__(self, mac):
+        try:
+            return normalize_mac(mac) in self.locations
+        except ValueError:
+            return False
+
+    @classmethod
+    def from_switches(cls, hp_objs):
+        """Builds the index from a list of HP objects, one switch at a time.
+        The ports to a switch which is not in the list are indexed like any
+        other port.
+
+        Parameters
+        ----------
+        hp_objs : list of HP
+            The HP objects of the switches, or snapshots of them.
+        """
+        index = cls()
+        index._add_switches([switch_macs(hp_obj) for hp_obj in hp_objs])
+        return index
+
+    @classmethod
+    def from_fleet(cls, fleet):
+        """Builds the index from an HPFleet, pulling the tables of the switches
+        concurrently. Switches which fail are recorded in the errors
+        dictionary, keyed on hostname, and the ports to them are still left
+        out as uplinks.
+
+        Parameters
+        ----------
+        fleet : HPFleet
+            The fleet of switches to index.
+        """
+        from .fleet import device_hostname
+
+        index = cls()
+        tables = []
+        for result in fleet.run(switch_macs):
+            if result.ok:
+                tables.append(result.result)
+            else:
+                index.errors[result.hostname] = result.error
+        # a switch which failed is still a switch behind its neighbors' uplinks
+        index._add_switches(tables, {device_hostname(d) for d in fleet.devices})
+        return index
+
+    def _add_switches(self, tables, switches=()):
+        """Adds the tables returned by switch_macs(), leaving out the ports to
+        the switches polled and to the other switches given"""
+        switches = set(switches) | {hostname for hostname, _, _ in tables}
+        for hostname, mac_table, lldp_output in tables:
+            self.add(hostname, mac_table, uplink_ports(lldp_output, switches))
+
+    def add(self, hostname, mac_table, uplinks=()):
+        """Adds the edge port mac addresses of a switch to the index,
+        replacing any mac addresses indexed for it earlier.
+
+        Parameters
+        ----------
+        hostname : str
+            The hostname of the switch.
+        mac_table : list of dict
+            The textfsm output of show mac-address.
+        uplinks : set of str
+            The ports whose mac addresses are left out of the index.
+        """
+        if hostname in self.hostnames:
+            self.remove(hostname)
+        self.hostnames.add(hostname)
+        for row in mac_table:
+            if row["port"] in uplinks:
+                continue
+            mac = normalize_mac(row["mac"])
+            self.locations.setdefault(mac, []).append(
+                MacAddressPort(hostname, row["port"], mac, row["vlan"])
+            )
+
+    def remove(self, hostname):
+        """Removes the mac addresses of a switch from the index"""
+        self.hostnames.discard(hostname)
+        for mac in list(self.locations):
+            locations = [r for r in self.locations[mac] if r.hostname != hostname]
+            if locations:
+                self.locations[mac] = locations
+            else:
+                del self.locations[mac]
+
+    def lookup(self, mac):
+        """Returns the list of MacAddressPort records of the edge ports a mac
+        address was learnt on, empty if it was not found.
+
+        Raises ValueError if the mac address is not valid.
+
+        Parameters
+        ----------
+        mac : str
+            The mac address in any of the formats accepted by normalize_mac.
+        """
+        return list(self.locations.get(normalize_mac(mac), ()))
+
+    def lookup_many(self, macs):
+        """Returns a dictionary of the records returned by lookup() for each
+        mac address, keyed on the mac address as given.
+
+        Parameters
+        ----------
+        macs : iterable of str
+            The mac addresses to locate.
+        """
+        return {mac: self.lookup(mac) for mac in macs}
+
+    def to_dict(self):
+        """Returns the index as a json serializable dictionary"""
+        return {
+            "hostnames": sorted(self.hostnames),
+            "locations": [
+                record._asdict()
+                for records in self.locations.values()
+                for record in records
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Creates a MacIndex from a dictionary returned by to_dict()"""
+        index = cls()
+        index.hostnames.update(data["hostnames"])
+        for location in data["locations"]:
+            record = MacAddressPort(**location)
+            index.locations.setdefault(record.mac, []).append(record)
+        return index
+
+    def save(self, path):
+        """Saves the index to a json file, gzip compressed if the path ends
+        in .gz"""
+        with open_recording(path, "wt") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        """Loads an index saved with save()"""
+        with open_recording(path, "rt") as f:
+            return cls.from_dict(json.load(f))
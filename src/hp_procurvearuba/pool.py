@@ -0,0 +1,203 @@
+"""The pool module consists of a class ConnectionPool which leases HP sessions
+
+and keeps them open between jobs
+
+Sessions are keyed on the host and credentials of the device. A session is
+opened on the first command sent over it, health checked before it is
+leased again, kept alive while idle and closed when it has been idle for too
+long or the pool holds more idle sessions than its cap, least recently used
+first.
+
+"""
+from collections import OrderedDict
+from contextlib import contextmanager
+import threading
+import time
+
+from .procurvearuba import HP
+
+KEY_FIELDS = ("device_type", "host", "ip", "port", "username", "password", "secret")
+
+
+def session_key(device):
+    """Returns the pool key of a device dictionary, its host and credentials"""
+    return tuple(device.get(field) for field in KEY_FIELDS)
+
+
+class ConnectionPool:
+    """Class ConnectionPool leases HP sessions, reusing idle sessions to the
+    same host with the same credentials"""
+
+    def __init__(self, maxsize=32, idle_timeout=300, keepalive=60, factory=HP):
+        """
+        Parameters
+        ----------
+        maxsize : int
+            Maximum number of idle sessions kept open. The least recently
+            used idle session is closed when a release would exceed it.
+        idle_timeout : int or float
+            Number of seconds a session may stay idle before it is closed.
+            Set to None to keep idle sessions until they are evicted.
+        keepalive : int or float
+            Number of seconds between keepalives sent on idle sessions by
+            start_keepalive(), and after which an idle session is health
+            checked before it is leased again.
+        factory : callable
+            Called with a device dictionary and lazy=True to create the HP
+            object.
+        """
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self.keepalive = keepalive
+        self.factory = factory
+        self._idle = OrderedDict()
+        self._leased = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._keepalive_thread = None
+
+    def __repr__(self):
+        return f"ConnectionPool({len(self._idle)} idle, {len(self._leased)} leased)"
+
+    def __len__(self):
+        return len(self._idle) + len(self._leased)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @contextmanager
+    def lease(self, **device):
+        """Leases a session for the device for the duration of a with block.
+
+        Parameters
+        ----------
+        **device :
+            The keyword arguments to the HP class, as in devices.yml.
+        """
+        hp_obj = self.acquire(**device)
+        try:
+            yield hp_obj
+        finally:
+            self.release(hp_obj)
+
+    def acquire(self, **device):
+        """Returns a session for the device, reusing an idle one if it passes
+        its health check, or a new unconnected one. Return it with release().
+        """
+        key = session_key(device)
+        self.prune()
+        while True:
+            hp_obj, idle_since = self._take_idle(key)
+            if hp_obj is None:
+                hp_obj = self.factory(lazy=True, **device)
+                break
+            if not hp_obj.connected:
+                break
+            if time.monotonic() - idle_since < self.keepalive or hp_obj.is_alive():
+                break
+            _disconnect(hp_obj)
+        with self._lock:
+            self._leased[hp_obj] = key
+        return hp_obj
+
+    def release(self, hp_obj):
+        """Returns a leased session to the pool, evicting the least recently
+        used idle sessions above maxsize"""
+        with self._lock:
+            key = self._leased.pop(hp_obj)
+            self._idle[hp_obj] = (key, time.monotonic())
+            evicted = []
+            while len(self._idle) > self.maxsize:
+                evicted.append(self._idle.popitem(last=False)[0])
+        for stale in evicted:
+            _disconnect(stale)
+
+    def prune(self):
+        """Closes the idle sessions which have been idle for longer than
+        idle_timeout, returning their number"""
+        if self.idle_timeout is None:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                hp_obj
+                for hp_obj, (_, idle_since) in self._idle.items()
+                if now - idle_since > self.idle_timeout
+            ]
+            for hp_obj in expired:
+                del self._idle[hp_obj]
+        for hp_obj in expired:
+            _disconnect(hp_obj)
+        return len(expired)
+
+    def send_keepalives(self):
+        """Prunes expired sessions and sends a keepalive on every other
+        connected idle session, closing those which do not answer"""
+        self.prune()
+        # sessions are taken out of the pool while they are checked, so they
+        # cannot be leased at the same time
+        with self._lock:
+            checked = [
+                (hp_obj, self._idle.pop(hp_obj))
+                for hp_obj in list(self._idle)
+                if hp_obj.connected
+            ]
+        alive = []
+        for hp_obj, entry in checked:
+            if hp_obj.is_alive():
+                alive.append((hp_obj, entry))
+            else:
+                _disconnect(hp_obj)
+        with self._lock:
+            entries = sorted(
+                list(self._idle.items()) + alive, key=lambda item: item[1][1]
+            )
+            self._idle = OrderedDict(entries)
+
+    def start_keepalive(self):
+        """Starts a daemon thread calling send_keepalives() every keepalive
+        seconds until close() is called"""
+        if self._keepalive_thread is not None:
+            return
+        self._stop.clear()
+        self._keepalive_thread = threading.Thread(
+            target=self._keepalive_loop, name="hp-pool-keepalive", daemon=True
+        )
+        self._keepalive_thread.start()
+
+    def close(self):
+        """Stops the keepalive thread and closes every idle session. Leased
+        sessions are closed by the caller."""
+        self._stop.set()
+        if self._keepalive_thread is not None:
+            self._keepalive_thread.join()
+            self._keepalive_thread = None
+        with self._lock:
+            idle = list(self._idle)
+            self._idle.clear()
+        for hp_obj in idle:
+            _disconnect(hp_obj)
+
+    def _take_idle(self, key):
+        """Removes and returns the most recently used idle session with the
+        key and the time it was released, or None"""
+        with self._lock:
+            for hp_obj in reversed(self._idle):
+                if self._idle[hp_obj][0] == key:
+                    return hp_obj, self._idle.pop(hp_obj)[1]
+        return None, None
+
+    def _keepalive_loop(self):
+        while not self._stop.wait(self.keepalive):
+            self.send_keepalives()
+
+
+def _disconnect(hp_obj):
+    """Closes a session, ignoring a session which has already dropped"""
+    try:
+        hp_obj.disconnect()
+    except Exception:
+        pass
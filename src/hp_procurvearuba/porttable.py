@@ -0,0 +1,253 @@
+"""The porttable module consists of a class PortTable which holds the ports of
+
+a fleet of switches in columns, for filters and group-bys across the fleet
+
+The ports of each switch are read from show int brief, show port-security,
+show power-over-ethernet brief and show interfaces, joined on the port.
+Text columns, such as status, mode and learn_mode, are stored as categorical
+codes, an integer per port indexing the distinct values of the column, and
+counters as integers, so a port takes a few dozen bytes instead of four
+dictionaries of strings. A filter such as status='Down', learn_mode=
+'Continuous' compares one code per column against whole numpy arrays, and
+group-bys count with numpy.bincount rather than a Python loop over ports.
+
+numpy is an optional dependency, installed with the analytics extra.
+
+"""
+from array import array
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    raise ImportError(
+        "the porttable module needs numpy, install hp_procurvearuba[analytics]"
+    ) from None
+
+from .templates import parse_count, rows
+
+PORT_COMMANDS = {
+    "show int brief": ("type", "intrusion_alert", "enabled", "status", "mode"),
+    "show port-security": ("learn_mode", "action", "eavesdrop_prevention"),
+    "show power-over-ethernet brief": ("power_enable", "detection_status"),
+    "show interfaces": ("total_bytes", "total_frames", "errors_rx", "drops_tx"),
+}
+COUNTERS = ("total_bytes", "total_frames", "errors_rx", "drops_tx")
+CATEGORICAL = ("hostname", "port") + tuple(
+    field
+    for fields in PORT_COMMANDS.values()
+    for field in fields
+    if field not in COUNTERS
+)
+COLUMNS = CATEGORICAL + COUNTERS
+MISSING = -1
+
+PortRow = namedtuple("PortRow", COLUMNS)
+PortRow.__doc__ = """A port of the table. Fields the switch did not report,
+such as the POE+ settings of a switch without POE+, are None."""
+
+
+def switch_ports(hp_obj):
+    """Returns the hostname and the parsed output of each command of a switch,
+    the arguments to PortTable.add()"""
+    outputs = {
+        command: hp_obj.send_command(command, use_textfsm=True)
+        for command in PORT_COMMANDS
+    }
+    return hp_obj.hostname, outputs
+
+
+class PortTable:
+    """Class PortTable holds the ports of a fleet of switches in categorical
+    and integer columns"""
+
+    def __init__(self):
+        self.errors = {}
+        self._categories = {column: [] for column in CATEGORICAL}
+        self._codes = {column: {} for column in CATEGORICAL}
+        self._blocks = {}
+        self._columns = None
+
+    def __repr__(self):
+        return f"PortTable({len(self)} ports, {len(self._blocks)} switches)"
+
+    def __len__(self):
+        return sum(len(block["hostname"]) for block in self._blocks.values())
+
+    @property
+    def hostnames(self):
+        """The sorted hostnames of the switches in the table"""
+        return sorted(self._blocks)
+
+    @classmethod
+    def from_switches(cls, hp_objs):
+        """Builds the table from a list of HP objects, one switch at a time.
+
+        Parameters
+        ----------
+        hp_objs : list of HP
+            The HP objects of the switches, or snapshots of them.
+        """
+        table = cls()
+        for hp_obj in hp_objs:
+            table.add(*switch_ports(hp_obj))
+        return table
+
+    @classmethod
+    def from_fleet(cls, fleet):
+        """Builds the table from an HPFleet, pulling the tables of the switches
+        concurrently. Switches which fail are recorded in the errors
+        dictionary, keyed on hostname.
+
+        Parameters
+        ----------
+        fleet : HPFleet
+            The fleet of switches to tabulate.
+        """
+        table = cls()
+        for result in fleet.run(switch_ports):
+            if result.ok:
+                table.add(*result.result)
+            else:
+                table.errors[result.hostname] = result.error
+        return table
+
+    def add(self, hostname, outputs):
+        """Adds the ports of a switch to the table, replacing any ports added
+        for it earlier.
+
+        Parameters
+        ----------
+        hostname : str
+            The hostname of the switch.
+        outputs : dict
+            The textfsm output of each command of PORT_COMMANDS, keyed on the
+            command. Missing commands leave their columns empty.
+        """
+        ports = {}
+        for command, fields in PORT_COMMANDS.items():
+            for row in rows(outputs.get(command)):
+                port = ports.setdefault(row["port"], {})
+                port.update((field, row.get(field)) for field in fields)
+        block = {column: array("i") for column in CATEGORICAL}
+        block.update((column, array("q")) for column in COUNTERS)
+        for port, fields in ports.items():
+            block["hostname"].append(self._code("hostname", hostname))
+            block["port"].append(self._code("port", port))
+            for column in CATEGORICAL[2:]:
+                block[column].append(self._code(column, fields.get(column)))
+            for column in COUNTERS:
+                block[column].append(parse_count(fields.get(column)))
+        self._blocks[hostname] = block
+        self._columns = None
+
+    def remove(self, hostname):
+        """Removes the ports of a switch from the table"""
+        if self._blocks.pop(hostname, None) is not None:
+            self._columns = None
+
+    def column(self, name):
+        """Returns a column as a numpy array, the codes of a categorical column
+        or the values of a counter"""
+        if self._columns is None:
+            blocks = list(self._blocks.values())
+            self._columns = {
+                column: np.concatenate(
+                    [np.asarray(block[column]) for block in blocks]
+                    or [np.zeros(0, dtype=np.int64)]
+                )
+                for column in COLUMNS
+            }
+        return self._columns[name]
+
+    def categories(self, name):
+        """Returns the distinct values of a categorical column, indexed by
+        their code"""
+        return list(self._categories[name])
+
+    def decode(self, name, codes):
+        """Returns the values of the codes of a categorical column, None for
+        a missing value"""
+        values = np.array(self._categories[name] + [None], dtype=object)
+        return values[np.asarray(codes, dtype=np.int64)].tolist()
+
+    def mask(self, **conditions):
+        """Returns the boolean numpy array of the ports matching every
+        condition.
+
+        Parameters
+        ----------
+        **conditions :
+            A value, or a list of values, of a categorical column, such as
+            status='Down' or learn_mode=['Static', 'Configured']. None
+            matches the ports which did not report the column.
+        """
+        selected = np.ones(len(self), dtype=bool)
+        for name, wanted in conditions.items():
+            if isinstance(wanted, str) or wanted is None:
+                wanted = [wanted]
+            codes = [
+                MISSING if value is None else self._codes[name].get(value)
+                for value in wanted
+            ]
+            selected &= np.isin(self.column(name), [c for c in codes if c is not None])
+        return selected
+
+    def select(self, mask=None, **conditions):
+        """Returns the PortRow of each port matching a boolean mask and the
+        conditions of mask()"""
+        (indexes,) = np.nonzero(self._selected(mask, conditions))
+        columns = [
+            self.decode(name, self.column(name)[indexes])
+            if name in CATEGORICAL
+            else self.column(name)[indexes].tolist()
+            for name in COLUMNS
+        ]
+        return [PortRow(*values) for values in zip(*columns)]
+
+    def count(self, mask=None, **conditions):
+        """Returns the number of ports matching a boolean mask and the
+        conditions of mask()"""
+        return int(np.count_nonzero(self._selected(mask, conditions)))
+
+    def count_by(self, name, mask=None, **conditions):
+        """Returns the number of ports of each value of a categorical column,
+        such as the down ports of each switch with
+        count_by('hostname', status='Down'), leaving out values without
+        ports"""
+        return self.sum_by(name, None, mask, **conditions)
+
+    def sum_by(self, name, counter, mask=None, **conditions):
+        """Returns the sum of a counter over the ports of each value of a
+        categorical column, such as sum_by('hostname', 'errors_rx'), or the
+        number of ports if counter is None, leaving out values without
+        ports"""
+        selected = self._selected(mask, conditions) & (self.column(name) != MISSING)
+        codes = self.column(name)[selected]
+        if counter is None:
+            totals = np.bincount(codes, minlength=len(self._categories[name]))
+        else:
+            # add.at keeps the sums exact where bincount weights are floats
+            totals = np.zeros(len(self._categories[name]), dtype=np.int64)
+            np.add.at(totals, codes, self.column(counter)[selected])
+        values = self._categories[name]
+        return {values[code]: int(totals[code]) for code in np.unique(codes).tolist()}
+
+    def _selected(self, mask, conditions):
+        """Returns the conditions of mask() combined with a boolean mask"""
+        selected = self.mask(**conditions)
+        if mask is not None:
+            selected &= mask
+        return selected
+
+    def _code(self, column, value):
+        """Returns the code of a value of a categorical column, adding the
+        value to the categories of the column if it is new"""
+        if value is None:
+            return MISSING
+        codes = self._codes[column]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self._categories[column])
+            self._categories[column].append(value)
+        return code
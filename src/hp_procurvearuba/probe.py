@@ -0,0 +1,180 @@
+"""The probe module checks cheaply whether a switch has changed since its last
+
+snapshot, so periodic collection only pulls the heavy commands from the
+switches which changed
+
+A Probe records the uptime of the switch from show system and a fingerprint
+of the newest entries of its event log. A reboot lowers the uptime, and
+configuration changes, ports going on-line or off-line and most other state
+changes are written to the event log, so a switch whose probe matches that
+of its last snapshot is considered unchanged and its snapshot is reused.
+The log entries written by the polling sessions themselves are left out of
+the fingerprint.
+
+"""
+from collections import namedtuple
+import hashlib
+import re
+
+from .snapshot import SNAPSHOT_COMMANDS, DeviceSnapshot
+
+UPTIME_COMMAND = "show system"
+LOG_COMMAND = "show logging -r"
+LOG_EVENTS = 20
+LOG_LINES = 500
+
+UPTIME = re.compile(r"Up Time\s+:\s+(?P<uptime>.*?)(?:\s{2,}|$)")
+UPTIME_UNITS = {"sec": 1, "min": 60, "hour": 3600, "day": 86400, "week": 604800}
+UPTIME_PART = re.compile(r"(?P<value>\d+)\s*(?P<unit>sec|min|hour|day|week)")
+EVENT = re.compile(r"^[IWMEDC] \d\d/\d\d/\d\d \d\d:\d\d:\d\d \d+ ")
+SESSION_EVENTS = re.compile(
+    r"\d+ (?:mgr|auth|ssh|telnet):.*(?:SME|SSH|TELNET|session|logged)", re.IGNORECASE
+)
+
+Probe = namedtuple("Probe", ["hostname", "uptime", "log_fingerprint"])
+Probe.__doc__ = """The cheap change indicators of a switch. uptime is in seconds
+and log_fingerprint is the sha256 hash of the newest event log entries."""
+
+PollResult = namedtuple(
+    "PollResult", ["hostname", "snapshot", "changed", "error", "elapsed"]
+)
+PollResult.__doc__ = """The outcome of polling one switch. changed is False when
+its previous snapshot was reused."""
+
+
+def parse_uptime(uptime):
+    """Returns the number of seconds of an uptime such as 23 days or
+    2 hours 5 mins, or None if it cannot be read"""
+    parts = UPTIME_PART.findall(uptime or "")
+    if not parts:
+        return None
+    return sum(int(value) * UPTIME_UNITS[unit] for value, unit in parts)
+
+
+def probe(hp_obj, events=LOG_EVENTS):
+    """Returns the Probe of a switch.
+
+    Parameters
+    ----------
+    hp_obj : HP
+        The HP object of the switch.
+    events : int
+        Number of the newest log entries in the fingerprint.
+    """
+    uptime = None
+    for line in hp_obj.stream_command(UPTIME_COMMAND, cache=False):
+        match = UPTIME.search(line)
+        if match:
+            uptime = parse_uptime(match.group("uptime"))
+            break
+    return Probe(hp_obj.hostname, uptime, log_fingerprint(hp_obj, events))
+
+
+def log_fingerprint(hp_obj, events=LOG_EVENTS):
+    """Returns the sha256 hash of the newest entries of the event log of a
+    switch, leaving out the entries of management sessions"""
+    digest = hashlib.sha256()
+    entry = None
+    counted = 0
+    lines = hp_obj.stream_command(LOG_COMMAND, cache=False)
+    try:
+        for number, line in enumerate(lines):
+            if EVENT.match(line):
+                counted += _add_event(digest, entry)
+                if counted >= events or number >= LOG_LINES:
+                    entry = None
+                    break
+                entry = line.strip()
+            elif entry is not None and line.strip():
+                entry += " " + line.strip()
+        _add_event(digest, entry)
+    finally:
+        lines.close()
+    return digest.hexdigest()
+
+
+def unchanged(previous, current):
+    """Returns True if a switch with the current Probe can be considered
+    unchanged since it had the previous Probe"""
+    if previous is None or current is None:
+        return False
+    if None in (previous.uptime, current.uptime, current.log_fingerprint):
+        return False
+    return (
+        current.uptime >= previous.uptime
+        and current.log_fingerprint == previous.log_fingerprint
+    )
+
+
+class SnapshotPoller:
+    """Class SnapshotPoller keeps a DeviceSnapshot of every switch of an
+    HPFleet, collecting a new one only from the switches whose Probe shows a
+    change since their last snapshot"""
+
+    def __init__(self, fleet, commands=SNAPSHOT_COMMANDS, snapshots=None):
+        """
+        Parameters
+        ----------
+        fleet : HPFleet
+            The switches to poll.
+        commands : tuple of str
+            The commands collected in each snapshot.
+        snapshots : dict
+            The last DeviceSnapshot of each switch, keyed on hostname, such
+            as those loaded from an earlier run.
+        """
+        self.fleet = fleet
+        self.commands = commands
+        self.snapshots = dict(snapshots or {})
+
+    def __repr__(self):
+        return f"SnapshotPoller({len(self.fleet)} devices, {len(self.snapshots)} snapshots)"
+
+    def poll(self):
+        """Probes every switch and collects a new snapshot from those which
+        changed, yielding a PollResult for each switch as soon as it
+        finishes"""
+        for result in self.fleet.run(self.poll_switch):
+            if result.ok:
+                snapshot, changed = result.result
+                yield PollResult(
+                    result.hostname, snapshot, changed, None, result.elapsed
+                )
+            else:
+                yield PollResult(
+                    result.hostname,
+                    self.snapshots.get(result.hostname),
+                    None,
+                    result.error,
+                    result.elapsed,
+                )
+
+    def poll_all(self):
+        """Polls every switch and returns the list of PollResult once all
+        switches have finished"""
+        return list(self.poll())
+
+    def poll_switch(self, hp_obj):
+        """Returns the snapshot of a switch and whether it changed, reusing
+        its last snapshot if its probe is unchanged"""
+        previous = self.snapshots.get(hp_obj.hostname)
+        try:
+            current = probe(hp_obj)
+        except Exception:
+            # a switch which cannot be probed is collected in full
+            current = None
+        if previous is not None and unchanged(previous.probe, current):
+            return previous, False
+        snapshot = DeviceSnapshot.collect(hp_obj, self.commands)
+        snapshot.probe = current
+        self.snapshots[hp_obj.hostname] = snapshot
+        return snapshot, True
+
+
+def _add_event(digest, entry):
+    """Adds a log entry to the fingerprint unless it is the entry of a
+    management session, returning the number of entries added"""
+    if entry is None or SESSION_EVENTS.search(entry):
+        return 0
+    digest.update(entry.encode("utf-8") + b"\n")
+    return 1
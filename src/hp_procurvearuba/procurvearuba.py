@@ -2,32 +2,105 @@
 
 manage HP Procurve and Aruba switches
 
-Class HP is a composite of the netmiko library HPProcurveSSH class
+Class HP is a composite of the netmiko library HPProcurveSSH class, which is
+imported when the first SSH session is opened, so that working offline with
+snapshots and captures does not load netmiko and paramiko.
 
 """
-from netmiko.hp import HPProcurveSSH
 from datetime import date
+import functools
 import re
 
-from forwardable import forwardable, def_delegators
+from . import render, templates
+from .addresses import lookup_normalized, normalize_ip, normalize_mac, normalize_vlan
+from .cache import CommandCache
+from .instrument import NULL_TIMER
+from .macindex import uplink_ports
+from .runconfig import parse_running_config
+from .stp import (
+    VLAN_COMMAND,
+    SpanningTree,
+    expand_vlans,
+    parse_spanning_tree,
+    parse_vlans,
+    vlan_commands,
+)
+from .stream import channel_lines, iter_lines
+from .transfers import run_transfer
+from .records import (
+    ArpEntry,
+    FirmwareVersion,
+    InterfaceErrors,
+    IntrusionAlert,
+    MacAddressPort,
+    NtpServer,
+    NtpStatus,
+    PoePort,
+    PoeSwitch,
+    PortSecurity,
+    PortStatus,
+    SerialNumber,
+    StpMode,
+    StpRoot,
+    Switch,
+    SwitchMacAddress,
+    TrunkPortSpeed,
+    TrunkVlan,
+    Vlan,
+)
+
+
+def _instrumented(method):
+    """Labels the events of an instrumented HP object with the name of the
+    method which issued them"""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.instrumentation is None:
+            return method(self, *args, **kwargs)
+        with self.instrumentation.method(self.hostname, method.__name__):
+            return method(self, *args, **kwargs)
+
+    return wrapper
 
 
-@forwardable()
 class HP:
     """Class HP provides custom methods to manage HP Procurve and Aruba
     switches"""
 
-    def_delegators(
-        "HPProcurveSSH",
-        "send_multiline_timing, send_command, find_prompt, disconnect",
-    )
-
-    def __init__(self, hostname, *args, **kwargs):
+    def __init__(
+        self,
+        hostname,
+        *args,
+        cache_ttl=60,
+        cache_size=128,
+        connection=None,
+        lazy=False,
+        instrumentation=None,
+        **kwargs,
+    ):
         """
         Parameters
         ----------
         hostname : str
             The hostname of the device.
+        cache_ttl : int or float
+            Number of seconds the output of a show command is reused by
+            later methods before it is sent to the switch again. Set to None
+            to keep output until invalidate() is called, or to 0 to disable
+            the cache.
+        cache_size : int
+            Maximum number of command outputs kept in the cache.
+        connection :
+            An object with the send_command, send_multiline_timing,
+            find_prompt and disconnect methods of HPProcurveSSH to use in
+            place of a new SSH session, such as a snapshot or replay.
+        lazy : bool
+            Set to True to open the SSH session when the first command is
+            sent instead of when the HP object is created.
+        instrumentation : Instrumentation
+            Records the wire, parse and render time of every command, see
+            the instrument module.
         *args :
             Variable length argument list. Additional arguments
             should be passed in as keyword arguments.
@@ -37,349 +110,639 @@ class HP:
             HPProcurveSSH class.
         """
         self.hostname = hostname
-        self.HPProcurveSSH = HPProcurveSSH(*args, **kwargs)
+        self.cache = CommandCache(ttl=cache_ttl, maxsize=cache_size)
+        self.instrumentation = instrumentation
+        self._connection_args = (args, kwargs)
+        self._owns_connection = connection is None
+        self._connection = connection
+        if connection is None and not lazy:
+            self._connection = _ssh_class()(*args, **kwargs)
+
+    @property
+    def HPProcurveSSH(self):
+        """The netmiko session of the switch, opened on first use if the HP
+        object was created with lazy=True or has been disconnected"""
+        if self._connection is None:
+            args, kwargs = self._connection_args
+            self._connection = _ssh_class()(*args, **kwargs)
+        return self._connection
+
+    @HPProcurveSSH.setter
+    def HPProcurveSSH(self, connection):
+        self._connection = connection
+
+    @property
+    def connected(self):
+        """True if the session to the switch is open"""
+        return self._connection is not None
+
+    def is_alive(self):
+        """Returns True if the session to the switch is open and answers"""
+        if self._connection is None:
+            return False
+        try:
+            return bool(self._connection.is_alive())
+        except Exception:
+            return False
+
+    @_instrumented
+    def find_prompt(self, *args, **kwargs):
+        """Returns the prompt of the switch"""
+        with self._timed("find_prompt", "wire"):
+            return self.HPProcurveSSH.find_prompt(*args, **kwargs)
+
+    def disconnect(self):
+        """Closes the session to the switch. A session opened by the HP object
+        is opened again by the next command."""
+        if self._connection is None:
+            return
+        connection = self._connection
+        if self._owns_connection:
+            self._connection = None
+        with self._timed("disconnect", "wire"):
+            connection.disconnect()
 
     def __repr__(self):
         """Displays the device hostname of the HP class object instance"""
         return f"{self.hostname}"
 
-    def find_stp_mode(self):
-        """Finds the spanning tree mode of the switch"""
-        output = self.send_command("show spanning-tree")
-        print("-" * 20)
-        print(f"{'HOSTNAME':^10}{'STP_MODE':^10}")
-        print("-" * 20)
-        try:
-            rpvst = re.search(r"^\s+Mode\s+:\s+(?P<mode>RPVST)", output, flags=re.M)
-            print(f"{self.hostname:^10}{rpvst.group('mode'):^10}")
-            print("-" * 20)
-        except AttributeError:
-            try:
-                mstp = re.search(
-                    r"^\s+Force\s+Version\s+:\s+(?P<mode>MSTP)", output, flags=re.M
+    @classmethod
+    def from_captures(cls, path, hostname=None, **kwargs):
+        """Creates an HP object which replays recorded command output instead
+        of connecting to a switch.
+
+        Parameters
+        ----------
+        path : str
+            A directory of capture files, one per command, or a json cassette
+            saved by DeviceSnapshot.save().
+        hostname : str
+            The hostname of the device, defaults to the name of the capture
+            directory or the hostname recorded in the cassette.
+        **kwargs :
+            Keyword arguments passed on to HP, such as cache_ttl.
+        """
+        from .replay import ReplayConnection, load_captures
+
+        recorded_hostname, outputs = load_captures(path)
+        hostname = hostname or recorded_hostname
+        return cls(hostname, connection=ReplayConnection(hostname, outputs), **kwargs)
+
+    def send_command(self, command_string, *args, use_textfsm=False, **kwargs):
+        """Sends a command to the switch, reusing the output of an earlier
+        identical command while it is held in the cache.
+
+        Output is parsed with the compiled templates of the templates module
+        when use_textfsm is True, from the same raw output as the command sent
+        without it. Parsed output is returned as a new list on every call,
+        but the row dictionaries in it are shared with the cache and must not
+        be changed. Commands sent with extra netmiko arguments bypass the
+        cache and are parsed by netmiko.
+
+        Parameters
+        ----------
+        command_string : str
+            The command to send to the switch.
+        use_textfsm : bool
+            Set to True to parse the output with textfsm.
+        """
+        if args or kwargs:
+            with self._timed(command_string, "wire"):
+                return self.HPProcurveSSH.send_command(
+                    command_string, *args, use_textfsm=use_textfsm, **kwargs
                 )
-                print(f"{self.hostname:^10}{mstp.group('mode'):^10}")
-                print("-" * 20)
-            except AttributeError:
-                try:
-                    rstp = re.search(
-                        r"^\s+Force\s+Version\s+:\s+(?P<mode>RSTP)", output, flags=re.M
-                    )
-                    print(f"{self.hostname:^10}{rstp.group('mode'):^10}")
-                    print("-" * 20)
-                except AttributeError:
-                    try:
-                        stp = re.search(
-                            r"^\s+Force\s+Version\s+:\s+(?P<mode>STP-compatible)",
-                            output,
-                            flags=re.M,
-                        )
-                        print(f"{self.hostname:^10}{stp.group('mode'):^10}")
-                        print("-" * 20)
-                    except AttributeError:
-                        print(f"{self.hostname:^10}{'CHECK SPANNING TREE IS ENABLED'}")
-
-    def find_stp_disabled_switch(self):
-        """Finds the switch which has spanning tree disabled."""
-        print("-" * 20)
-        output = self.send_command("show spanning-tree")
-        print(f"{'STP_DISABLED_SWITCH':^20}")
-        print("-" * 20)
-        try:
-            if (
-                re.search(
-                    r"^\s+STP\s+Enabled\s+(\[No\]\s+:\s+No|:\s+No)", output, flags=re.M
-                ).group(0)
-                in output
-            ):
-                print(f"{self.hostname:^20}")
-                print("-" * 20)
-        except AttributeError:
-            print("-" * 20)
-
-    def find_stp_enabled_switch(self):
-        """Finds and displays the switch which has spanning tree enabled."""
-        output = self.send_command("show spanning-tree")
-        print("-" * 20)
-        print(f"{'STP_ENABLED_SWITCH':^20}")
-        print("-" * 20)
+        key = (command_string, use_textfsm)
+        output = self.cache.get(key)
+        if output is None:
+            if use_textfsm:
+                # the raw output is looked up uncounted, one lookup per call
+                output = self.cache.get((command_string, False), count=False)
+                if output is None:
+                    output = self._send(command_string)
+                with self._timed(command_string, "parse"):
+                    output = templates.parse(command_string, output)
+                self.cache.set(key, output)
+            else:
+                output = self._send(command_string)
+        return list(output) if isinstance(output, list) else output
+
+    def _send(self, command_string):
+        """Sends a command to the switch and caches its raw output"""
+        with self._timed(command_string, "wire") as timer:
+            output = self.HPProcurveSSH.send_command(command_string)
+            timer.received(output)
+        self.cache.set((command_string, False), output)
+        return output
+
+    def stream_command(self, command_string, cache=True):
+        """Yields the output of a command line by line as it is read from
+        the switch, so that large outputs are parsed without being held in
+        memory as a whole.
+
+        Output already in the cache is read from the cache. Stopping early
+        skips the rest of the output and nothing is cached.
+
+        Parameters
+        ----------
+        command_string : str
+            The command to send to the switch.
+        cache : bool
+            Set to False to not cache the output once it has been read in
+            full, such as for a one off search of show run.
+        """
+        return self._stream_command(command_string, cache)
+
+    def _stream_command(self, command_string, cache=True, count=True):
+        """Yields the lines of a command as stream_command() does, counting
+        the cache lookup unless it is made for a model already counted"""
+        key = (command_string, False)
+        output = self.cache.get(key, count=count)
+        if output is not None:
+            yield from iter_lines(output)
+            return
+        if hasattr(self.HPProcurveSSH, "stream_command"):
+            lines = self.HPProcurveSSH.stream_command(command_string)
+        else:
+            lines = channel_lines(self.HPProcurveSSH, command_string)
+        if self.instrumentation is not None:
+            lines = self.instrumentation.stream(self.hostname, command_string, lines)
         try:
-            if (
-                re.search(
-                    r"^\s+STP\s+Enabled\s+(\[No\]\s+:\s+Yes|:\s+Yes)",
-                    output,
-                    flags=re.M,
-                ).group(0)
-                in output
-            ):
-                print(f"{self.hostname:^20}")
-                print("-" * 20)
-        except AttributeError:
-            print("-" * 20)
+            if not cache or not self.cache.enabled:
+                yield from lines
+                return
+            received = []
+            for line in lines:
+                received.append(line)
+                yield line
+            self.cache.set(key, "\n".join(received))
+        finally:
+            lines.close()
+
+    def send_multiline_timing(self, *args, **kwargs):
+        """Sends a list of commands to the switch and clears the cache, as
+        copy and boot commands change the state of the switch."""
+        self.cache.invalidate()
+        with self._timed("send_multiline_timing", "wire"):
+            return self.HPProcurveSSH.send_multiline_timing(*args, **kwargs)
+
+    def transfer(
+        self,
+        command_string,
+        password=None,
+        reboots=False,
+        timeout=1800,
+        on_progress=None,
+    ):
+        """Sends a copy or boot command and waits until the switch reports it
+        complete or failed, answering its questions on the way. The cache is
+        cleared, as copy and boot commands change the state of the switch.
+
+        Parameters
+        ----------
+        command_string : str
+            The copy or boot command to send to the switch.
+        password : str
+            The answer to a password prompt, such as that of an sftp server.
+        reboots : bool
+            Set to True if the switch reboots once the command succeeds.
+        timeout : int or float
+            Number of seconds after which the transfer is reported as failed.
+        on_progress : callable
+            Called with a TransferProgress record as the transfer progresses.
+
+        Returns
+        -------
+        TransferResult
+            Whether the transfer succeeded, its last message and progress,
+            the time it took and its output.
+        """
+        self.cache.invalidate()
+        connection = self.HPProcurveSSH
+        with self._timed(command_string, "wire"):
+            if hasattr(connection, "transfer"):
+                return connection.transfer(
+                    command_string,
+                    password=password,
+                    reboots=reboots,
+                    timeout=timeout,
+                    on_progress=on_progress,
+                )
+            return run_transfer(
+                connection,
+                command_string,
+                hostname=self.hostname,
+                password=password,
+                reboots=reboots,
+                timeout=timeout,
+                on_progress=on_progress,
+            )
+
+    def invalidate(self, command_string=None):
+        """Removes command output from the cache.
+
+        Parameters
+        ----------
+        command_string : str
+            Only remove the output of this command. The whole cache is
+            cleared when no command is given.
+        """
+        self.cache.invalidate(command_string)
+
+    def refresh(self, command_string, use_textfsm=False):
+        """Sends the command to the switch again and replaces its cached output.
+
+        Parameters
+        ----------
+        command_string : str
+            The command to send to the switch.
+        use_textfsm : bool
+            Set to True to parse the output with textfsm.
+        """
+        self.cache.invalidate(command_string)
+        return self.send_command(command_string, use_textfsm=use_textfsm)
+
+    def cache_info(self):
+        """Returns the hits, misses and size of the command cache"""
+        return self.cache.info()
+
+    def snapshot(self):
+        """Collects the output of every show command used by the find_*
+        methods and returns it as a DeviceSnapshot, which answers the same
+        find_* methods without connecting to the switch again."""
+        from .snapshot import DeviceSnapshot
+
+        return DeviceSnapshot.collect(self)
+
+    def running_config(self):
+        """Returns the RunningConfig model of the switch, parsed once from
+        show run and cached with the command output, so that every question
+        about the configuration is answered from the same model.
+        """
+        key = ("show run", "model")
+        config = self.cache.get(key)
+        if config is None:
+            with self._timed("show run", "parse"):
+                config = parse_running_config(
+                    self._stream_command("show run", cache=False, count=False),
+                    self.hostname,
+                )
+            self.cache.set(key, config)
+        return config
 
-    def find_stp_root(self, rpvst_vlan=None):
-        """Finds and displays the spanning tree root bridge.
+    def spanning_tree(self, rpvst_vlan=None):
+        """Returns the SpanningTree model of the switch, parsed in one pass
+        from show spanning-tree.
 
         Parameters
         ----------
         rpvst_vlan : int
+                    if rpvst is enabled on the switch, parse show
+                    spanning-tree vlan rpvst_vlan instead.
+        """
+        if rpvst_vlan:
+            vlan = int(rpvst_vlan)
+            return self.spanning_trees(vlan).get(
+                vlan, SpanningTree(self.hostname, vlan, None, None, False, None, ())
+            )
+        lines = self.stream_command("show spanning-tree")
+        with self._timed("show spanning-tree", "parse"):
+            return parse_spanning_tree(lines, self.hostname)
+
+    def spanning_trees(self, rpvst_vlans):
+        """Returns the SpanningTree model of each rpvst vlan, keyed on the vlan
+        id, reading the vlans which are not cached with as few show
+        spanning-tree vlan commands as the length of a command allows.
+
+        Parameters
+        ----------
+        rpvst_vlans : int, str or list
+                    a vlan, a list of vlans or a vlan range such as
+                    1-10,20. Vlans which do not run rpvst on the switch are
+                    left out of the result.
+        """
+        trees = {}
+        missing = []
+        for vlan in expand_vlans(rpvst_vlans):
+            tree = self.cache.get((VLAN_COMMAND + str(vlan), "model"))
+            if tree is None:
+                missing.append(vlan)
+            else:
+                trees[vlan] = tree
+        for command in vlan_commands(missing):
+            lines = self._stream_command(command, cache=False, count=False)
+            with self._timed(command, "parse"):
+                parsed = parse_vlans(lines, self.hostname)
+            for vlan, tree in parsed.items():
+                self.cache.set((VLAN_COMMAND + str(vlan), "model"), tree)
+                trees[vlan] = tree
+        return dict(sorted(trees.items()))
+
+    @_instrumented
+    def find_stp_mode(self, display=False):
+        """Finds the spanning tree mode of the switch
+
+        Parameters
+        ----------
+        display : bool
+                Set to True to print the records as a table.
+        """
+        mode = self.spanning_tree().mode
+        records = [StpMode(self.hostname, mode)]
+        if display:
+            self._render.stp_mode(self.hostname, records)
+        return records
+
+    @_instrumented
+    def find_stp_disabled_switch(self, display=False):
+        """Finds the switch which has spanning tree disabled.
+
+        Parameters
+        ----------
+        display : bool
+                Set to True to print the records as a table.
+        """
+        records = []
+        if self.spanning_tree().enabled is False:
+            records.append(Switch(self.hostname))
+        if display:
+            self._render.stp_disabled_switch(self.hostname, records)
+        return records
+
+    @_instrumented
+    def find_stp_enabled_switch(self, display=False):
+        """Finds the switch which has spanning tree enabled.
+
+        Parameters
+        ----------
+        display : bool
+                Set to True to print the records as a table.
+        """
+        records = []
+        if self.spanning_tree().enabled:
+            records.append(Switch(self.hostname))
+        if display:
+            self._render.stp_enabled_switch(self.hostname, records)
+        return records
+
+    @_instrumented
+    def find_stp_root(self, rpvst_vlan=None, display=False):
+        """Finds the spanning tree root bridge.
+
+        Parameters
+        ----------
+        rpvst_vlan : int, str or list
                     if rpvst is enabled on the switch, the rpvst_vlan
                     parameter allows the option to specify the keyword
-                    argument to rpvst_vlan as a vlan integer.
+                    argument to rpvst_vlan as a vlan integer, a list of
+                    vlans or a vlan range such as 1-10,20.
+        display : bool
+                Set to True to print the records as a table.
 
         """
         if rpvst_vlan:
-            output = self.send_command("show spanning-tree vlan " + str(rpvst_vlan))
-            try:
-                if (
-                    re.search(r"(This switch is root)", output, flags=re.M).group(0)
-                    in output
-                ):
-                    print(f"{'STP_ROOT_HOSTNAME':^10}{'VLAN':^10}")
-                    print("-" * 25)
-                    print(f"{self.hostname:^10}{rpvst_vlan:>13}")
-                    print("-" * 25)
-            except AttributeError:
-                print("-" * 20)
+            trees = self.spanning_trees(rpvst_vlan).values()
         else:
-            output = self.send_command("show spanning-tree")
-            try:
-                if (
-                    re.search(r"(This switch is root)", output, flags=re.M).group(0)
-                    in output
-                ):
-                    print("-" * 20)
-                    print(f"{'STP_ROOT_HOSTNAME':^20}")
-                    print("-" * 20)
-                    print(f"{self.hostname:^20}")
-                    print("-" * 20)
-            except AttributeError:
-                print("-" * 20)
+            trees = [self.spanning_tree()]
+        records = [StpRoot(self.hostname, tree.vlan) for tree in trees if tree.is_root]
+        if display:
+            self._render.stp_root(self.hostname, records)
+        return records
+
+    def _find_stp_ports(self, state, rpvst_vlan=None):
+        """Returns the spanning tree port table rows in the specified state,
+        of every vlan in rpvst_vlan if given"""
+        if rpvst_vlan:
+            trees = self.spanning_trees(rpvst_vlan).values()
+        else:
+            trees = [self.spanning_tree()]
+        return [port for tree in trees for port in tree.ports if port.state == state]
 
-    def find_stp_forwarding_port(self, rpvst_vlan=None):
-        """Finds and displays the spanning tree forwarding ports
+    @_instrumented
+    def find_stp_forwarding_port(self, rpvst_vlan=None, display=False):
+        """Finds the spanning tree forwarding ports
 
         Parameters
         ----------
-        rpvst_vlan : int
+        rpvst_vlan : int, str or list
                     if rpvst is enabled on the switch, the rpvst_vlan
                     parameter allows the option to specify the keyword
-                    argument to rpvst_vlan as a vlan integer.
+                    argument to rpvst_vlan as a vlan integer, a list of
+                    vlans or a vlan range such as 1-10,20.
+        display : bool
+                Set to True to print the records as a table.
 
         """
-        if rpvst_vlan:
-            print("-" * 80)
-            print(f"{'HOSTNAME :':>40}{self.hostname:>5}")
-            print("-" * 80)
-            print(
-                f"{'PORT':>5}{'TYPE':>10}{'COST':>10}{'PRIORITY':>10}"
-                f"{'ROLE':>10}{'STATE':>10}{'DESIGNATED_BRIDGE':>20}"
-            )
-            output = self.send_command("show spanning-tree vlan " + str(rpvst_vlan))
-            output = output.strip().splitlines()
-            print("-" * 80)
-            for line in output:
-                if "Forwarding" in line:
-                    print(line)
-                    print("-" * 80)
-        else:
-            print("-" * 80)
-            print(f"{'HOSTNAME :':>40}{self.hostname:>5}")
-            print("-" * 80)
-            print(
-                f"{'PORT':>5}{'TYPE':>10}{'COST':>10}{'PRIORITY':>10}"
-                f"{'STATE':>10}{'DESIGNATED_BRIDGE':^20}{'HELLO':>5}"
-                f"{'PTP':^5}{'EDGE':^5}"
-            )
-            print(f"{'TIME':>70}")
-            output = self.send_command("show spanning-tree")
-            output = output.strip().splitlines()
-            print("-" * 80)
-            for line in output:
-                if "Forwarding" in line:
-                    print(line)
-                    print("-" * 80)
+        records = self._find_stp_ports("Forwarding", rpvst_vlan)
+        if display:
+            self._render.stp_port(self.hostname, records, rpvst=bool(rpvst_vlan))
+        return records
 
-    def find_stp_blocking_port(self, rpvst_vlan=None):
-        """Finds and displays the spanning tree blocked ports.
+    @_instrumented
+    def find_stp_blocking_port(self, rpvst_vlan=None, display=False):
+        """Finds the spanning tree blocked ports.
 
         Parameters
         ----------
-        rpvst_vlan : int
+        rpvst_vlan : int, str or list
                     if rpvst is enabled on the switch, the rpvst_vlan
                     parameter allows the option to specify the keyword
-                    argument to rpvst_vlan as a vlan integer.
+                    argument to rpvst_vlan as a vlan integer, a list of
+                    vlans or a vlan range such as 1-10,20.
+        display : bool
+                Set to True to print the records as a table.
 
         """
-        if rpvst_vlan:
-            print("-" * 80)
-            print(f"{'HOSTNAME :':>40}{self.hostname:>5}")
-            print("-" * 80)
-            print(
-                f"{'PORT':>5}{'TYPE':>10}{'COST':>10}{'PRIORITY':>10}"
-                f"{'ROLE':>10}{'STATE':>10}{'DESIGNATED_BRIDGE':>20}"
-            )
-            output = self.send_command("show spanning-tree vlan " + str(rpvst_vlan))
-            output = output.strip().splitlines()
-            print("-" * 80)
-            for line in output:
-                if "Blocking" in line:
-                    print(line)
-                    print("-" * 80)
-        else:
-            print("-" * 80)
-            print(f"{'HOSTNAME :':>40}{self.hostname:>5}")
-            print("-" * 80)
-            print(
-                f"{'PORT':>5}{'TYPE':>10}{'COST':>10}{'PRIORITY':>10}"
-                f"{'STATE':>10}{'DESIGNATED_BRIDGE':^20}{'HELLO':>5}"
-                f"{'PTP':^5}{'EDGE':^5}"
-            )
-            print(f"{'TIME':>70}")
-            output = self.send_command("show spanning-tree")
-            output = output.strip().splitlines()
-            print("-" * 80)
-            for line in output:
-                if "Blocking" in line:
-                    print(line)
-                    print("-" * 80)
+        records = self._find_stp_ports("Blocking", rpvst_vlan)
+        if display:
+            self._render.stp_port(self.hostname, records, rpvst=bool(rpvst_vlan))
+        return records
 
-    def find_stp_disabled_port(self, rpvst_vlan=None):
-        """Finds and displays the spanning tree disabled ports.
+    @_instrumented
+    def find_stp_disabled_port(self, rpvst_vlan=None, display=False):
+        """Finds the spanning tree disabled ports.
 
         Parameters
         ----------
-        rpvst_vlan : int
+        rpvst_vlan : int, str or list
                     if rpvst is enabled on the switch, the rpvst_vlan
                     parameter allows the option to specify the keyword
-                    argument to rpvst_vlan as a vlan integer.
+                    argument to rpvst_vlan as a vlan integer, a list of
+                    vlans or a vlan range such as 1-10,20.
+        display : bool
+                Set to True to print the records as a table.
 
         """
-        if rpvst_vlan:
-            print("-" * 80)
-            print(f"{'HOSTNAME :':>40}{self.hostname:>5}")
-            print("-" * 80)
-            print(
-                f"{'PORT':>5}{'TYPE':>10}{'COST':>10}{'PRIORITY':>10}"
-                f"{'ROLE':>10}{'STATE':>10}{'DESIGNATED_BRIDGE':>20}"
-            )
-            output = self.send_command("show spanning-tree vlan " + str(rpvst_vlan))
-            output = output.strip().splitlines()
-            print("-" * 80)
-            for line in output:
-                if "Ignore" in line:
-                    continue
-                if "Disabled" in line:
-                    print(line)
-                    print("-" * 80)
-        else:
-            print("-" * 80)
-            print(f"{'HOSTNAME :':>40}{self.hostname:>5}")
-            print("-" * 80)
-            print(
-                f"{'PORT':>5}{'TYPE':>10}{'COST':>10}{'PRIORITY':>10}"
-                f"{'STATE':>10}{'DESIGNATED_BRIDGE':^20}{'HELLO':>5}"
-                f"{'PTP':^5}{'EDGE':^5}"
-            )
-            print(f"{'TIME':>70}")
-            output = self.send_command("show spanning-tree")
-            output = output.strip().splitlines()
-            print("-" * 80)
-            for line in output:
-                if "Disabled" in line:
-                    print(line)
-                    print("-" * 80)
-
-    def find_mac_address_port(self, mac_addresses, multiple_mac_port=False):
-        """Finds and displays the switch hostname, port and vlan of the specified
+        records = self._find_stp_ports("Disabled", rpvst_vlan)
+        if display:
+            self._render.stp_port(self.hostname, records, rpvst=bool(rpvst_vlan))
+        return records
+
+    @_instrumented
+    def find_mac_address_port(
+        self, mac_addresses, multiple_mac_port=False, display=False
+    ):
+        """Finds the switch hostname, port and vlan of the specified
         mac addresses.
 
         Parameters
         ----------
         mac_addresses : list of str
                       The mac_addresses parameter accepts a list of one or more
-                      mac addresses.
+                      mac addresses, separated by colons, dashes or dots.
+        multiple_mac_port : bool
+                          Set the multiple_mac_port parameter to True to also
+                          search the uplink ports to lldp neighbors, where the
+                          mac addresses of other switches are learnt. A port
+                          counts as an uplink when its neighbor sends a
+                          system name, as an IP phone may, so use a MacIndex
+                          to find the hosts behind such neighbors.
+        display : bool
+                Set to True to print the records as a table.
+        """
+        wanted = {normalize_mac(mac) for mac in mac_addresses}
+        uplinks = set() if multiple_mac_port else self._uplink_ports()
+        output = self.send_command("show mac-address", use_textfsm=True)
+        records = [
+            MacAddressPort(self.hostname, mac["port"], mac["mac"], mac["vlan"])
+            for mac in output
+            if mac["port"] not in uplinks and normalize_mac(mac["mac"]) in wanted
+        ]
+        if display:
+            self._render.mac_address_port(self.hostname, records)
+        return records
+
+    @_instrumented
+    def lookup_mac_address_ports(self, mac_addresses, multiple_mac_port=False):
+        """Looks up the ports of many mac addresses with one pass over the mac
+        address table.
+
+        Parameters
+        ----------
+        mac_addresses : iterable of str
+                      The mac addresses, separated by colons, dashes or dots.
         multiple_mac_port : bool
-                          Set the multiple_mac_port parameter to True when
-                          searching for a mac address which is likely to be
-                          found on a port containing multiple mac addresses.
+                          Set to True to also search the uplink ports to lldp
+                          neighbors.
+
+        Returns
+        -------
+        dict
+            The list of MacAddressPort records of each mac address as given,
+            empty if the mac address was not learnt on the searched ports or
+            is not a valid mac address.
         """
-        print("-" * 40)
-        print(f"{'HOSTNAME':^10}{'PORT':^10}{'MAC_ADDRESS':^10}{'VLAN':^10}")
-        print("-" * 40)
+        uplinks = set() if multiple_mac_port else self._uplink_ports()
         output = self.send_command("show mac-address", use_textfsm=True)
+        by_mac = {}
         for mac in output:
-            for m in mac_addresses:
-                if mac["mac"] == m:
-                    mac_addr = mac["mac"]
-                    ports = mac["port"]
-                    vlan = mac["vlan"]
-                    output_2 = self.send_command("show mac-address " + ports)
-                    line_output = output_2.splitlines()
-                    if multiple_mac_port:
-                        for line in line_output:
-                            if mac_addr in line:
-                                print(
-                                    f"{self.hostname:^10}{ports:^10}{mac_addr:^10}{vlan:^10}"
-                                )
-                                print("-" * 40)
-                    else:
-                        if len(line_output) <= 7:
-                            for line in line_output:
-                                if mac_addr in line:
-                                    print(
-                                        f"{self.hostname:^10}{ports:^10}{mac_addr:^10}{vlan:^10}"
-                                    )
-                                    print("-" * 40)
-
-    def find_vlans(self, vlan):
-        """Finds and displays the specified vlan if it exists on the switch.
+            if mac["port"] not in uplinks:
+                by_mac.setdefault(normalize_mac(mac["mac"]), []).append(
+                    MacAddressPort(self.hostname, mac["port"], mac["mac"], mac["vlan"])
+                )
+        return {
+            mac: lookup_normalized(by_mac, mac, normalize_mac, [])
+            for mac in mac_addresses
+        }
+
+    def _uplink_ports(self):
+        """Returns the ports with an lldp neighbor which names itself"""
+        return uplink_ports(
+            self.send_command("show lldp info remote-device", use_textfsm=True)
+        )
+
+    @_instrumented
+    def find_vlans(self, vlan, display=False):
+        """Finds the specified vlan if it exists on the switch.
 
         Parameters
         ----------
         vlan : list
              The vlan parameter accepts one or more vlan integer as input to the
              find_vlan function.
+        display : bool
+                Set to True to print the records as a table.
         """
-        print("-" * 20)
-        print(f"{'HOSTNAME':^10}{'VLAN':^10}")
+        wanted = {normalize_vlan(v) for v in vlan}
         output = self.send_command("show vlans", use_textfsm=True)
-        print("-" * 20)
-        for v in output:
-            for vlan_num in vlan:
-                if v["vlan_id"] == str(vlan_num):
-                    print(f"{self.hostname:^10}{v['vlan_id']:^10}")
-                    print("-" * 20)
-
-    def find_interface_errors(self):
-        """Finds and displays transmit or/and receive errors on the interface."""
-        print("-" * 40)
-        print(f"{'HOSTNAME':^10}{'PORT':^10}{'ERRORS_RX':^10}{'DROPS_TX':^10}")
-        print("-" * 40)
+        records = [
+            Vlan(self.hostname, v["vlan_id"], v["name"])
+            for v in output
+            if v["vlan_id"] in wanted
+        ]
+        if display:
+            self._render.vlans(self.hostname, records)
+        return records
+
+    @_instrumented
+    def lookup_vlans(self, vlans):
+        """Looks up many vlans with one pass over the vlan table.
+
+        Parameters
+        ----------
+        vlans : iterable of int or str
+              The vlan ids to look up.
+
+        Returns
+        -------
+        dict
+            The Vlan record of each vlan id as given, None if the vlan does
+            not exist on the switch or the vlan id is not a number.
+        """
+        output = self.send_command("show vlans", use_textfsm=True)
+        by_id = {
+            v["vlan_id"]: Vlan(self.hostname, v["vlan_id"], v["name"]) for v in output
+        }
+        return {vlan: lookup_normalized(by_id, vlan, normalize_vlan) for vlan in vlans}
+
+    @_instrumented
+    def find_interface_errors(self, display=False):
+        """Finds transmit or/and receive errors on the interface.
+
+        Parameters
+        ----------
+        display : bool
+                Set to True to print the records as a table.
+        """
         output = self.send_command("show interfaces", use_textfsm=True)
-        for errors in output:
-            if errors["errors_rx"] > "0" or errors["drops_tx"] > "0":
-                print(
-                    f"{self.hostname:^10}{errors['port']:^10}{errors['errors_rx']:^10}"
-                    f"{errors['drops_tx']:^10}"
-                )
-                print("-" * 40)
+        records = [
+            InterfaceErrors(
+                self.hostname, errors["port"], errors["errors_rx"], errors["drops_tx"]
+            )
+            for errors in templates.rows(output)
+            if templates.parse_count(errors["errors_rx"])
+            or templates.parse_count(errors["drops_tx"])
+        ]
+        if display:
+            self._render.interface_errors(self.hostname, records)
+        return records
+
+    @_instrumented
+    def find_intrusion_alerts(self, display=False):
+        """Finds port security intrusion alarms on an interface.
 
-    def find_intrusion_alerts(self):
-        """Finds and displays port security intrusion alarms on an interface."""
+        Parameters
+        ----------
+        display : bool
+                Set to True to print the records as a table.
+        """
         output = self.send_command("show int brief", use_textfsm=True)
-        print("-" * 40)
-        print(f"{'HOSTNAME':^10}{'PORT':^10}{'INTRUSION':^10}{'STATUS':^10}")
-        print("-" * 40)
-        for alerts in output:
-            if alerts["intrusion_alert"] == "Yes":
-                print(
-                    f"{self.hostname:^10}{alerts['port']:^10}{alerts['intrusion_alert']:^10}"
-                    f"{alerts['status']:^10}"
-                )
-                print("-" * 40)
+        records = [
+            IntrusionAlert(
+                self.hostname,
+                alerts["port"],
+                alerts["intrusion_alert"],
+                alerts["status"],
+            )
+            for alerts in output
+            if alerts["intrusion_alert"] == "Yes"
+        ]
+        if display:
+            self._render.intrusion_alerts(self.hostname, records)
+        return records
 
-    def sftp_backup_config(self, sftp_server_ip, username=None, password=None):
+    def sftp_backup_config(
+        self, sftp_server_ip, username=None, password=None, timeout=1800
+    ):
         """Backs up the startup configuration to an sftp server.
 
         Parameters
@@ -390,44 +753,33 @@ class HP:
                  Specify the username of the sftp server
         password : str
                  Specify the password of the sftp server
+        timeout : int or float
+                Number of seconds after which the copy is reported as failed
+
+        Returns
+        -------
+        TransferResult
+            The outcome of the copy.
         """
-        if username and password:
-            cmd_list = [
-                "copy startup-config sftp "
-                + username
-                + "@"
-                + sftp_server_ip
-                + " "
-                + str(self.hostname)
-                + "_"
-                + str(date.today()),
-                password,
-            ]
-            output = self.send_multiline_timing(cmd_list)
-            if "SFTP download" in output:
-                # if self.find_prompt():
-                print(
-                    f"Startup configuration successfully backed up for {self.hostname}"
-                )
-        else:
-            cmd_list = [
-                "copy startup-config sftp "
-                + sftp_server_ip
-                + " "
-                + str(self.hostname)
-                + "_"
-                + str(date.today()),
-                "\n",
-            ]
-            output = self.send_multiline_timing(cmd_list)
-            if "SFTP download" in output:
-                # if self.find_prompt():
-                print(
-                    f"Startup configuration successfully backed up for {self.hostname}"
-                )
+        result = self.transfer(
+            "copy startup-config sftp "
+            + _sftp_server(sftp_server_ip, username, password)
+            + " "
+            + str(self.hostname)
+            + "_"
+            + str(date.today()),
+            password=password,
+            timeout=timeout,
+        )
+        self._report(
+            result,
+            f"Startup configuration successfully backed up for {self.hostname}",
+        )
+        return result
 
     def sftp_load_config(self, sftp_server_ip, filename, username=None, password=None):
-        """Loads a startup configuration from an sftp server.
+        """Loads a startup configuration from an sftp server. The switch
+        reboots once the configuration is loaded.
 
         Parameters
         ----------
@@ -439,28 +791,22 @@ class HP:
                     Specify the username of the sftp server
         password : str
                     Specify the password of the sftp server
+
+        Returns
+        -------
+        TransferResult
+            The outcome of the copy.
         """
-        if username and password:
-            cmd_list = [
-                "copy sftp startup-config "
-                + username
-                + "@"
-                + sftp_server_ip
-                + " "
-                + filename,
-                "y",
-                password,
-            ]
-            self.send_multiline_timing(cmd_list)
-            print("Rebooting ", self.hostname)
-        else:
-            cmd_list = [
-                "copy sftp startup-config " + sftp_server_ip + " " + filename,
-                "y",
-                "\n",
-            ]
-            self.send_multiline_timing(cmd_list)
-            print("Rebooting ", self.hostname)
+        result = self.transfer(
+            "copy sftp startup-config "
+            + _sftp_server(sftp_server_ip, username, password)
+            + " "
+            + filename,
+            password=password,
+            reboots=True,
+        )
+        self._report(result, f"Rebooting {self.hostname}")
+        return result
 
     def sftp_load_firmware(
         self,
@@ -470,6 +816,7 @@ class HP:
         username=None,
         password=None,
         reboot=False,
+        on_progress=None,
     ):
         """Loads firmware from an sftp server.
 
@@ -487,63 +834,64 @@ class HP:
                   Specify the password of the sftp server
         reboot : bool
                Set to True if switch is to be rebooted after firmware has been loaded
+        on_progress : callable
+                    Called with a TransferProgress record as the transfer
+                    progresses
+
+        Returns
+        -------
+        TransferResult
+            The outcome of the copy. The switch is only rebooted if the copy
+            succeeded.
         """
-        if username and password:
-            cmd_list = [
-                "copy sftp flash "
-                + username
-                + "@"
-                + sftp_server_ip
-                + " "
-                + filename
-                + " "
-                + boot_image,
-                "y",
-                password,
-            ]
-            self.send_multiline_timing(cmd_list)
-            print("Firmware loaded for ", self.hostname)
-            if reboot is True:
-                cmd_list = ["boot system flash " + boot_image, "y"]
-                self.send_multiline_timing(cmd_list)
-                print("Rebooting ", self.hostname)
-                self.disconnect()
-        else:
-            cmd_list = [
-                "copy sftp flash " + sftp_server_ip + " " + filename + " " + boot_image,
-                "y",
-                "\n",
-            ]
-            self.send_multiline_timing(cmd_list)
-            print("Firmware loaded for ", self.hostname)
-            if reboot is True:
-                cmd_list = ["boot system flash " + boot_image, "y"]
-                self.send_multiline_timing(cmd_list)
-                print("Rebooting ", self.hostname)
-                self.disconnect()
-
-    def tftp_backup_config(self, tftp_server_ip):
+        result = self.transfer(
+            "copy sftp flash "
+            + _sftp_server(sftp_server_ip, username, password)
+            + " "
+            + filename
+            + " "
+            + boot_image,
+            password=password,
+            on_progress=on_progress,
+        )
+        self._report(result, f"Firmware loaded for {self.hostname}")
+        if reboot is True and result.success:
+            self.boot_system_flash(boot_image)
+        return result
+
+    def tftp_backup_config(self, tftp_server_ip, timeout=1800):
         """Backs up the startup configuration to a tftp server.
 
         Parameters
         ----------
         tftp_server_ip : str
                       Specify the tftp server IP address
+        timeout : int or float
+                Number of seconds after which the copy is reported as failed
+
+        Returns
+        -------
+        TransferResult
+            The outcome of the copy.
         """
-        cmd_list = [
+        result = self.transfer(
             "copy startup-config tftp "
             + tftp_server_ip
             + " "
             + self.hostname
             + "_"
-            + str(date.today())
-        ]
-        output = self.send_multiline_timing(cmd_list)
-        if "TFTP download" in output:
-            print(f"Startup configuration successfully backed up for {self.hostname}")
+            + str(date.today()),
+            timeout=timeout,
+        )
+        self._report(
+            result,
+            f"Startup configuration successfully backed up for {self.hostname}",
+        )
+        return result
 
     def tftp_load_config(self, tftp_server_ip, filename):
-        """Loads a startup configuration from an sftp server.
+        """Loads a startup configuration from a tftp server. The switch
+        reboots once the configuration is loaded.
 
         Parameters
         ----------
@@ -551,16 +899,22 @@ class HP:
                          Specify the tftp server IP address
         filename : str
                    Specify the filename of the configuration to be loaded
+
+        Returns
+        -------
+        TransferResult
+            The outcome of the copy.
         """
-        cmd_list = [
+        result = self.transfer(
             "copy tftp startup-config " + tftp_server_ip + " " + filename,
-            "y",
-            "\n",
-        ]
-        self.send_multiline_timing(cmd_list)
-        print("Rebooting ", self.hostname)
+            reboots=True,
+        )
+        self._report(result, f"Rebooting {self.hostname}")
+        return result
 
-    def tftp_load_firmware(self, tftp_server_ip, filename, boot_image, reboot=False):
+    def tftp_load_firmware(
+        self, tftp_server_ip, filename, boot_image, reboot=False, on_progress=None
+    ):
         """Loads the switch firmware from a tftp server.
 
         Parameters
@@ -573,370 +927,558 @@ class HP:
                     Specify the boot image. Can be primary or secondary boot image
         reboot : bool
                Set to True if switch is to be rebooted after firmware has been loaded
+        on_progress : callable
+                    Called with a TransferProgress record as the transfer
+                    progresses
+
+        Returns
+        -------
+        TransferResult
+            The outcome of the copy. The switch is only rebooted if the copy
+            succeeded.
         """
-        cmd_list = [
+        result = self.transfer(
             "copy tftp flash " + tftp_server_ip + " " + filename + " " + boot_image,
-            "y",
-            "\n",
-        ]
-        self.send_multiline_timing(cmd_list)
-        print("Firmware loaded for ", self.hostname)
-        if reboot is True:
-            cmd_list = ["boot system flash " + boot_image, "y"]
-            self.send_multiline_timing(cmd_list)
-            print("Rebooting ", self.hostname)
+            on_progress=on_progress,
+        )
+        self._report(result, f"Firmware loaded for {self.hostname}")
+        if reboot is True and result.success:
+            self.boot_system_flash(boot_image)
+        return result
+
+    def boot_system_flash(self, boot_image):
+        """Reboots the switch from a boot image and closes the session.
+
+        Parameters
+        ----------
+        boot_image : str
+                    Specify the boot image. Can be primary or secondary boot image
+
+        Returns
+        -------
+        TransferResult
+            The outcome of the boot command, successful once the switch has
+            dropped the session to reboot.
+        """
+        result = self.transfer("boot system flash " + boot_image, reboots=True)
+        self._report(result, f"Rebooting {self.hostname}")
+        if result.success:
             self.disconnect()
+        return result
+
+    @property
+    def _render(self):
+        """The render module, timed when the HP object is instrumented"""
+        if self.instrumentation is None:
+            return render
+        return self.instrumentation.render(self.hostname, render)
+
+    def _timed(self, command_string, phase):
+        """Returns a context manager timing a phase of a command when the HP
+        object is instrumented"""
+        if self.instrumentation is None:
+            return NULL_TIMER
+        return self.instrumentation.timer(self.hostname, command_string, phase)
+
+    def _report(self, result, message):
+        """Prints the message of a transfer, or why it failed"""
+        if result.success:
+            print(message)
+        else:
+            print(f"Transfer failed for {self.hostname}: {result.message}")
+
+    @_instrumented
+    def find_firmware_version(self, display=False):
+        """Finds the version of firmware on the switch.
 
-    def find_firmware_version(self):
-        """Displays the version of firmware on the switch."""
-        print("-" * 25)
-        print(f"{'HOSTNAME':^10}{'VERSION':^10}")
-        print("-" * 25)
+        Parameters
+        ----------
+        display : bool
+                Set to True to print the records as a table.
+        """
         output = self.send_command("show version")
-        version = re.search(r"^(\s+\S+\.\S+\.\S+.*)", output, flags=re.M).group(1)
-        print(f"{self.hostname:^10}{version.strip():^10}")
-        print("-" * 25)
+        with self._timed("show version", "parse"):
+            version = re.search(r"^(\s+\S+\.\S+\.\S+.*)", output, flags=re.M).group(1)
+        records = [FirmwareVersion(self.hostname, version.strip())]
+        if display:
+            self._render.firmware_version(self.hostname, records)
+        return records
 
-    def find_switch_mac_address(self, switch_mac_addr=None):
-        """Finds and displays the switch with the specified mac address
+    @_instrumented
+    def find_switch_mac_address(self, switch_mac_addr=None, display=False):
+        """Finds the switch with the specified mac address
 
         Parameters
         ----------
         switch_mac_addr : list
                        Specify the switch mac address
+        display : bool
+                Set to True to print the records as a table.
         """
-        print("-" * 25)
-        print(f"{'HOSTNAME':^10}{'MAC_ADDRESS':^10}")
-        print("-" * 25)
+        records = []
+        switch_mac = self.spanning_tree().switch_mac
         if switch_mac_addr:
-            output = self.send_command("show spanning-tree")
-            output = output.strip().splitlines()
-            for i in output:
-                for switch in switch_mac_addr:
-                    if "Switch MAC Address" in i and switch in i:
-                        print("-" * 25)
-                        print(f"{self.hostname:^10}{switch:^10}")
-                        print("-" * 25)
+            records = [
+                SwitchMacAddress(self.hostname, switch)
+                for switch in switch_mac_addr
+                if normalize_mac(switch) == switch_mac
+            ]
         else:
-            output = self.send_command("show spanning-tree")
-            switch_mac = re.search(
-                r"^\s+Switch MAC Address\s+:\s+(\S{6}-\S{6}.*)", output, flags=re.M
-            ).group(1)
-            print(f"{self.hostname:^10}{switch_mac.strip():^10}")
-            print("-" * 25)
-
-    def find_switch_serial_number(self):
-        """Finds and displays the switch hostname and associated serial number"""
-        print("-" * 25)
-        print(f"{'HOSTNAME':^10}{'SERIAL_NUMBER':^10}")
-        print("-" * 25)
+            records.append(SwitchMacAddress(self.hostname, switch_mac))
+        if display:
+            self._render.switch_mac_address(self.hostname, records)
+        return records
+
+    @_instrumented
+    def find_switch_serial_number(self, display=False):
+        """Finds the switch hostname and associated serial number
+
+        Parameters
+        ----------
+        display : bool
+                Set to True to print the records as a table.
+        """
         output = self.send_command("show system")
-        serial_number = re.search(
-            r"^\s+ROM.*Serial Number\s+:\s+(\S+.*)", output, flags=re.M
-        ).group(1)
-        print(f"{self.hostname:^10}{serial_number.strip():^10}")
-        print("-" * 25)
-
-    def find_ports_down(self):
-        """Finds and displays the interfaces in a 'DOWN' state."""
-        print("-" * 12)
-        print(f"{self.hostname:^10}")
-        print("-" * 12)
-        print(f"{'PORT':5}{'STATUS':5}")
-        print("-" * 12)
+        with self._timed("show system", "parse"):
+            serial_number = re.search(
+                r"^\s+ROM.*Serial Number\s+:\s+(\S+.*)", output, flags=re.M
+            ).group(1)
+        records = [SerialNumber(self.hostname, serial_number.strip())]
+        if display:
+            self._render.switch_serial_number(self.hostname, records)
+        return records
+
+    @_instrumented
+    def find_ports_down(self, display=False):
+        """Finds the interfaces in a 'DOWN' state.
+
+        Parameters
+        ----------
+        display : bool
+                Set to True to print the records as a table.
+        """
         output = self.send_command("show int brief", use_textfsm=True)
-        count = 0
-        for ports in output:
-            if ports["status"] == "Down":
-                count += 1
-                print(f"{ports['port']:^5}{ports['status']:^5}")
-                print("-" * 12)
-        print()
-        print(f"number of ports down: {count}")
-
-    def find_ports_up(self):
-        """Finds and displays the interfaces in an 'UP' state."""
-        print("-" * 12)
-        print(f"{self.hostname :^10}")
-        print("-" * 12)
-        print(f"{'PORT':5}{'STATUS':5}")
-        print("-" * 12)
+        records = [
+            PortStatus(self.hostname, ports["port"], ports["status"])
+            for ports in output
+            if ports["status"] == "Down"
+        ]
+        if display:
+            self._render.ports_status(self.hostname, records, "down")
+        return records
+
+    @_instrumented
+    def find_ports_up(self, display=False):
+        """Finds the interfaces in an 'UP' state.
+
+        Parameters
+        ----------
+        display : bool
+                Set to True to print the records as a table.
+        """
         output = self.send_command("show int brief", use_textfsm=True)
-        count = 0
-        for ports in output:
-            if ports["status"] == "Up":
-                count += 1
-                print(f"{ports['port']:^5}{ports['status']:^5}")
-                print("-" * 12)
-        print()
-        print(f"number of ports up: {count}")
+        records = [
+            PortStatus(self.hostname, ports["port"], ports["status"])
+            for ports in output
+            if ports["status"] == "Up"
+        ]
+        if display:
+            self._render.ports_status(self.hostname, records, "up")
+        return records
 
-    def find_ip_from_mac_address(self, mac_address):
-        """Finds and displays the IP address from the specified mac address
+    @_instrumented
+    def find_ip_from_mac_address(self, mac_address, display=False):
+        """Finds the IP address from the specified mac address
 
         Parameters
         ----------
         mac_addresses : list
-                       Specify the mac address(s)
+                       Specify the mac address(s), separated by colons,
+                       dashes or dots
+        display : bool
+                Set to True to print the records as a table.
         """
-        print("-" * 70)
-        print(f"{'HOSTNAME':^20}{'MAC_ADDRESS':>20}{'IP_ADDRESS':>20}")
-        print("-" * 70)
+        wanted = {normalize_mac(mac) for mac in mac_address}
         output = self.send_command("show arp", use_textfsm=True)
-        for ip in output:
-            for i in mac_address:
-                if ip["mac"] == i:
-                    print(f"{self.hostname :^20}{ip['mac']:^30}{ip['ip']:^10}")
-                    print("-" * 70)
+        records = [
+            ArpEntry(self.hostname, ip["ip"], ip["mac"])
+            for ip in output
+            if normalize_mac(ip["mac"]) in wanted
+        ]
+        if display:
+            self._render.arp_entries(self.hostname, records)
+        return records
 
-    def find_mac_from_ip_address(self, ip_address):
-        """Finds and displays the mac address from the specified IP address(s)
+    @_instrumented
+    def find_mac_from_ip_address(self, ip_address, display=False):
+        """Finds the mac address from the specified IP address(s)
 
         Parameters
         ----------
         ip_address : list
                        Specify the IP address(s)
+        display : bool
+                Set to True to print the records as a table.
         """
-        print("-" * 70)
-        print(f"{'HOSTNAME':^20}{'MAC_ADDRESS':>20}{'IP_ADDRESS':>20}")
-        print("-" * 70)
+        wanted = {normalize_ip(ip) for ip in ip_address}
         output = self.send_command("show arp", use_textfsm=True)
-        for ip_addr in output:
-            for i in ip_address:
-                if ip_addr["ip"] == i:
-                    print(
-                        f"{self.hostname :^20}{ip_addr['mac']:^30}{ip_addr['ip']:^10}"
-                    )
-                    print("-" * 70)
-
-    def find_port_security_enabled_ports(self):
-        """Finds and displays the ports enabled for port security"""
-        print("-" * 85)
-        print(f"{self.hostname:^85}")
-        print("-" * 85)
-        print(
-            f"{'PORT':^20}{'LEARN_MODE':^20}{'ACTION':^20}{'EAVESDROP_PREVENTION':^25}"
-        )
-        print("-" * 85)
+        records = [
+            ArpEntry(self.hostname, ip_addr["ip"], ip_addr["mac"])
+            for ip_addr in output
+            if normalize_ip(ip_addr["ip"]) in wanted
+        ]
+        if display:
+            self._render.arp_entries(self.hostname, records)
+        return records
+
+    @_instrumented
+    def lookup_ip_addresses(self, mac_addresses):
+        """Looks up the IP addresses of many mac addresses with one pass over
+        the arp table.
+
+        Parameters
+        ----------
+        mac_addresses : iterable of str
+                      The mac addresses, separated by colons, dashes or dots.
+
+        Returns
+        -------
+        dict
+            The list of ArpEntry records of each mac address as given, empty
+            if the mac address is not in the arp table or is not a valid mac
+            address.
+        """
+        by_mac = {}
+        for entry in self._arp_entries():
+            by_mac.setdefault(normalize_mac(entry.mac), []).append(entry)
+        return {
+            mac: lookup_normalized(by_mac, mac, normalize_mac, [])
+            for mac in mac_addresses
+        }
+
+    @_instrumented
+    def lookup_mac_addresses(self, ip_addresses):
+        """Looks up the mac addresses of many IP addresses with one pass over
+        the arp table.
+
+        Parameters
+        ----------
+        ip_addresses : iterable of str
+                     The IP addresses.
+
+        Returns
+        -------
+        dict
+            The ArpEntry record of each IP address as given, None if the IP
+            address is not in the arp table or is not a valid IP address.
+        """
+        by_ip = {normalize_ip(entry.ip): entry for entry in self._arp_entries()}
+        return {ip: lookup_normalized(by_ip, ip, normalize_ip) for ip in ip_addresses}
+
+    def _arp_entries(self):
+        """Returns an ArpEntry record for each row of the arp table"""
+        output = self.send_command("show arp", use_textfsm=True)
+        return [ArpEntry(self.hostname, ip["ip"], ip["mac"]) for ip in output]
+
+    @_instrumented
+    def find_port_security_enabled_ports(self, display=False):
+        """Finds the ports enabled for port security
+
+        Parameters
+        ----------
+        display : bool
+                Set to True to print the records as a table.
+        """
         output = self.send_command("show port-security", use_textfsm=True)
-        for port in output:
-            if port["learn_mode"] != "Continuous":
-                print(
-                    f"{port['port'] :^20}{port['learn_mode'] :^20}{port['action'] :^20}"
-                    f"{port['eavesdrop_prevention'] :^25}"
-                )
-                print("-" * 85)
-
-    def find_port_security_disabled_ports(self):
-        """Finds and displays the ports not enabled for port security"""
-        print("-" * 85)
-        print(f"{self.hostname:^85}")
-        print("-" * 85)
-        print(
-            f"{'PORT':^20}{'LEARN_MODE':^20}{'ACTION':^20}{'EAVESDROP_PREVENTION':^25}"
-        )
-        print("-" * 85)
+        records = [
+            _port_security(self.hostname, port)
+            for port in output
+            if port["learn_mode"] != "Continuous"
+        ]
+        if display:
+            self._render.port_security(self.hostname, records)
+        return records
+
+    @_instrumented
+    def find_port_security_disabled_ports(self, display=False):
+        """Finds the ports not enabled for port security
+
+        Parameters
+        ----------
+        display : bool
+                Set to True to print the records as a table.
+        """
         output = self.send_command("show port-security", use_textfsm=True)
-        for port in output:
-            if port["learn_mode"] == "Continuous":
-                print(
-                    f"{port['port'] :^20}{port['learn_mode'] :^20}{port['action'] :^20}"
-                    f"{port['eavesdrop_prevention'] :^25}"
-                )
-                print("-" * 85)
+        records = [
+            _port_security(self.hostname, port)
+            for port in output
+            if port["learn_mode"] == "Continuous"
+        ]
+        if display:
+            self._render.port_security(self.hostname, records)
+        return records
 
-    def find_jumbo_vlan(self, jumbo_vlan):
-        """Finds and displays the vlan with jumbo configuration
+    @_instrumented
+    def find_jumbo_vlan(self, jumbo_vlan, display=False):
+        """Finds the vlan with jumbo configuration
 
         Parameters
         ----------
         jumbo_vlan : list
                    Specify the jumbo vlan
+        display : bool
+                Set to True to print the records as a table.
         """
-        print("-" * 20)
-        print(f"{'HOSTNAME':^10}{'JUMBO_VLAN':^10}")
-        print("-" * 20)
+        wanted = {normalize_vlan(v) for v in jumbo_vlan}
         output = self.send_command("show vlans", use_textfsm=True)
-        for j in output:
-            for v in jumbo_vlan:
-                if j["jumbo"] == "Yes" and j["vlan_id"] == str(v):
-                    print(f"{self.hostname:^10}{j['vlan_id']:^10}")
-                    print("-" * 20)
+        records = [
+            Vlan(self.hostname, j["vlan_id"], j["name"])
+            for j in output
+            if j["jumbo"] == "Yes" and j["vlan_id"] in wanted
+        ]
+        if display:
+            self._render.vlans(self.hostname, records, "JUMBO_VLAN")
+        return records
 
-    def find_voice_vlan(self, voice_vlan):
-        """Finds and displays the vlan with voice configuration
+    @_instrumented
+    def find_voice_vlan(self, voice_vlan, display=False):
+        """Finds the vlan with voice configuration
 
         Parameters
         ----------
         voice_vlan : int
                    Specify the voice vlan
+        display : bool
+                Set to True to print the records as a table.
         """
-        print("-" * 20)
-        print(f"{'HOSTNAME':^10}{'VOICE_VLAN':^10}")
-        print("-" * 20)
         output = self.send_command("show vlans", use_textfsm=True)
-        for v in output:
-            if v["voice"] == "Yes" and v["vlan_id"] == str(voice_vlan):
-                print(f"{self.hostname:^10}{v['vlan_id']:^10}")
-                print("-" * 20)
-
-    def find_poe_enabled_ports(self):
-        """Finds and displays the POE+ enabled ports"""
-        print("-" * 25)
-        print(f"{self.hostname :^25}")
-        print("-" * 25)
-        print(f"{'PORT':^10}{'POE_ENABLED':^10}")
-        print("_" * 25)
-        output = self.send_command("show power-over-ethernet brief")
-        output = output.strip().splitlines()
-        for line in output:
-            if re.search(r"^\s+\d+\s+Yes\s+", line, flags=re.M):
-                port, poe_status, *extra = line.split()
-                print(f"{port: ^10}{poe_status: ^10}")
-                print("-" * 25)
-
-    def find_poe_disabled_ports(self):
-        """Finds and displays the POE+ disabled ports"""
-        print("-" * 25)
-        print(f"{self.hostname :^25}")
-        print("-" * 25)
-        print(f"{'PORT':^10}{'POE_ENABLED':^10}")
-        print("-" * 25)
-        output = self.send_command("show power-over-ethernet brief")
-        output = output.strip().splitlines()
-        for line in output:
-            if re.search(r"^\s+\d+\s+No\s+", line, flags=re.M):
-                port, poe_status, *extra = line.split()
-                print(f"{port: ^10}{poe_status: ^10}")
-                print("-" * 25)
-
-    def find_poe_switch_status(self):
-        """Finds and displays the switch with POE+ capability."""
-        print("-" * 25)
-        print(f"{'HOSTNAME':^10}{'POE_ENABLED':^10}")
-        print("-" * 25)
+        records = [
+            Vlan(self.hostname, v["vlan_id"], v["name"])
+            for v in output
+            if v["voice"] == "Yes" and v["vlan_id"] == normalize_vlan(voice_vlan)
+        ]
+        if display:
+            self._render.vlans(self.hostname, records, "VOICE_VLAN")
+        return records
+
+    def _find_poe_ports(self, poe_enabled):
+        """Returns the POE+ ports with the specified Yes or No setting"""
+        lines = self.stream_command("show power-over-ethernet brief")
+        with self._timed("show power-over-ethernet brief", "parse"):
+            output = templates.parse_lines("show power-over-ethernet brief", lines)
+        return [
+            PoePort(self.hostname, port["port"], port["power_enable"])
+            for port in output
+            if port["power_enable"] == poe_enabled
+        ]
+
+    @_instrumented
+    def find_poe_enabled_ports(self, display=False):
+        """Finds the POE+ enabled ports
+
+        Parameters
+        ----------
+        display : bool
+                Set to True to print the records as a table.
+        """
+        records = self._find_poe_ports("Yes")
+        if display:
+            self._render.poe_ports(self.hostname, records)
+        return records
+
+    @_instrumented
+    def find_poe_disabled_ports(self, display=False):
+        """Finds the POE+ disabled ports
+
+        Parameters
+        ----------
+        display : bool
+                Set to True to print the records as a table.
+        """
+        records = self._find_poe_ports("No")
+        if display:
+            self._render.poe_ports(self.hostname, records)
+        return records
+
+    @_instrumented
+    def find_poe_switch_status(self, display=False):
+        """Finds the switch with POE+ capability.
+
+        Parameters
+        ----------
+        display : bool
+                Set to True to print the records as a table.
+        """
+        records = []
         output = self.send_command("show power-over-ethernet")
-        output = output.strip().splitlines()
-        for line in output:
-            if "POE+ Connected" in line:
-                print(f"{self.hostname:^10}{'YES':^10}")
-                print("-" * 25)
-
-    def list_vlans_on_trunk(self):
-        """Lists the vlans on switch trunk ports."""
-        print()
-        print("-" * 25)
-        print(f"{'HOSTNAME':^25}")
-        print("-" * 25)
-        print(f"{self.hostname:^25}")
-        print("-" * 25)
-        print(f"{'NEIGHBOR':^10}{'TRUNK PORT':^10}")
-        print("-" * 25)
+        if "POE+ Connected" in output:
+            records.append(PoeSwitch(self.hostname, True))
+        if display:
+            self._render.poe_switch_status(self.hostname, records)
+        return records
+
+    def _trunk_vlans(self, trunk_vlan=None):
+        """Returns the vlans on the trunk ports to lldp neighbors, limited to
+        the trunk_vlan list if given, joining the lldp neighbors with the
+        vlans of each port in the running configuration"""
+        wanted = None
+        if trunk_vlan is not None:
+            wanted = {normalize_vlan(vlan) for vlan in trunk_vlan}
+        config = self.running_config()
+        records = []
         output = self.send_command("show lldp info remote-device", use_textfsm=True)
-        for i in output:
-            if i["neighbor_sysname"] is not None:
-                neighbor_sysname = i["neighbor_sysname"]
-                port_number = i["local_port"]
-                print(f"{neighbor_sysname:^10}{port_number:^10}")
-                vlan_output = self.send_command("show vlan ports " + port_number)
-                vlan_output = vlan_output.strip()
-                vlan_output = vlan_output.splitlines()
-                print("-" * 25)
-                print(f"{'VLAN':^10}{'VLAN_NAME':10}")
-                print("-" * 25)
-                for vlan in vlan_output[4:]:
-                    vlan, vlan_name, *extra = vlan.split()
-                    print(f"{vlan:^10}{vlan_name:^10}")
-                    print("-" * 25)
-
-    def find_vlans_on_trunk(self, trunk_vlan):
+        for neighbor in templates.rows(output):
+            if not neighbor["neighbor_sysname"]:
+                continue
+            port = neighbor["local_port"]
+            port_vlans = config.port_vlans(config.logical_port(port))
+            vlans = port_vlans.tagged
+            if port_vlans.untagged is not None:
+                vlans += (port_vlans.untagged,)
+            for vlan in sorted(vlans, key=int):
+                if wanted is None or vlan in wanted:
+                    records.append(
+                        TrunkVlan(
+                            self.hostname,
+                            neighbor["neighbor_sysname"],
+                            port,
+                            vlan,
+                            config.vlans[vlan].name or "",
+                        )
+                    )
+        return records
+
+    @_instrumented
+    def list_vlans_on_trunk(self, display=False):
+        """Lists the vlans on switch trunk ports.
+
+        Parameters
+        ----------
+        display : bool
+                Set to True to print the records as a table.
+        """
+        records = self._trunk_vlans()
+        if display:
+            self._render.trunk_vlans(self.hostname, records)
+        return records
+
+    @_instrumented
+    def find_vlans_on_trunk(self, trunk_vlan, display=False):
         """finds whether the specified vlan is on a trunk port
 
         Parameters
         ----------
         trunk_vlan : list
                    Specify the trunk vlan
+        display : bool
+                Set to True to print the records as a table.
         """
-        print()
-        print("-" * 25)
-        print(f"{'HOSTNAME':^25}")
-        print("-" * 25)
-        print(f"{self.hostname:^25}")
-        print("-" * 25)
-        print(f"{'NEIGHBOR':^10}{'TRUNK PORT':^10}")
-        print("-" * 25)
-        output = self.send_command("show lldp info remote-device", use_textfsm=True)
-        for i in output:
-            if i["neighbor_sysname"] is not None:
-                neighbor_sysname = i["neighbor_sysname"]
-                port_number = i["local_port"]
-                print(f"{neighbor_sysname:^10}{port_number:^10}")
-                vlan_output = self.send_command("show vlan ports " + port_number)
-                vlan_output = vlan_output.strip()
-                vlan_output = vlan_output.splitlines()
-                print("-" * 25)
-                print(f"{'VLAN':^10}{'VLAN_NAME':10}")
-                print("-" * 25)
-                for vlan in vlan_output[4:]:
-                    vlan, vlan_name, *extra = vlan.split()
-                    for t in trunk_vlan:
-                        if str(t) in vlan:
-                            print(f"{vlan:^10}{vlan_name:^10}")
-                            print("-" * 25)
-
-    def find_trunk_port_speed(self):
-        """finds the trunk port speed."""
-        print()
-        print("-" * 45)
-        print(f"{'HOSTNAME':^45}")
-        print("-" * 45)
-        print(f"{self.hostname:^45}")
-        print("-" * 45)
-        print(f"{'NEIGHBOR':^15}{'TRUNK PORT':^15}{'PORT SPEED':^15}")
-        print("-" * 45)
+        records = self._trunk_vlans(trunk_vlan)
+        if display:
+            self._render.trunk_vlans(self.hostname, records)
+        return records
+
+    @_instrumented
+    def find_trunk_port_speed(self, display=False):
+        """finds the trunk port speed.
+
+        Parameters
+        ----------
+        display : bool
+                Set to True to print the records as a table.
+        """
+        modes = {
+            port["port"]: port["mode"]
+            for port in templates.rows(
+                self.send_command("show int brief", use_textfsm=True)
+            )
+        }
         output = self.send_command("show lldp info remote-device", use_textfsm=True)
-        for i in output:
-            if i["neighbor_sysname"] is not None:
-                neighbor_sysname = i["neighbor_sysname"]
-                port_number = i["local_port"]
-                int_output = self.send_command("show int brief", use_textfsm=True)
-                for i in int_output:
-                    if port_number == i["port"]:
-                        mode = i["mode"]
-                        print(f"{neighbor_sysname:^15}{port_number:^15}{mode:^15}")
-                        print("-" * 45)
-                        print()
-
-    def find_ntp_config(self):
-        """finds and displays the ntp server if configured."""
-        print()
-        print("-" * 30)
-        print(f"{'HOSTNAME':^15}{'NTP SERVER':^15}")
-        print("-" * 30)
-        ntp_output = self.send_command("show run").strip()
-        try:
-            ntp_server = re.search(
-                r"^(ntp server (?P<ntp>\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}))",
-                ntp_output,
-                flags=re.M,
+        records = [
+            TrunkPortSpeed(
+                self.hostname,
+                neighbor["neighbor_sysname"],
+                neighbor["local_port"],
+                modes[neighbor["local_port"]],
             )
-            print(f"{self.hostname:^15}{ntp_server.group('ntp'):^15}")
-        except AttributeError:
-            print()
-
-    def find_ntp_status(self):
-        """finds and displays the ntp status with either Enabled or Disabled."""
-        print()
-        print("-" * 30)
-        print(f"{'HOSTNAME':^15}{'NTP STATUS':^15}")
-        print("-" * 30)
+            for neighbor in templates.rows(output)
+            if neighbor["neighbor_sysname"] and neighbor["local_port"] in modes
+        ]
+        if display:
+            self._render.trunk_port_speed(self.hostname, records)
+        return records
+
+    @_instrumented
+    def find_ntp_config(self, display=False):
+        """finds the ntp server if configured.
+
+        Parameters
+        ----------
+        display : bool
+                Set to True to print the records as a table.
+        """
+        records = [
+            NtpServer(self.hostname, server)
+            for server in self.running_config().ntp.servers
+        ]
+        if display:
+            self._render.ntp_config(self.hostname, records)
+        return records
+
+    @_instrumented
+    def find_ntp_status(self, display=False):
+        """finds the ntp status with either Enabled or Disabled.
+
+        Parameters
+        ----------
+        display : bool
+                Set to True to print the records as a table.
+        """
+        records = []
         ntp_output = self.send_command("show ntp status").strip()
-        try:
-            ntp_output = re.search(
-                r"^\s+NTP Status\s+:\s+(?P<ntp_status>Disabled|Enabled)\s+.*",
-                ntp_output,
-                flags=re.M,
-            )
-            print(f"{self.hostname:^15}{ntp_output.group('ntp_status'):^15}")
-        except AttributeError:
-            print()
+        ntp_output = re.search(
+            r"^\s+NTP Status\s+:\s+(?P<ntp_status>Disabled|Enabled)\s+.*",
+            ntp_output,
+            flags=re.M,
+        )
+        if ntp_output:
+            records.append(NtpStatus(self.hostname, ntp_output.group("ntp_status")))
+        if display:
+            self._render.ntp_status(self.hostname, records)
+        return records
+
+
+def _ssh_class():
+    """Returns the netmiko HPProcurveSSH class, importing netmiko on first use"""
+    try:
+        return globals()["HPProcurveSSH"]
+    except KeyError:
+        from netmiko.hp import HPProcurveSSH
+
+        globals()["HPProcurveSSH"] = HPProcurveSSH
+        return HPProcurveSSH
+
+
+def __getattr__(name):
+    if name == "HPProcurveSSH":
+        return _ssh_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _sftp_server(sftp_server_ip, username, password):
+    """Returns the sftp server of a copy command, with the username when the
+    server needs authentication"""
+    if username and password:
+        return username + "@" + sftp_server_ip
+    return sftp_server_ip
+
+
+def _port_security(hostname, port):
+    """Returns a PortSecurity record for a row of show port-security"""
+    return PortSecurity(
+        hostname,
+        port["port"],
+        port["learn_mode"],
+        port["action"],
+        port["eavesdrop_prevention"],
+    )
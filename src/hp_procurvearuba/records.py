@@ -0,0 +1,98 @@
+"""The records module consists of the named tuples returned by the find_*
+
+methods of the HP class
+
+Every find_* method returns a list of these records, one per matching row,
+and the render module prints them in the tabular format of earlier releases.
+Named tuples keep the records small and immutable, so fleet wide results can
+be streamed, filtered and aggregated without formatting cost.
+
+"""
+from collections import namedtuple
+
+StpMode = namedtuple("StpMode", ["hostname", "mode"])
+StpMode.__doc__ = """Spanning tree mode of a switch, None if it is not enabled"""
+
+Switch = namedtuple("Switch", ["hostname"])
+Switch.__doc__ = """A switch matching a query such as find_stp_enabled_switch"""
+
+StpRoot = namedtuple("StpRoot", ["hostname", "vlan"])
+StpRoot.__doc__ = """A switch which is the spanning tree root of a vlan or the cst"""
+
+StpPort = namedtuple(
+    "StpPort",
+    [
+        "hostname",
+        "vlan",
+        "port",
+        "type",
+        "cost",
+        "priority",
+        "role",
+        "state",
+        "designated_bridge",
+        "hello_time",
+        "ptp",
+        "edge",
+    ],
+)
+StpPort.__doc__ = """A row of the spanning tree port table"""
+
+MacAddressPort = namedtuple("MacAddressPort", ["hostname", "port", "mac", "vlan"])
+MacAddressPort.__doc__ = """The port and vlan a mac address was learnt on"""
+
+Vlan = namedtuple("Vlan", ["hostname", "vlan_id", "name"])
+Vlan.__doc__ = """A vlan configured on a switch"""
+
+InterfaceErrors = namedtuple(
+    "InterfaceErrors", ["hostname", "port", "errors_rx", "drops_tx"]
+)
+InterfaceErrors.__doc__ = """Receive errors and transmit drops of an interface"""
+
+IntrusionAlert = namedtuple(
+    "IntrusionAlert", ["hostname", "port", "intrusion_alert", "status"]
+)
+IntrusionAlert.__doc__ = """A port with a port security intrusion alert"""
+
+FirmwareVersion = namedtuple("FirmwareVersion", ["hostname", "version"])
+FirmwareVersion.__doc__ = """The firmware version running on a switch"""
+
+SwitchMacAddress = namedtuple("SwitchMacAddress", ["hostname", "mac"])
+SwitchMacAddress.__doc__ = """The base mac address of a switch"""
+
+SerialNumber = namedtuple("SerialNumber", ["hostname", "serial_number"])
+SerialNumber.__doc__ = """The serial number of a switch"""
+
+PortStatus = namedtuple("PortStatus", ["hostname", "port", "status"])
+PortStatus.__doc__ = """The link status of a port, Up or Down"""
+
+ArpEntry = namedtuple("ArpEntry", ["hostname", "ip", "mac"])
+ArpEntry.__doc__ = """An entry of the arp table"""
+
+PortSecurity = namedtuple(
+    "PortSecurity",
+    ["hostname", "port", "learn_mode", "action", "eavesdrop_prevention"],
+)
+PortSecurity.__doc__ = """The port security settings of a port"""
+
+PoePort = namedtuple("PoePort", ["hostname", "port", "poe_enabled"])
+PoePort.__doc__ = """The POE+ setting of a port, Yes or No"""
+
+PoeSwitch = namedtuple("PoeSwitch", ["hostname", "poe_enabled"])
+PoeSwitch.__doc__ = """A switch with POE+ capability"""
+
+TrunkVlan = namedtuple(
+    "TrunkVlan", ["hostname", "neighbor", "port", "vlan_id", "vlan_name"]
+)
+TrunkVlan.__doc__ = """A vlan carried on the trunk port to an lldp neighbor"""
+
+TrunkPortSpeed = namedtuple("TrunkPortSpeed", ["hostname", "neighbor", "port", "mode"])
+TrunkPortSpeed.__doc__ = (
+    """The speed and duplex of the trunk port to an lldp neighbor"""
+)
+
+NtpServer = namedtuple("NtpServer", ["hostname", "server"])
+NtpServer.__doc__ = """An ntp server configured on a switch"""
+
+NtpStatus = namedtuple("NtpStatus", ["hostname", "status"])
+NtpStatus.__doc__ = """The ntp status of a switch, Enabled or Disabled"""
@@ -0,0 +1,351 @@
+"""The render module prints the records returned by the find_* methods of
+
+the HP class as the tables displayed by earlier releases
+
+Each function takes the hostname of the switch and the list of records from
+the method of the same name. Pass display=True to a find_* method, or call
+render() with the method name, to print the table.
+
+"""
+
+
+def stp_mode(hostname, records):
+    """Prints the records of find_stp_mode"""
+    print("-" * 20)
+    print(f"{'HOSTNAME':^10}{'STP_MODE':^10}")
+    print("-" * 20)
+    for record in records:
+        if record.mode:
+            print(f"{record.hostname:^10}{record.mode:^10}")
+            print("-" * 20)
+        else:
+            print(f"{record.hostname:^10}{'CHECK SPANNING TREE IS ENABLED'}")
+
+
+def stp_disabled_switch(hostname, records):
+    """Prints the records of find_stp_disabled_switch"""
+    print("-" * 20)
+    print(f"{'STP_DISABLED_SWITCH':^20}")
+    print("-" * 20)
+    for record in records:
+        print(f"{record.hostname:^20}")
+    print("-" * 20)
+
+
+def stp_enabled_switch(hostname, records):
+    """Prints the records of find_stp_enabled_switch"""
+    print("-" * 20)
+    print(f"{'STP_ENABLED_SWITCH':^20}")
+    print("-" * 20)
+    for record in records:
+        print(f"{record.hostname:^20}")
+    print("-" * 20)
+
+
+def stp_root(hostname, records):
+    """Prints the records of find_stp_root"""
+    for record in records:
+        if record.vlan is not None:
+            print(f"{'STP_ROOT_HOSTNAME':^10}{'VLAN':^10}")
+            print("-" * 25)
+            print(f"{record.hostname:^10}{record.vlan:>13}")
+            print("-" * 25)
+        else:
+            print("-" * 20)
+            print(f"{'STP_ROOT_HOSTNAME':^20}")
+            print("-" * 20)
+            print(f"{record.hostname:^20}")
+            print("-" * 20)
+    if not records:
+        print("-" * 20)
+
+
+def stp_port(hostname, records, rpvst=False):
+    """Prints the records of find_stp_forwarding_port, find_stp_blocking_port
+    and find_stp_disabled_port"""
+    print("-" * 80)
+    print(f"{'HOSTNAME :':>40}{hostname:>5}")
+    print("-" * 80)
+    if rpvst or any(record.vlan is not None for record in records):
+        print(
+            f"{'PORT':>5}{'TYPE':>10}{'COST':>10}{'PRIORITY':>10}"
+            f"{'ROLE':>12}{'STATE':>12}{'DESIGNATED_BRIDGE':>20}"
+        )
+        print("-" * 80)
+        for record in records:
+            print(
+                f"{record.port:>5}{record.type:>10}{record.cost:>10}"
+                f"{record.priority:>10}{record.role:>12}{record.state:>12}"
+                f"{record.designated_bridge:>20}"
+            )
+            print("-" * 80)
+    else:
+        print(
+            f"{'PORT':>5}{'TYPE':>10}{'COST':>10}{'PRIORITY':>10}"
+            f"{'STATE':>12}{'DESIGNATED_BRIDGE':^20}{'HELLO':>5}"
+            f"{'PTP':^5}{'EDGE':^5}"
+        )
+        print(f"{'TIME':>72}")
+        print("-" * 80)
+        for record in records:
+            print(
+                f"{record.port:>5}{record.type:>10}{record.cost:>10}"
+                f"{record.priority:>10}{record.state:>12}"
+                f"{record.designated_bridge:^20}{record.hello_time:>5}"
+                f"{record.ptp:^5}{record.edge:^5}"
+            )
+            print("-" * 80)
+
+
+def mac_address_port(hostname, records):
+    """Prints the records of find_mac_address_port"""
+    print("-" * 40)
+    print(f"{'HOSTNAME':^10}{'PORT':^10}{'MAC_ADDRESS':^10}{'VLAN':^10}")
+    print("-" * 40)
+    for record in records:
+        print(
+            f"{record.hostname:^10}{record.port:^10}{record.mac:^10}{record.vlan:^10}"
+        )
+        print("-" * 40)
+
+
+def vlans(hostname, records, title="VLAN"):
+    """Prints the records of find_vlans, find_jumbo_vlan and find_voice_vlan"""
+    print("-" * 20)
+    print(f"{'HOSTNAME':^10}{title:^10}")
+    print("-" * 20)
+    for record in records:
+        print(f"{record.hostname:^10}{record.vlan_id:^10}")
+        print("-" * 20)
+
+
+def interface_errors(hostname, records):
+    """Prints the records of find_interface_errors"""
+    print("-" * 40)
+    print(f"{'HOSTNAME':^10}{'PORT':^10}{'ERRORS_RX':^10}{'DROPS_TX':^10}")
+    print("-" * 40)
+    for record in records:
+        print(
+            f"{record.hostname:^10}{record.port:^10}{record.errors_rx:^10}"
+            f"{record.drops_tx:^10}"
+        )
+        print("-" * 40)
+
+
+def intrusion_alerts(hostname, records):
+    """Prints the records of find_intrusion_alerts"""
+    print("-" * 40)
+    print(f"{'HOSTNAME':^10}{'PORT':^10}{'INTRUSION':^10}{'STATUS':^10}")
+    print("-" * 40)
+    for record in records:
+        print(
+            f"{record.hostname:^10}{record.port:^10}{record.intrusion_alert:^10}"
+            f"{record.status:^10}"
+        )
+        print("-" * 40)
+
+
+def firmware_version(hostname, records):
+    """Prints the records of find_firmware_version"""
+    print("-" * 25)
+    print(f"{'HOSTNAME':^10}{'VERSION':^10}")
+    print("-" * 25)
+    for record in records:
+        print(f"{record.hostname:^10}{record.version:^10}")
+        print("-" * 25)
+
+
+def switch_mac_address(hostname, records):
+    """Prints the records of find_switch_mac_address"""
+    print("-" * 25)
+    print(f"{'HOSTNAME':^10}{'MAC_ADDRESS':^10}")
+    print("-" * 25)
+    for record in records:
+        print(f"{record.hostname:^10}{record.mac:^10}")
+        print("-" * 25)
+
+
+def switch_serial_number(hostname, records):
+    """Prints the records of find_switch_serial_number"""
+    print("-" * 25)
+    print(f"{'HOSTNAME':^10}{'SERIAL_NUMBER':^10}")
+    print("-" * 25)
+    for record in records:
+        print(f"{record.hostname:^10}{record.serial_number:^10}")
+        print("-" * 25)
+
+
+def ports_status(hostname, records, status="up"):
+    """Prints the records of find_ports_up and find_ports_down"""
+    print("-" * 12)
+    print(f"{hostname:^10}")
+    print("-" * 12)
+    print(f"{'PORT':5}{'STATUS':5}")
+    print("-" * 12)
+    for record in records:
+        print(f"{record.port:^5}{record.status:^5}")
+        print("-" * 12)
+    print()
+    print(f"number of ports {status}: {len(records)}")
+
+
+def arp_entries(hostname, records):
+    """Prints the records of find_ip_from_mac_address and
+    find_mac_from_ip_address"""
+    print("-" * 70)
+    print(f"{'HOSTNAME':^20}{'MAC_ADDRESS':>20}{'IP_ADDRESS':>20}")
+    print("-" * 70)
+    for record in records:
+        print(f"{record.hostname:^20}{record.mac:^30}{record.ip:^10}")
+        print("-" * 70)
+
+
+def port_security(hostname, records):
+    """Prints the records of find_port_security_enabled_ports and
+    find_port_security_disabled_ports"""
+    print("-" * 85)
+    print(f"{hostname:^85}")
+    print("-" * 85)
+    print(f"{'PORT':^20}{'LEARN_MODE':^20}{'ACTION':^20}{'EAVESDROP_PREVENTION':^25}")
+    print("-" * 85)
+    for record in records:
+        print(
+            f"{record.port:^20}{record.learn_mode:^20}{record.action:^20}"
+            f"{record.eavesdrop_prevention:^25}"
+        )
+        print("-" * 85)
+
+
+def poe_ports(hostname, records):
+    """Prints the records of find_poe_enabled_ports and find_poe_disabled_ports"""
+    print("-" * 25)
+    print(f"{hostname:^25}")
+    print("-" * 25)
+    print(f"{'PORT':^10}{'POE_ENABLED':^10}")
+    print("-" * 25)
+    for record in records:
+        print(f"{record.port:^10}{record.poe_enabled:^10}")
+        print("-" * 25)
+
+
+def poe_switch_status(hostname, records):
+    """Prints the records of find_poe_switch_status"""
+    print("-" * 25)
+    print(f"{'HOSTNAME':^10}{'POE_ENABLED':^10}")
+    print("-" * 25)
+    for record in records:
+        print(f"{record.hostname:^10}{'YES':^10}")
+        print("-" * 25)
+
+
+def trunk_vlans(hostname, records):
+    """Prints the records of list_vlans_on_trunk and find_vlans_on_trunk"""
+    print()
+    print("-" * 25)
+    print(f"{'HOSTNAME':^25}")
+    print("-" * 25)
+    print(f"{hostname:^25}")
+    print("-" * 25)
+    print(f"{'NEIGHBOR':^10}{'TRUNK PORT':^10}")
+    print("-" * 25)
+    trunk = None
+    for record in records:
+        if (record.neighbor, record.port) != trunk:
+            trunk = (record.neighbor, record.port)
+            print(f"{record.neighbor:^10}{record.port:^10}")
+            print("-" * 25)
+            print(f"{'VLAN':^10}{'VLAN_NAME':10}")
+            print("-" * 25)
+        print(f"{record.vlan_id:^10}{record.vlan_name:^10}")
+        print("-" * 25)
+
+
+def trunk_port_speed(hostname, records):
+    """Prints the records of find_trunk_port_speed"""
+    print()
+    print("-" * 45)
+    print(f"{'HOSTNAME':^45}")
+    print("-" * 45)
+    print(f"{hostname:^45}")
+    print("-" * 45)
+    print(f"{'NEIGHBOR':^15}{'TRUNK PORT':^15}{'PORT SPEED':^15}")
+    print("-" * 45)
+    for record in records:
+        print(f"{record.neighbor:^15}{record.port:^15}{record.mode:^15}")
+        print("-" * 45)
+        print()
+
+
+def ntp_config(hostname, records):
+    """Prints the records of find_ntp_config"""
+    print()
+    print("-" * 30)
+    print(f"{'HOSTNAME':^15}{'NTP SERVER':^15}")
+    print("-" * 30)
+    for record in records:
+        print(f"{record.hostname:^15}{record.server:^15}")
+    if not records:
+        print()
+
+
+def ntp_status(hostname, records):
+    """Prints the records of find_ntp_status"""
+    print()
+    print("-" * 30)
+    print(f"{'HOSTNAME':^15}{'NTP STATUS':^15}")
+    print("-" * 30)
+    for record in records:
+        print(f"{record.hostname:^15}{record.status:^15}")
+    if not records:
+        print()
+
+
+RENDERERS = {
+    "find_stp_mode": stp_mode,
+    "find_stp_disabled_switch": stp_disabled_switch,
+    "find_stp_enabled_switch": stp_enabled_switch,
+    "find_stp_root": stp_root,
+    "find_stp_forwarding_port": stp_port,
+    "find_stp_blocking_port": stp_port,
+    "find_stp_disabled_port": stp_port,
+    "find_mac_address_port": mac_address_port,
+    "find_vlans": vlans,
+    "find_jumbo_vlan": lambda hostname, records: vlans(hostname, records, "JUMBO_VLAN"),
+    "find_voice_vlan": lambda hostname, records: vlans(hostname, records, "VOICE_VLAN"),
+    "find_interface_errors": interface_errors,
+    "find_intrusion_alerts": intrusion_alerts,
+    "find_firmware_version": firmware_version,
+    "find_switch_mac_address": switch_mac_address,
+    "find_switch_serial_number": switch_serial_number,
+    "find_ports_down": lambda hostname, records: ports_status(
+        hostname, records, "down"
+    ),
+    "find_ports_up": lambda hostname, records: ports_status(hostname, records, "up"),
+    "find_ip_from_mac_address": arp_entries,
+    "find_mac_from_ip_address": arp_entries,
+    "find_port_security_enabled_ports": port_security,
+    "find_port_security_disabled_ports": port_security,
+    "find_poe_enabled_ports": poe_ports,
+    "find_poe_disabled_ports": poe_ports,
+    "find_poe_switch_status": poe_switch_status,
+    "list_vlans_on_trunk": trunk_vlans,
+    "find_vlans_on_trunk": trunk_vlans,
+    "find_trunk_port_speed": trunk_port_speed,
+    "find_ntp_config": ntp_config,
+    "find_ntp_status": ntp_status,
+}
+
+
+def render(method, hostname, records):
+    """Prints the records returned by an HP method.
+
+    Parameters
+    ----------
+    method : str
+        The name of the HP method which returned the records.
+    hostname : str
+        The hostname of the switch.
+    records : list
+        The records returned by the method.
+    """
+    RENDERERS[method](hostname, records)
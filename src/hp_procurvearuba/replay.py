@@ -0,0 +1,208 @@
+"""The replay module consists of a class ReplayConnection which answers the
+
+commands of the HP class from recorded output instead of an SSH session
+
+Recordings are either a directory of capture files, one text file per
+command, or a json cassette as written by DeviceSnapshot.save(). The capture
+file of a command is named after the command with spaces replaced by
+underscores, for example show_spanning-tree_vlan_100.txt, see
+capture_filename().
+
+"""
+import gzip
+import json
+import os
+from urllib.parse import unquote
+
+from .stp import VLAN_COMMAND, expand_vlans
+from .stream import iter_lines
+from .transfers import replay_transfer
+
+CAPTURE_SUFFIX = ".txt"
+
+
+class CommandNotCaptured(LookupError):
+    """Raised when a command was not recorded in a snapshot or capture"""
+
+
+def capture_filename(command):
+    """Returns the name of the capture file holding the output of a command"""
+    return (
+        command.replace("%", "%25")
+        .replace("_", "%5F")
+        .replace("/", "%2F")
+        .replace(" ", "_")
+        + CAPTURE_SUFFIX
+    )
+
+
+def capture_command(filename):
+    """Returns the command recorded in a capture file"""
+    return unquote(filename[: -len(CAPTURE_SUFFIX)].replace("_", " "))
+
+
+def load_captures(path):
+    """Returns the hostname and the recorded output of each command from a
+    directory of capture files or a json cassette.
+
+    Parameters
+    ----------
+    path : str
+        A directory of capture files, whose name is used as the hostname, or
+        a json cassette, optionally gzip compressed.
+    """
+    if os.path.isdir(path):
+        outputs = {}
+        for filename in sorted(os.listdir(path)):
+            if filename.endswith(CAPTURE_SUFFIX):
+                with open(os.path.join(path, filename), "r", encoding="utf-8") as f:
+                    outputs[capture_command(filename)] = f.read()
+        return os.path.basename(os.path.normpath(path)), outputs
+    with open_recording(path, "rt") as f:
+        data = json.load(f)
+    return data["hostname"], data["outputs"]
+
+
+def open_recording(path, mode):
+    """Opens a json recording, through gzip if the path ends in .gz"""
+    if str(path).endswith(".gz"):
+        return gzip.open(path, mode, encoding="utf-8")
+    return open(path, mode.replace("t", ""), encoding="utf-8")
+
+
+def save_captures(outputs, path):
+    """Writes the output of each command to a directory of capture files
+
+    Parameters
+    ----------
+    outputs : dict
+        The raw output of each command, keyed on the command.
+    path : str
+        The directory to write the capture files to.
+    """
+    os.makedirs(path, exist_ok=True)
+    for command, output in outputs.items():
+        with open(
+            os.path.join(path, capture_filename(command)), "w", encoding="utf-8"
+        ) as f:
+            f.write(output)
+
+
+class ReplayConnection:
+    """Answers the HPProcurveSSH methods used by the HP class from recorded
+    output"""
+
+    platform = "hp_procurve"
+
+    def __init__(self, hostname, outputs):
+        """
+        Parameters
+        ----------
+        hostname : str
+            The hostname of the device.
+        outputs : dict
+            The raw output of each recorded command, keyed on the command.
+        """
+        self.hostname = hostname
+        self.outputs = outputs
+
+    def __repr__(self):
+        return f"ReplayConnection({self.hostname}, {len(self.outputs)} commands)"
+
+    def send_command(self, command_string, *args, use_textfsm=False, **kwargs):
+        """Returns the recorded output of a command, parsed with textfsm if
+        use_textfsm is True. show spanning-tree vlan for a range of vlans is
+        answered from the recorded output of each vlan."""
+        output = self.outputs.get(command_string)
+        if output is None:
+            output = self._join_vlans(command_string)
+        if output is None:
+            raise CommandNotCaptured(
+                f"'{command_string}' was not captured for {self.hostname}"
+            )
+        if use_textfsm:
+            from netmiko.utilities import structured_data_converter
+
+            return structured_data_converter(
+                output,
+                command=command_string,
+                platform=self.platform,
+                use_textfsm=True,
+            )
+        return output
+
+    def stream_command(self, command_string):
+        """Yields the recorded output of a command line by line"""
+        return iter_lines(self.send_command(command_string))
+
+    def send_multiline_timing(self, commands, *args, **kwargs):
+        """Returns the recorded output of a list of commands.
+
+        Copy commands end in a file name which changes from run to run, so
+        each command is answered by the longest recorded command it starts
+        with. Answers to prompts, such as y or a password, need no recording.
+        """
+        output = []
+        for number, command in enumerate(commands):
+            recorded = self._match_prefix(command)
+            if recorded is not None:
+                output.append(self.outputs[recorded])
+            elif number == 0:
+                raise CommandNotCaptured(
+                    f"'{command}' was not captured for {self.hostname}"
+                )
+        return "".join(output)
+
+    def transfer(self, command_string, reboots=False, on_progress=None, **kwargs):
+        """Returns the TransferResult of the recorded output of a copy or boot
+        command, matched as in send_multiline_timing()"""
+        recorded = self._match_prefix(command_string)
+        if recorded is None:
+            raise CommandNotCaptured(
+                f"'{command_string}' was not captured for {self.hostname}"
+            )
+        return replay_transfer(
+            self.outputs[recorded],
+            command_string,
+            hostname=self.hostname,
+            reboots=reboots,
+            on_progress=on_progress,
+        )
+
+    def find_prompt(self, *args, **kwargs):
+        return f"{self.hostname}#"
+
+    def disconnect(self):
+        pass
+
+    def is_alive(self):
+        return True
+
+    def _match_prefix(self, command):
+        """Returns the longest recorded command which command starts with"""
+        command = command.strip()
+        if not command:
+            return None
+        matches = [
+            recorded
+            for recorded in self.outputs
+            if command == recorded or command.startswith(recorded + " ")
+        ]
+        return max(matches, key=len, default=None)
+
+    def _join_vlans(self, command):
+        """Returns the output of show spanning-tree vlan for a range of vlans
+        joined from the recorded output of each vlan, or None if none of the
+        vlans was recorded"""
+        if not command.startswith(VLAN_COMMAND):
+            return None
+        try:
+            vlans = expand_vlans(command[len(VLAN_COMMAND) :])
+        except ValueError:
+            return None
+        outputs = [
+            self.outputs[VLAN_COMMAND + str(vlan)]
+            for vlan in vlans
+            if VLAN_COMMAND + str(vlan) in self.outputs
+        ]
+        return "\n".join(outputs) if outputs else None
@@ -0,0 +1,387 @@
+"""The runconfig module parses show run into a RunningConfig model indexed for
+
+lookups by vlan and by port
+
+The configuration is read once, line by line, into the vlans with their
+tagged and untagged ports, the interfaces, the ntp, snmp and spanning tree
+settings, the port security settings and the trunks of the switch. Port
+ranges such as 1-4,23-24 or A1-A24 are expanded as they are read, and the
+vlans of each port are indexed, so a question about a vlan or a port is
+answered with a dictionary lookup instead of another pass over the
+configuration.
+
+"""
+from collections import namedtuple
+import re
+import shlex
+
+from .addresses import normalize_vlan
+
+PORT = re.compile(r"^(?P<prefix>.*?)(?P<number>\d+)$")
+PORT_SPEC = re.compile(r"^[A-Za-z]*\d[\w/,-]*$")
+
+VlanConfig = namedtuple(
+    "VlanConfig",
+    ["vlan_id", "name", "untagged", "tagged", "voice", "jumbo", "ip_address"],
+)
+VlanConfig.__doc__ = """A vlan of the running configuration"""
+
+InterfaceConfig = namedtuple("InterfaceConfig", ["port", "name", "enabled", "options"])
+InterfaceConfig.__doc__ = """An interface of the running configuration"""
+
+PortVlans = namedtuple("PortVlans", ["port", "untagged", "tagged"])
+PortVlans.__doc__ = """The untagged vlan and the tagged vlans of a port"""
+
+NtpConfig = namedtuple("NtpConfig", ["enabled", "timesync", "mode", "servers"])
+NtpConfig.__doc__ = """The ntp settings of the running configuration"""
+
+SnmpConfig = namedtuple("SnmpConfig", ["communities", "hosts", "contact", "location"])
+SnmpConfig.__doc__ = """The snmp settings of the running configuration"""
+
+StpConfig = namedtuple(
+    "StpConfig", ["enabled", "mode", "force_version", "priority", "options", "ports"]
+)
+StpConfig.__doc__ = """The spanning tree settings of the running configuration"""
+
+PortSecurityConfig = namedtuple(
+    "PortSecurityConfig", ["port", "learn_mode", "address_limit", "action", "options"]
+)
+PortSecurityConfig.__doc__ = """The port security settings of a port"""
+
+
+def expand_ports(spec):
+    """Returns the list of ports of a port range such as 1-4,23-24, A1-A4 or
+    1/1-1/4, in order"""
+    ports = []
+    for part in spec.split(","):
+        first, _, last = part.partition("-")
+        start, end = PORT.match(first), PORT.match(last)
+        if start and end and start.group("prefix") == end.group("prefix"):
+            prefix = start.group("prefix")
+            ports += [
+                f"{prefix}{number}"
+                for number in range(
+                    int(start.group("number")), int(end.group("number")) + 1
+                )
+            ]
+        elif part:
+            ports += [port for port in (first, last) if port]
+    return ports
+
+
+class RunningConfig:
+    """Class RunningConfig holds the running configuration of a switch,
+    indexed by vlan and by port"""
+
+    def __init__(
+        self,
+        hostname=None,
+        vlans=None,
+        interfaces=None,
+        ntp=None,
+        snmp=None,
+        stp=None,
+        port_security=None,
+        trunks=None,
+    ):
+        """
+        Parameters
+        ----------
+        hostname : str
+            The hostname of the switch.
+        vlans : dict
+            The VlanConfig of each vlan, keyed on the vlan id.
+        interfaces : dict
+            The InterfaceConfig of each configured interface, keyed on port.
+        ntp : NtpConfig
+        snmp : SnmpConfig
+        stp : StpConfig
+        port_security : dict
+            The PortSecurityConfig of each port, keyed on port.
+        trunks : dict
+            The trunk, such as Trk1, of each port in a trunk, keyed on port.
+        """
+        self.hostname = hostname
+        self.vlans = vlans or {}
+        self.interfaces = interfaces or {}
+        self.ntp = ntp or NtpConfig(False, None, None, ())
+        self.snmp = snmp or SnmpConfig({}, (), None, None)
+        self.stp = stp or StpConfig(False, None, None, None, (), {})
+        self.port_security = port_security or {}
+        self.trunks = trunks or {}
+        self._untagged = {}
+        self._tagged = {}
+        for vlan in self.vlans.values():
+            for port in vlan.untagged:
+                self._untagged[port] = vlan.vlan_id
+            for port in vlan.tagged:
+                self._tagged.setdefault(port, []).append(vlan.vlan_id)
+
+    def __repr__(self):
+        return (
+            f"RunningConfig({self.hostname}, {len(self.vlans)} vlans, "
+            f"{len(self.interfaces)} interfaces)"
+        )
+
+    def vlan(self, vlan_id):
+        """Returns the VlanConfig of a vlan, or None if it is not configured"""
+        return self.vlans.get(normalize_vlan(vlan_id))
+
+    def port_vlans(self, port):
+        """Returns the PortVlans of a port, its untagged vlan id, or None, and
+        the tuple of its tagged vlan ids"""
+        port = str(port)
+        return PortVlans(
+            port, self._untagged.get(port), tuple(self._tagged.get(port, ()))
+        )
+
+    def ports_in_vlan(self, vlan_id):
+        """Returns the ports of a vlan, untagged then tagged, or an empty tuple
+        if it is not configured"""
+        vlan = self.vlan(vlan_id)
+        return vlan.untagged + vlan.tagged if vlan else ()
+
+    def logical_port(self, port):
+        """Returns the trunk of a port in a trunk, which holds the vlans of
+        the port, else the port itself"""
+        return self.trunks.get(str(port), str(port))
+
+    def interface(self, port):
+        """Returns the InterfaceConfig of a port, or None if the port has no
+        interface settings"""
+        return self.interfaces.get(str(port))
+
+
+def parse_running_config(lines, hostname=None):
+    """Returns the RunningConfig model of show run output.
+
+    Parameters
+    ----------
+    lines : str or iterable of str
+        The output of show run, as one string or line by line.
+    hostname : str
+        The hostname of the switch, taken from the configuration when not
+        given.
+    """
+    if isinstance(lines, str):
+        lines = lines.splitlines()
+    parser = _Parser()
+    for line in lines:
+        parser.line(line.rstrip())
+    return parser.model(hostname)
+
+
+class _Parser:
+    """Reads the lines of a configuration into the parts of the model"""
+
+    def __init__(self):
+        self.hostname = None
+        self.context = None
+        self.vlans = {}
+        self.interfaces = {}
+        self.ntp = {"enabled": False, "timesync": None, "mode": None, "servers": []}
+        self.snmp = {"communities": {}, "hosts": [], "contact": None, "location": None}
+        self.stp = {
+            "enabled": False,
+            "mode": None,
+            "force_version": None,
+            "priority": None,
+            "options": [],
+            "ports": {},
+        }
+        self.port_security = {}
+        self.trunks = {}
+        self.handlers = {
+            "hostname": self._hostname,
+            "vlan": self._vlan,
+            "interface": self._interface,
+            "ntp": self._ntp,
+            "timesync": self._timesync,
+            "snmp-server": self._snmp_server,
+            "spanning-tree": self._spanning_tree,
+            "port-security": self._port_security,
+            "trunk": self._trunk,
+        }
+
+    def line(self, line):
+        if not line or line.startswith(";"):
+            return
+        if line.startswith(" "):
+            if self.context is not None:
+                self.context(line.strip())
+            return
+        self.context = None
+        words = _split(line)
+        handler = self.handlers.get(words[0])
+        if handler is not None:
+            handler(words[1:])
+
+    def model(self, hostname):
+        return RunningConfig(
+            hostname or self.hostname,
+            {
+                vlan_id: VlanConfig(
+                    vlan_id,
+                    vlan["name"],
+                    tuple(vlan["untagged"]),
+                    tuple(vlan["tagged"]),
+                    vlan["voice"],
+                    vlan["jumbo"],
+                    vlan["ip_address"],
+                )
+                for vlan_id, vlan in self.vlans.items()
+            },
+            {
+                port: InterfaceConfig(
+                    port, interface["name"], interface["enabled"], tuple(options)
+                )
+                for port, (interface, options) in self.interfaces.items()
+            },
+            NtpConfig(
+                self.ntp["enabled"],
+                self.ntp["timesync"],
+                self.ntp["mode"],
+                tuple(self.ntp["servers"]),
+            ),
+            SnmpConfig(
+                self.snmp["communities"],
+                tuple(self.snmp["hosts"]),
+                self.snmp["contact"],
+                self.snmp["location"],
+            ),
+            StpConfig(
+                self.stp["enabled"],
+                self.stp["mode"],
+                self.stp["force_version"],
+                self.stp["priority"],
+                tuple(self.stp["options"]),
+                {port: tuple(options) for port, options in self.stp["ports"].items()},
+            ),
+            {
+                port: PortSecurityConfig(
+                    port,
+                    settings.pop("learn-mode", None),
+                    settings.pop("address-limit", None),
+                    settings.pop("action", None),
+                    settings,
+                )
+                for port, settings in self.port_security.items()
+            },
+            self.trunks,
+        )
+
+    def _hostname(self, words):
+        self.hostname = words[0] if words else None
+
+    def _vlan(self, words):
+        if not words or not words[0].isdigit():
+            return
+        vlan_id = normalize_vlan(words[0])
+        vlan = self.vlans.setdefault(
+            vlan_id,
+            {
+                "name": None,
+                "untagged": [],
+                "tagged": [],
+                "voice": False,
+                "jumbo": False,
+                "ip_address": None,
+            },
+        )
+        self.context = lambda line: self._vlan_line(vlan, _split(line))
+
+    def _vlan_line(self, vlan, words):
+        keyword, args = words[0], words[1:]
+        if keyword == "name" and args:
+            vlan["name"] = args[0]
+        elif keyword in ("untagged", "tagged") and args:
+            vlan[keyword] += expand_ports(args[0])
+        elif keyword in ("voice", "jumbo"):
+            vlan[keyword] = True
+        elif keyword == "ip" and args[:1] == ["address"]:
+            vlan["ip_address"] = " ".join(args[1:])
+
+    def _interface(self, words):
+        if not words:
+            return
+        entries = [
+            self.interfaces.setdefault(port, ({"name": None, "enabled": True}, []))
+            for port in expand_ports(words[0])
+        ]
+        self.context = lambda line: self._interface_line(entries, line)
+
+    def _interface_line(self, entries, line):
+        if line == "exit":
+            return
+        words = _split(line)
+        for interface, options in entries:
+            if words[0] == "name" and len(words) > 1:
+                interface["name"] = words[1]
+            elif line in ("disable", "enable"):
+                interface["enabled"] = line == "enable"
+            else:
+                options.append(line)
+
+    def _ntp(self, words):
+        if words[:1] == ["server"] and len(words) > 1:
+            self.ntp["servers"].append(words[1])
+        elif words == ["enable"]:
+            self.ntp["enabled"] = True
+        elif words and words[0] in ("unicast", "broadcast"):
+            self.ntp["mode"] = words[0]
+
+    def _timesync(self, words):
+        self.ntp["timesync"] = words[0] if words else None
+
+    def _snmp_server(self, words):
+        keyword, args = (words[0], words[1:]) if words else (None, [])
+        if keyword == "community" and args:
+            self.snmp["communities"][args[0]] = " ".join(args[1:]) or None
+        elif keyword == "host" and args:
+            self.snmp["hosts"].append(args[0])
+        elif keyword in ("contact", "location") and args:
+            self.snmp[keyword] = args[0]
+
+    def _spanning_tree(self, words):
+        if not words:
+            self.stp["enabled"] = True
+        elif words[0] == "force-version" and len(words) > 1:
+            self.stp["force_version"] = words[1]
+        elif words[0] == "mode" and len(words) > 1:
+            self.stp["mode"] = words[1]
+        elif words[0] == "priority" and len(words) > 1:
+            self.stp["priority"] = words[1]
+        elif PORT_SPEC.match(words[0]) and len(words) > 1:
+            setting = " ".join(words[1:])
+            for port in expand_ports(words[0]):
+                self.stp["ports"].setdefault(port, []).append(setting)
+        else:
+            self.stp["options"].append(" ".join(words))
+
+    def _trunk(self, words):
+        if len(words) < 2:
+            return
+        trunk = words[1].capitalize()
+        for port in expand_ports(words[0]):
+            self.trunks[port] = trunk
+
+    def _port_security(self, words):
+        if len(words) < 2 or not PORT_SPEC.match(words[0]):
+            return
+        pairs = words[1:]
+        settings = {}
+        while pairs:
+            keyword = pairs.pop(0)
+            settings[keyword] = pairs.pop(0) if pairs else None
+        for port in expand_ports(words[0]):
+            self.port_security.setdefault(port, {}).update(settings)
+
+
+def _split(line):
+    """Splits a configuration line into words, keeping quoted names whole"""
+    if '"' not in line:
+        return line.split()
+    try:
+        return shlex.split(line)
+    except ValueError:
+        return line.split()
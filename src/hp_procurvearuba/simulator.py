@@ -0,0 +1,1114 @@
+"""The simulator module runs simulated ProCurve switches behind a local SSH
+
+server, so the HP class can be tested and benchmarked without hardware
+
+A SimulatedSwitch generates the output of every command the HP class sends
+from a few settings: the number of ports, vlans, mac addresses and arp
+entries, the spanning tree mode, and the lldp neighbors linked to its last
+ports. A SimulatorServer serves each switch on its own local port through
+paramiko, with the banner, prompt, command echo and -- MORE -- paging of a
+ProCurve switch until no page is sent, and answers the questions of copy and
+boot commands as the switch asks them. Each command waits latency seconds
+before its output is sent and a transfer draws its progress bar over
+transfer_time seconds, so slow switches and networks can be reproduced on
+one machine.
+
+"""
+import random
+import socket
+import threading
+import time
+import zlib
+
+import paramiko
+
+from .stp import VLAN_COMMAND, compact_vlans, expand_vlans
+
+STP_MODES = ("RSTP", "MSTP", "STP-compatible", "RPVST", None)
+FORCE_VERSIONS = {
+    "RSTP": "rstp-operation",
+    "MSTP": "mstp",
+    "STP-compatible": "stp-compatible",
+}
+VLAN_PORTS_COMMAND = "show vlan ports "
+PAGE_LENGTH = 22
+MORE = "-- MORE --, next page: Space, next line: Enter, quit: Control-C"
+ERASE_LINE = "\x1b[2K\r"
+BANNER = """
+HP J9728A 2920-48G Switch
+Software revision WB.16.04.0016
+
+(C) Copyright 2018 Hewlett Packard Enterprise Development LP
+
+                   RESTRICTED RIGHTS LEGEND
+ Confidential computer software. Valid license from HPE required for
+ possession, use or copying.
+
+We'd like to keep you up to date about:
+  * Software feature updates
+  * New product announcements
+  * Special events
+
+Please register your products now at:  www.hpe.com/networking/register
+
+
+Press any key to continue
+"""
+FLASH_QUESTION = "The Secondary OS Image will be deleted, continue [y/n]? "
+FLASH_WRITTEN = "Validating and Writing System Software to the Filesystem ..."
+CONFIG_QUESTION = "Device will be rebooted, do you want to continue [y/n]? "
+BOOT_QUESTION = "System will be rebooted from {} image. Do you want to continue [y/n]? "
+LOGOUT_QUESTION = "Do you want to log out [y/n]? "
+SAVE_QUESTION = "Do you want to save current configuration [y/n/^C]? "
+FIRMWARE_SIZE = 24
+PROGRESS_STEPS = 4
+
+_host_key = None
+_host_key_lock = threading.Lock()
+
+
+def base_mac(hostname):
+    """Returns the base mac address of a simulated switch, derived from its
+    hostname so that its neighbors know it too"""
+    return f"288023-{zlib.crc32(hostname.encode('utf-8')) & 0xFFFFFF:06x}"
+
+
+def simulated_fleet(count, stp_modes=("RSTP",), prefix="SIM_", **kwargs):
+    """Returns a list of simulated switches linked in a chain, each switch to
+    the one before it on its last port and to the one after it on the port
+    before that.
+
+    Parameters
+    ----------
+    count : int
+        Number of switches.
+    stp_modes : tuple
+        The spanning tree modes of the switches, repeated along the chain.
+    prefix : str
+        The hostnames are the prefix followed by the position in the chain.
+    **kwargs :
+        Keyword arguments passed on to SimulatedSwitch, such as ports.
+    """
+    ports = kwargs.get("ports", 24)
+    last, before_last = str(ports), str(ports - 1)
+    hostnames = [f"{prefix}{number}" for number in range(1, count + 1)]
+    switches = []
+    for index, hostname in enumerate(hostnames):
+        neighbors = {}
+        if index > 0:
+            neighbors[last] = (hostnames[index - 1], before_last)
+        if index < count - 1:
+            neighbors[before_last] = (hostnames[index + 1], last)
+        switches.append(
+            SimulatedSwitch(
+                hostname,
+                stp_mode=stp_modes[index % len(stp_modes)],
+                neighbors=neighbors,
+                **kwargs,
+            )
+        )
+    return switches
+
+
+class SimulatedSwitch:
+    """Class SimulatedSwitch generates the command output of a ProCurve switch
+    from the sizes of its tables. The entries of its mac address and arp
+    tables are held in mac_table and arp_table as (mac, port, vlan, ip)
+    tuples."""
+
+    def __init__(
+        self,
+        hostname,
+        stp_mode="RSTP",
+        ports=24,
+        vlans=4,
+        macs=100,
+        arps=50,
+        neighbors=(),
+        latency=0.0,
+        transfer_time=0.0,
+        seed=0,
+        unsaved=False,
+    ):
+        """
+        Parameters
+        ----------
+        hostname : str
+            The hostname of the switch.
+        stp_mode : str
+            One of RSTP, MSTP, STP-compatible or RPVST, or None for a switch
+            with spanning tree disabled.
+        ports : int
+            Number of ports.
+        vlans : int
+            Number of vlans, counting the default vlan.
+        macs : int
+            Number of entries of the mac address table.
+        arps : int
+            Number of entries of the arp table, up to macs.
+        neighbors : list or dict
+            The hostnames of the lldp neighbors, or (hostname, port) tuples
+            naming the port of the neighbor, linked to the last ports of the
+            switch, the first neighbor to the last port. A dictionary keyed
+            on the local port places each neighbor on its port.
+        latency : int or float
+            Number of seconds the switch waits before answering a command.
+        transfer_time : int or float
+            Number of seconds a copy command takes.
+        seed : int
+            Seeds the random tables, the same seed giving the same tables.
+        unsaved : bool
+            Set to True for a switch with unsaved configuration changes, which
+            asks to save them before boot and copy startup-config commands
+            reboot it. Answering y saves them.
+        """
+        if stp_mode not in STP_MODES:
+            raise ValueError(f"stp_mode must be one of {STP_MODES}, not {stp_mode!r}")
+        self.hostname = hostname
+        self.stp_mode = stp_mode
+        self.latency = latency
+        self.transfer_time = transfer_time
+        self.unsaved = unsaved
+        self.mac = base_mac(hostname)
+        self.ports = [str(port) for port in range(1, ports + 1)]
+        self.vlans = [1] + [10 * number for number in range(1, vlans)]
+        if not isinstance(neighbors, dict):
+            neighbors = dict(zip(self.ports[::-1], neighbors))
+        self.uplinks = {}
+        for port, neighbor in neighbors.items():
+            if isinstance(neighbor, str):
+                neighbor = (neighbor, port)
+            self.uplinks[str(port)] = tuple(neighbor)
+        self._random = random.Random(f"{hostname}-{seed}")
+        self._ports = {port: self._port(port) for port in self.ports}
+        self.mac_table = self._mac_table(macs)
+        self.arp_table = self.mac_table[: min(arps, macs)]
+        self._outputs = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"SimulatedSwitch({self.hostname}, {self.stp_mode}, {len(self.ports)} ports)"
+
+    def output(self, command):
+        """Returns the output of a command, or the error of the switch for a
+        command it does not know"""
+        command = " ".join(command.split())
+        if command == "show interfaces":
+            return self._show_interfaces()
+        if command.startswith(VLAN_COMMAND):
+            return self._show_spanning_tree_vlans(command[len(VLAN_COMMAND) :])
+        if command.startswith(VLAN_PORTS_COMMAND):
+            return self._show_vlan_ports(command[len(VLAN_PORTS_COMMAND) :])
+        builder = COMMANDS.get(command)
+        if builder is None:
+            return f"Invalid input: {command.split()[0] if command else ''}"
+        with self._lock:
+            if command not in self._outputs:
+                self._outputs[command] = builder(self)
+            return self._outputs[command]
+
+    def outputs(self):
+        """Returns the output of every command the HP class sends, keyed on
+        the command, as recorded by a DeviceSnapshot, for a ReplayConnection
+        or save_captures()"""
+        outputs = {command: self.output(command) for command in COMMANDS}
+        outputs["show interfaces"] = self.output("show interfaces")
+        if self.stp_mode == "RPVST":
+            for vlan in self.vlans:
+                outputs[VLAN_COMMAND + str(vlan)] = self.output(
+                    VLAN_COMMAND + str(vlan)
+                )
+        for port in self.uplinks:
+            outputs[VLAN_PORTS_COMMAND + port] = self.output(VLAN_PORTS_COMMAND + port)
+        flash = f"\n{FLASH_QUESTION}y\n{_progress(PROGRESS_STEPS)}\n{FLASH_WRITTEN}"
+        save = f"\n{SAVE_QUESTION}y" if self.unsaved else ""
+        outputs.update(
+            {
+                "copy tftp flash": flash,
+                "copy sftp flash": flash,
+                "copy tftp startup-config": f"{save}\n{CONFIG_QUESTION}y",
+                "copy sftp startup-config": f"{save}\n{CONFIG_QUESTION}y",
+                "copy startup-config tftp": "\nTFTP download in progress.",
+                "copy startup-config sftp": "\nSFTP download in progress.",
+                "boot system flash": f"{save}\n{BOOT_QUESTION.format('secondary')}y",
+            }
+        )
+        return outputs
+
+    def port_vlan(self, port):
+        """Returns the untagged vlan of an edge port"""
+        return self.vlans[self.ports.index(port) % len(self.vlans)]
+
+    def _port(self, port):
+        """Returns the random state of a port"""
+        rng = self._random
+        uplink = port in self.uplinks
+        enabled = uplink or rng.random() > 0.05
+        return {
+            "enabled": enabled,
+            "up": enabled and (uplink or rng.random() < 0.7),
+            "alert": not uplink and rng.random() < 0.05,
+            "static": not uplink and rng.random() < 0.2,
+            "poe": not uplink and rng.random() < 0.8,
+            "counters": [rng.randrange(2**32), rng.randrange(2**32), 0, 0],
+            "rates": [
+                rng.randrange(10**7),
+                rng.randrange(10**4),
+                rng.randrange(20) if rng.random() < 0.1 else 0,
+                rng.randrange(20) if rng.random() < 0.1 else 0,
+            ],
+        }
+
+    def _mac_table(self, count):
+        """Returns the (mac, port, vlan, ip) entries of the mac address table,
+        a third learnt on the uplinks when the switch has neighbors"""
+        rng = self._random
+        edge = [
+            port
+            for port in self.ports
+            if port not in self.uplinks and self._ports[port]["up"]
+        ]
+        uplinks = list(self.uplinks)
+        entries = []
+        for number in range(count):
+            mac = f"{rng.randrange(16**6):06x}-{number:06x}"
+            if uplinks and (not edge or number % 3 == 0):
+                port = uplinks[number % len(uplinks)]
+                vlan = self.vlans[number % len(self.vlans)]
+            elif edge:
+                port = edge[number % len(edge)]
+                vlan = self.port_vlan(port)
+            else:
+                break
+            ip = f"10.{self.vlans.index(vlan)}.{number // 250 % 250}.{number % 250 + 1}"
+            entries.append((mac, port, vlan, ip))
+        return entries
+
+    def _port_type(self, port):
+        return "SFP+SR" if port in self.uplinks else "100/1000T"
+
+    def _show_int_brief(self):
+        lines = [
+            "",
+            " Status and Counters - Port Status",
+            "",
+            "                          | Intrusion                           MDI   Flow  Bcast",
+            "  Port         Type       | Alert     Enabled Status Mode       Mode  Ctrl  Limit",
+            "  ------------ ---------  + --------- ------- ------ ---------- ----- ----- ------",
+        ]
+        for port in self.ports:
+            state = self._ports[port]
+            uplink = port in self.uplinks
+            mdi = "NA" if uplink else ("MDIX" if state["up"] else "Auto")
+            lines.append(
+                f"  {port:<12} {self._port_type(port):<10} | "
+                f"{_yes(state['alert']):<9} {_yes(state['enabled']):<7} "
+                f"{'Up' if state['up'] else 'Down':<6} "
+                f"{'10GigFD' if uplink else '1000FDx':<10} {mdi:<5} off   0"
+            )
+        return "\n".join(lines)
+
+    def _show_interfaces(self):
+        """Returns show interfaces, the counters of each port increasing by
+        its rate at every call and wrapping at 32 bits"""
+        lines = [
+            "",
+            " Status and Counters - Port Counters",
+            "",
+            "                                                                 Flow Bcast",
+            "  Port         Total Bytes    Total Frames   Errors Rx Drops Tx  Ctrl Limit",
+            "  ------------ -------------- -------------- --------- --------- ---- -----",
+        ]
+        with self._lock:
+            for port in self.ports:
+                state = self._ports[port]
+                counters = state["counters"]
+                if state["up"]:
+                    for index, rate in enumerate(state["rates"]):
+                        counters[index] = (counters[index] + rate) % 2**32
+                lines.append(
+                    f"  {port:<12} {counters[0]:<14,} {counters[1]:<14,} "
+                    f"{counters[2]:<9,} {counters[3]:<9,} off  0"
+                )
+        return "\n".join(lines)
+
+    def _show_vlans(self):
+        lines = [
+            "",
+            " Status and Counters - VLAN Information",
+            "",
+            "  Maximum VLANs to support : 256",
+            "  Primary VLAN : DEFAULT_VLAN",
+            "  Management VLAN :",
+            "",
+            "  VLAN ID Name                             | Status     Voice Jumbo",
+            "  ------- -------------------------------- + ---------- ----- -----",
+        ]
+        for vlan in self.vlans:
+            lines.append(
+                f"  {vlan:<7} {self._vlan_name(vlan):<32} | Port-based "
+                f"{_yes(self._voice(vlan)):<5} {_yes(self._jumbo(vlan))}"
+            )
+        return "\n".join(lines)
+
+    def _show_vlan_ports(self, port):
+        lines = [
+            "",
+            f" Status and Counters - VLAN Information - for ports {port}",
+            "",
+            "  VLAN ID Name                 | Status     Voice Jumbo",
+            "  ------- -------------------- + ---------- ----- -----",
+        ]
+        vlans = self.vlans if port in self.uplinks else [self.port_vlan(port)]
+        for vlan in vlans:
+            lines.append(
+                f"  {vlan:<7} {self._vlan_name(vlan):<20} | Port-based "
+                f"{_yes(self._voice(vlan)):<5} {_yes(self._jumbo(vlan))}"
+            )
+        return "\n".join(lines)
+
+    def _show_mac_address(self):
+        lines = [
+            "",
+            " Status and Counters - Port Address Table",
+            "",
+            "  MAC Address   Port   VLAN",
+            "  ------------- ------ ----",
+        ]
+        lines += [f"  {mac} {port:<6} {vlan}" for mac, port, vlan, _ in self.mac_table]
+        return "\n".join(lines)
+
+    def _show_arp(self):
+        lines = [
+            "",
+            " IP ARP table",
+            "",
+            "  IP Address       MAC Address       Type    Port",
+            "  ---------------  ----------------- ------- ----",
+        ]
+        lines += [
+            f"  {ip:<16} {mac:<17} dynamic {port}"
+            for mac, port, _, ip in self.arp_table
+        ]
+        return "\n".join(lines)
+
+    def _show_lldp(self):
+        lines = [
+            "",
+            " LLDP Remote Devices Information",
+            "",
+            "  LocalPort | ChassisId                 PortId PortDescr SysName",
+            "  --------- + ------------------------- ------ --------- ----------------------",
+        ]
+        for port, (neighbor, neighbor_port) in sorted(
+            self.uplinks.items(), key=lambda item: int(item[0])
+        ):
+            lines.append(
+                f"  {port:<9} | {base_mac(neighbor):<25} {neighbor_port:<6} "
+                f"{neighbor_port:<9} {neighbor}"
+            )
+        return "\n".join(lines)
+
+    def _show_port_security(self):
+        lines = [
+            "",
+            " Port Security",
+            "",
+            "  Port Learn Mode  | Action                  Eavesdrop Prevention",
+            "  ---- ----------- + ----------------------- --------------------",
+        ]
+        for port in self.ports:
+            static = self._ports[port]["static"]
+            lines.append(
+                f"  {port:<4} {'Static' if static else 'Continuous':<11} | "
+                f"{'Send Alarm' if static else 'None':<23} Enabled"
+            )
+        return "\n".join(lines)
+
+    def _show_poe_brief(self):
+        lines = [
+            "",
+            " Status and Counters - Port Power Status",
+            "",
+            "  System Power Status      : No redundancy",
+            "  PoE+ Power Status        : No redundancy",
+            "",
+            "  Available: 370 W  Used: 24 W  Remaining: 346 W",
+            "",
+            f"  Module 1-{len(self.ports)} Power",
+            "  Available: 370 W  Used: 24 W  Remaining: 346 W",
+            "",
+            "  POE    Power  Power    Alloc  Alloc  Actual Configured  Detection   "
+            "Power  Pre-std  Dual",
+            "  Port   Enable Priority By     Power  Power  Type        Status      "
+            "Class  Detect   Port",
+            "  ----   ------ -------- ------ ------ ------ ----------- ----------- "
+            "------ -------- ----",
+        ]
+        for port in self.ports:
+            if port in self.uplinks:
+                continue
+            state = self._ports[port]
+            if not state["poe"]:
+                status, alloc, actual, power_class = "Disabled", "0 W", "0.0 W", "0"
+            elif state["up"]:
+                status, alloc, actual, power_class = "Delivering", "17 W", "12.0 W", "2"
+            else:
+                status, alloc, actual, power_class = "Searching", "17 W", "0.0 W", "0"
+            lines.append(
+                f"  {port:<6} {_yes(state['poe']):<6} low      usage  {alloc:<6} "
+                f"{actual:<6} {'':<11} {status:<11} {power_class:<6} off      No"
+            )
+        return "\n".join(lines)
+
+    def _show_poe(self):
+        return "\n".join(
+            [
+                "",
+                " Status and Counters - System Power Status",
+                "",
+                "  System Power Status      : No redundancy",
+                "  PoE+ Connected           : No",
+                "",
+                "  Chassis power-over-ethernet:",
+                "",
+                "   Total Available Power  :  370 W",
+                "   Total Failover Power   :    0 W",
+                "   Total Redundancy Power :    0 W",
+                "   Total used Power       :   24 W +/- 6W",
+                "   Total Remaining Power  :  346 W",
+                "",
+                "  Internal Power",
+                "      1                   :  370 W/POE+ Connected",
+            ]
+        )
+
+    def _show_system(self):
+        serial = f"SG{zlib.crc32(self.hostname.encode('utf-8')):08X}"
+        return "\n".join(
+            [
+                "",
+                " Status and Counters - General System Information",
+                "",
+                f"  System Name        : {self.hostname}",
+                "  System Contact     :",
+                "  System Location    :",
+                "",
+                "  MAC Age Time (sec) : 300",
+                "",
+                "  Time Zone          : 0",
+                "  Daylight Time Rule : None",
+                "",
+                f"  Software revision  : WB.16.04.0016        Base MAC Addr      : {self.mac}",
+                f"  ROM Version        : WB.16.03.0003        Serial Number      : {serial}",
+                "",
+                "  Up Time            : 23 days              Memory   - Total   : 340,183,040",
+                "  CPU Util (%)       : 0                               Free    : 230,694,512",
+            ]
+        )
+
+    def _show_version(self):
+        return "\n".join(
+            [
+                "",
+                "Image stamp:    /ws/swbuildm/rel_ukiah_qaoff/code/build/"
+                "bom(swbuildm_rel_ukiah_qaoff_rel_ukiah)",
+                "                Jan 24 2019 12:41:46",
+                "                WB.16.04.0016",
+                "                1067",
+                "Boot Image:     Primary",
+                "",
+                "Boot ROM Version:    WB.16.03.0003",
+                "Active Boot ROM:     Primary",
+            ]
+        )
+
+    def _show_ntp_status(self):
+        return "\n".join(
+            [
+                "",
+                " NTP Status Information",
+                "",
+                "  NTP Status             : Enabled        NTP Mode        : Unicast",
+                "  Synchronization Status : Synchronized   Peer Dispersion : 0.00000 sec",
+                "  Stratum Number         : 3              Leap Direction  : 0",
+                "  Reference Assoc Id     : 1              Clock Offset    : 0.00012 sec",
+                "  Reference              : 10.0.0.1       Root Delay      : 0.00100 sec",
+            ]
+        )
+
+    def _show_run(self):
+        lines = [
+            "Running configuration:",
+            "",
+            "; J9728A Configuration Editor; Created on release #WB.16.04.0016",
+            f'hostname "{self.hostname}"',
+            "module 1 type j9728a",
+            "timesync ntp",
+            "ntp unicast",
+            "ntp server 10.0.0.1 iburst",
+            "ntp server 10.0.0.2 iburst",
+            "ntp enable",
+        ]
+        for port, (neighbor, _) in self.uplinks.items():
+            lines += [f"interface {port}", f'   name "uplink-{neighbor}"', "   exit"]
+        for port in self.ports:
+            if not self._ports[port]["enabled"]:
+                lines += [f"interface {port}", "   disable", "   exit"]
+        uplinks = [int(port) for port in self.uplinks]
+        for vlan in self.vlans:
+            untagged = [
+                int(port)
+                for port in self.ports
+                if port not in self.uplinks and self.port_vlan(port) == vlan
+            ]
+            if vlan == 1:
+                untagged += uplinks
+            lines += [f"vlan {vlan}", f'   name "{self._vlan_name(vlan)}"']
+            if untagged:
+                lines.append(f"   untagged {compact_vlans(untagged)}")
+            if vlan != 1 and uplinks:
+                lines.append(f"   tagged {compact_vlans(uplinks)}")
+            if self._voice(vlan):
+                lines.append("   voice")
+            if self._jumbo(vlan):
+                lines.append("   jumbo")
+            lines.append("   exit")
+        if self.stp_mode == "RPVST":
+            lines.append("spanning-tree mode rapid-pvst")
+        elif self.stp_mode is not None:
+            lines += [
+                "spanning-tree",
+                f"spanning-tree force-version {FORCE_VERSIONS[self.stp_mode]}",
+            ]
+        for port in self.ports:
+            if self._ports[port]["static"]:
+                lines.append(
+                    f"port-security {port} learn-mode static address-limit 1 "
+                    "action send-alarm"
+                )
+        return "\n".join(lines)
+
+    def _show_spanning_tree(self):
+        if self.stp_mode == "RPVST":
+            lines = self._rpvst_header()
+            lines += [
+                "  Root Guard Ports     :",
+                "  Loop Guard Ports     :",
+                "  TCN Guard Ports      :",
+                "  BPDU Protected Ports :",
+                "  BPDU Filtered Ports  :",
+                f"  Auto Edge Ports      : 1-{len(self.ports)}",
+                "  Admin Edge Ports     :",
+                "",
+                "  VLAN    Root Mac       Root      Root          Root                   Hello",
+                "  ID      Address        Priority  Path-Cost     Port                   Time",
+                "  ------- -------------  --------- ------------  ---------------------  -----",
+            ]
+            root_mac, root_port, cost = self._root()
+            for vlan in self.vlans:
+                lines.append(
+                    f"  {vlan:<7} {root_mac:<14} {'32,768':<9} {cost:<13} "
+                    f"{root_port or 'This switch is root':<22} 2"
+                )
+            return "\n".join(lines)
+        return self._mst()
+
+    def _show_spanning_tree_vlans(self, vlans):
+        """Returns show spanning-tree vlan for one vlan or a list of vlans"""
+        if self.stp_mode != "RPVST":
+            return "RPVST is not enabled."
+        try:
+            vlans = [vlan for vlan in expand_vlans(vlans) if vlan in self.vlans]
+        except ValueError:
+            return f"Invalid input: {vlans}"
+        lines = self._rpvst_header()
+        root_mac, root_port, cost = self._root()
+        for vlan in vlans:
+            lines += [
+                f"  VLAN ID   : {vlan}",
+                "  RPVST Enabled : Enabled",
+                "",
+                f"  Root Mac Address : {root_mac}",
+                "  Root Priority    : 32,768",
+                f"  Root Path Cost   : {cost}",
+                f"  Root Port        : {root_port or 'This switch is root'}",
+                "  Operational Hello Time (secs) :  2",
+                "  Topology Change Count         :  3",
+                "  Time Since Last Change        :  5 mins",
+                "",
+                "                                                        Designated",
+                "  Port  Type      Cost      Priority Role       State      Bridge",
+                "  ----- --------- --------- -------- ---------- ---------- -------------",
+            ]
+            for port in self.ports:
+                if port not in self.uplinks and self.port_vlan(port) != vlan:
+                    continue
+                role, state, bridge = self._stp_port(port)
+                if state == "Disabled":
+                    lines.append(
+                        f"  {port:<5} {self._port_type(port):<9} Auto      128      "
+                        "Disabled   Disabled"
+                    )
+                else:
+                    lines.append(
+                        f"  {port:<5} {self._port_type(port):<9} {self._cost(port):<9} "
+                        f"128      {role:<10} {state:<10} {bridge}"
+                    )
+            lines.append("")
+        return "\n".join(lines)
+
+    def _rpvst_header(self):
+        return [
+            "",
+            " Spanning Tree Information",
+            "",
+            "  STP Enabled   [No] : Yes",
+            "  Mode               : RPVST",
+            "  Extended System ID : Enabled",
+            "  Ignore PVID Inconsistency : Disabled",
+            f"  Switch MAC Address : {self.mac}",
+            "",
+        ]
+
+    def _mst(self):
+        root_mac, root_port, cost = self._root()
+        force_version = {
+            "MSTP": "MSTP-operation",
+            "STP-compatible": "STP-compatible",
+        }.get(self.stp_mode, "RSTP-operation")
+        lines = [
+            "",
+            " Multiple Spanning Tree (MST) Information",
+            "",
+            f"  STP Enabled   : {_yes(self.stp_mode is not None)}",
+            f"  Force Version : {force_version}",
+            "  IST Mapped VLANs : 1-4094",
+            f"  Switch MAC Address : {self.mac}",
+            "  Switch Priority    : 32768",
+            "  Max Age  : 20",
+            "  Max Hops : 20",
+            "  Forward Delay : 15",
+            "",
+            "  Topology Change Count  : 4",
+            "  Time Since Last Change : 2 hours",
+            "",
+            f"  CST Root MAC Address : {root_mac}",
+            "  CST Root Priority    : 32768",
+            f"  CST Root Path Cost   : {cost}",
+            f"  CST Root Port        : {root_port or 'This switch is root'}",
+            "",
+            f"  IST Regional Root MAC Address : {root_mac}",
+            "  IST Regional Root Priority    : 32768",
+            f"  IST Regional Root Path Cost   : {cost}",
+            "  IST Remaining Hops            : 20",
+            "",
+            "  Root Guard Ports     :",
+            "  Loop Guard Ports     :",
+            "  TCN Guard Ports      :",
+            "  BPDU Protected Ports :",
+            "  BPDU Filtered Ports  :",
+            "  PVST Protected Ports :",
+            "  PVST Filtered Ports  :",
+            "",
+            "  Port  Type      | Cost      Priority State      | Designated Bridge "
+            "Hello Time PtP Edge",
+            "  ----- --------- + --------- -------- ---------- + ----------------- ----- --- ----",
+        ]
+        for port in self.ports:
+            _, state, bridge = self._stp_port(port)
+            if state == "Disabled":
+                lines.append(
+                    f"  {port:<5} {self._port_type(port):<9} | Auto      128      "
+                    "Disabled   |"
+                )
+            else:
+                lines.append(
+                    f"  {port:<5} {self._port_type(port):<9} | {self._cost(port):<9} "
+                    f"128      {state:<10} | {bridge:<17} 2     Yes "
+                    f"{_yes(port not in self.uplinks)}"
+                )
+        return "\n".join(lines + [""])
+
+    def _root(self):
+        """Returns the root mac address, root port and root path cost. The
+        neighbor with the lowest hostname, if lower than the hostname of the
+        switch, is taken as the root."""
+        lower = sorted(
+            (neighbor, port)
+            for port, (neighbor, _) in self.uplinks.items()
+            if neighbor < self.hostname
+        )
+        if not lower:
+            return self.mac, None, 0
+        neighbor, port = lower[0]
+        return base_mac(neighbor), port, self._cost(port)
+
+    def _stp_port(self, port):
+        """Returns the role, state and designated bridge of a port. Uplinks
+        to lower hostnames other than the root port are blocking."""
+        if not self._ports[port]["up"]:
+            return "Disabled", "Disabled", ""
+        if port not in self.uplinks:
+            return "Designated", "Forwarding", self.mac
+        neighbor = self.uplinks[port][0]
+        if neighbor > self.hostname:
+            return "Designated", "Forwarding", self.mac
+        if port == self._root()[1]:
+            return "Root", "Forwarding", base_mac(neighbor)
+        return "Alternate", "Blocking", base_mac(neighbor)
+
+    def _cost(self, port):
+        return "2000" if port in self.uplinks else "20000"
+
+    def _vlan_name(self, vlan):
+        return "DEFAULT_VLAN" if vlan == 1 else f"VLAN{vlan}"
+
+    def _voice(self, vlan):
+        return len(self.vlans) > 1 and vlan == self.vlans[1]
+
+    def _jumbo(self, vlan):
+        return len(self.vlans) > 2 and vlan == self.vlans[2]
+
+
+COMMANDS = {
+    "show spanning-tree": SimulatedSwitch._show_spanning_tree,
+    "show int brief": SimulatedSwitch._show_int_brief,
+    "show interfaces brief": SimulatedSwitch._show_int_brief,
+    "show vlans": SimulatedSwitch._show_vlans,
+    "show mac-address": SimulatedSwitch._show_mac_address,
+    "show arp": SimulatedSwitch._show_arp,
+    "show lldp info remote-device": SimulatedSwitch._show_lldp,
+    "show port-security": SimulatedSwitch._show_port_security,
+    "show power-over-ethernet brief": SimulatedSwitch._show_poe_brief,
+    "show power-over-ethernet": SimulatedSwitch._show_poe,
+    "show system": SimulatedSwitch._show_system,
+    "show version": SimulatedSwitch._show_version,
+    "show run": SimulatedSwitch._show_run,
+    "show ntp status": SimulatedSwitch._show_ntp_status,
+}
+
+
+class SimulatorServer:
+    """Class SimulatorServer serves simulated switches over SSH, each on its
+    own local port"""
+
+    def __init__(
+        self, switches, host="127.0.0.1", username="manager", password="manager"
+    ):
+        """
+        Parameters
+        ----------
+        switches : list of SimulatedSwitch
+            The switches to serve.
+        host : str
+            The address to listen on, local only by default.
+        username : str
+            The username the switches accept.
+        password : str
+            The password the switches accept.
+        """
+        self.switches = list(switches)
+        self.host = host
+        self.username = username
+        self.password = password
+        self.ports = {}
+        self._sockets = []
+        self._transports = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def __repr__(self):
+        return f"SimulatorServer({len(self.switches)} switches)"
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        """Listens on a free local port for each switch and returns the
+        server"""
+        self._stop.clear()
+        for switch in self.switches:
+            listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            listener.bind((self.host, 0))
+            listener.listen(16)
+            listener.settimeout(0.1)
+            self._sockets.append(listener)
+            self.ports[switch.hostname] = listener.getsockname()[1]
+            threading.Thread(
+                target=self._accept,
+                args=(listener, switch),
+                name=f"hp-simulator-{switch.hostname}",
+                daemon=True,
+            ).start()
+        return self
+
+    def devices(self, **kwargs):
+        """Returns the inventory of the switches, a device dictionary for HP
+        or HPFleet per switch.
+
+        Parameters
+        ----------
+        **kwargs :
+            Extra keys of every device dictionary, such as cache_ttl.
+        """
+        return [
+            dict(
+                hostname=switch.hostname,
+                host=self.host,
+                port=self.ports[switch.hostname],
+                username=self.username,
+                password=self.password,
+                **kwargs,
+            )
+            for switch in self.switches
+        ]
+
+    def stop(self):
+        """Stops listening and closes the open sessions"""
+        self._stop.set()
+        for listener in self._sockets:
+            listener.close()
+        with self._lock:
+            transports, self._transports = self._transports, []
+        for transport in transports:
+            transport.close()
+        self._sockets = []
+
+    def _accept(self, listener, switch):
+        while not self._stop.is_set():
+            try:
+                client, _ = listener.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            threading.Thread(
+                target=self._serve, args=(client, switch), daemon=True
+            ).start()
+
+    def _serve(self, client, switch):
+        """Runs the SSH session of one client"""
+        transport = paramiko.Transport(client)
+        with self._lock:
+            self._transports.append(transport)
+        try:
+            transport.add_server_key(_server_key())
+            interface = _ServerInterface(self.username, self.password)
+            transport.start_server(server=interface)
+            channel = transport.accept(20)
+            if channel is None or not interface.shell.wait(20):
+                return
+            try:
+                _Session(switch, channel).run()
+            except (EOFError, OSError):
+                pass
+            finally:
+                channel.close()
+        except (paramiko.SSHException, EOFError, OSError):
+            pass
+        finally:
+            transport.close()
+            with self._lock:
+                if transport in self._transports:
+                    self._transports.remove(transport)
+
+
+class _ServerInterface(paramiko.ServerInterface):
+    """Accepts a password login and an interactive shell"""
+
+    def __init__(self, username, password):
+        self.username = username
+        self.password = password
+        self.shell = threading.Event()
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_auth_password(self, username, password):
+        if (username, password) == (self.username, self.password):
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_channel_request(self, kind, chanid):
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_pty_request(self, *args):
+        return True
+
+    def check_channel_shell_request(self, channel):
+        self.shell.set()
+        return True
+
+
+class _Session:
+    """Runs the command line of a simulated switch on an SSH channel"""
+
+    def __init__(self, switch, channel):
+        self.switch = switch
+        self.channel = channel
+        self.paging = True
+        self._received = ""
+        self._skip_newline = False
+
+    def run(self):
+        self._write(BANNER)
+        self._read_key()
+        self._write("\n" + self._prompt())
+        while True:
+            command = " ".join(self._read_line().split())
+            self._write("\n")
+            if command in ("logout", "exit"):
+                self._write("\n" + LOGOUT_QUESTION)
+                if self._read_key() in "yY":
+                    return
+            elif command == "no page":
+                self.paging = False
+            elif command == "page":
+                self.paging = True
+            elif command.startswith(("copy ", "boot ")):
+                if not self._transfer(command):
+                    return
+            elif command and not command.startswith(("terminal ", "enable")):
+                time.sleep(self.switch.latency)
+                self._page(self.switch.output(command))
+            self._write(self._prompt())
+
+    def _transfer(self, command):
+        """Runs the dialog of a copy or boot command, returning False if the
+        switch reboots"""
+        time.sleep(self.switch.latency)
+        words = command.split()
+        if words[0] == "boot":
+            image = words[-1] if len(words) > 3 else "primary"
+            return not (self._save() and self._confirm(BOOT_QUESTION.format(image)))
+        if len(words) > 3 and "@" in words[3]:
+            self._write("password: ")
+            self._read_line()
+            self._write("\n")
+        if words[2] == "startup-config":
+            return not (self._save() and self._confirm(CONFIG_QUESTION))
+        if words[2] == "flash":
+            if not self._confirm(FLASH_QUESTION):
+                return True
+            for step in range(1, PROGRESS_STEPS + 1):
+                time.sleep(self.switch.transfer_time / PROGRESS_STEPS)
+                self._write("\r" + _progress(step))
+            self._write(f"\n{FLASH_WRITTEN}\n")
+            return True
+        self._write(f"{words[2].upper()} download in progress.\n")
+        time.sleep(self.switch.transfer_time)
+        return True
+
+    def _confirm(self, question):
+        """Asks a question and returns True if it is answered with y"""
+        return self._ask(question) in "yY"
+
+    def _save(self):
+        """Asks to save unsaved configuration changes before a reboot,
+        returning False if the command is cancelled with ^C"""
+        if not self.switch.unsaved:
+            return True
+        answer = self._ask(SAVE_QUESTION)
+        if answer in "yY":
+            self.switch.unsaved = False
+        return answer != "\x03"
+
+    def _ask(self, question):
+        """Asks a question and returns the key pressed to answer it"""
+        self._write("\n" + question)
+        answer = self._read_key()
+        self._write(answer + "\n")
+        return answer
+
+    def _page(self, output):
+        """Writes the output of a command a page at a time while paging is on,
+        waiting for a key at every -- MORE --"""
+        lines = output.split("\n")
+        if not self.paging:
+            self._write(output + "\n")
+            return
+        shown = 0
+        step = PAGE_LENGTH
+        while shown < len(lines):
+            self._write("\n".join(lines[shown : shown + step]) + "\n")
+            shown += step
+            if shown >= len(lines):
+                return
+            self._write(MORE)
+            key = self._read_key()
+            self._write(ERASE_LINE)
+            if key in "qQ\x03":
+                return
+            step = 1 if key in "\r\n" else PAGE_LENGTH
+
+    def _prompt(self):
+        return f"{self.switch.hostname}# "
+
+    def _write(self, text):
+        self.channel.sendall(text.replace("\n", "\r\n").encode("utf-8"))
+
+    def _read(self):
+        """Reads more of the input of the client"""
+        data = self.channel.recv(4096)
+        if not data:
+            raise EOFError("the client closed the session")
+        self._received += data.decode("utf-8", "replace")
+        if self._skip_newline:
+            self._skip_newline = False
+            self._received = self._received.lstrip("\r\n")
+
+    def _read_key(self):
+        """Returns one key pressed by the client, skipping the return sent
+        after it"""
+        while not self._received:
+            self._read()
+        key, self._received = self._received[0], self._received[1:]
+        if self._received:
+            self._received = self._received.lstrip("\r\n")
+        else:
+            self._skip_newline = True
+        return key
+
+    def _read_line(self):
+        """Returns a line typed by the client, echoing it back"""
+        while "\r" not in self._received and "\n" not in self._received:
+            self._read()
+        end = min(
+            i for i in (self._received.find("\r"), self._received.find("\n")) if i >= 0
+        )
+        line = self._received[:end]
+        if self._received[end : end + 2] == "\r\n":
+            end += 1
+        elif self._received[end] == "\r" and end + 1 == len(self._received):
+            self._skip_newline = True
+        self._received = self._received[end + 1 :]
+        self._write(line)
+        return line
+
+
+def _progress(step):
+    """Returns the progress bar of a firmware transfer at a step"""
+    done = FIRMWARE_SIZE * step // PROGRESS_STEPS
+    bar = "=" * (25 * step // PROGRESS_STEPS)
+    percent = 100 * step // PROGRESS_STEPS
+    return f" 00:00:{step:02d} |{bar:<25}| {percent}%   {done}M/{FIRMWARE_SIZE}M"
+
+
+def _server_key():
+    """Returns the host key of the simulated switches, generated once"""
+    global _host_key
+    with _host_key_lock:
+        if _host_key is None:
+            _host_key = paramiko.ECDSAKey.generate()
+        return _host_key
+
+
+def _yes(value):
+    return "Yes" if value else "No"
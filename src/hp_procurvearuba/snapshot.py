@@ -0,0 +1,150 @@
+"""The snapshot module consists of a class DeviceSnapshot which holds the output
+
+of every show command used by the HP class, collected from a switch in one pass
+
+A DeviceSnapshot is an HP object whose commands are answered from the
+collected output, so every find_* method can be run against it without any
+further SSH traffic. Snapshots can be saved to and loaded from json files,
+compressed with gzip when the file name ends in .gz.
+
+"""
+from datetime import datetime, timezone
+import json
+import re
+
+from .procurvearuba import HP
+from .replay import ReplayConnection, open_recording, save_captures
+from .stp import VLAN_COMMAND, split_vlans, vlan_commands
+from .templates import rows
+
+SNAPSHOT_COMMANDS = (
+    "show spanning-tree",
+    "show int brief",
+    "show interfaces",
+    "show vlans",
+    "show mac-address",
+    "show arp",
+    "show lldp info remote-device",
+    "show port-security",
+    "show power-over-ethernet brief",
+    "show power-over-ethernet",
+    "show system",
+    "show version",
+    "show run",
+    "show ntp status",
+)
+
+RPVST_MODE = re.compile(r"^\s+Mode\s+:\s+RPVST", flags=re.M)
+
+
+class DeviceSnapshot(HP):
+    """Class DeviceSnapshot runs the find_* methods of the HP class against
+    the output collected from a switch"""
+
+    def __init__(self, hostname, outputs, taken_at=None, probe=None):
+        """
+        Parameters
+        ----------
+        hostname : str
+            The hostname of the device.
+        outputs : dict
+            The raw output of each collected command, keyed on the command.
+        taken_at : str
+            The ISO 8601 time the snapshot was taken, defaults to now.
+        probe : Probe
+            The change probe of the switch taken with the snapshot, see the
+            probe module.
+        """
+        super().__init__(
+            hostname,
+            cache_ttl=None,
+            connection=ReplayConnection(hostname, outputs),
+        )
+        self.outputs = outputs
+        self.probe = probe
+        self.taken_at = taken_at or datetime.now(timezone.utc).isoformat(
+            timespec="seconds"
+        )
+
+    def __repr__(self):
+        return f"DeviceSnapshot({self.hostname}, {self.taken_at})"
+
+    @classmethod
+    def collect(cls, hp_obj, commands=SNAPSHOT_COMMANDS):
+        """Collects the output of the commands from a switch.
+
+        The per-vlan spanning tree output of every vlan is collected when the
+        switch runs rpvst, read with one show spanning-tree vlan command for
+        a range of vlans and kept per vlan.
+
+        Parameters
+        ----------
+        hp_obj : HP
+            The HP object of the switch.
+        commands : tuple of str
+            The commands to collect.
+        """
+        outputs = {command: hp_obj.send_command(command) for command in commands}
+        if RPVST_MODE.search(outputs.get("show spanning-tree", "")):
+            vlans = hp_obj.send_command("show vlans", use_textfsm=True)
+            for command in vlan_commands(vlan["vlan_id"] for vlan in rows(vlans)):
+                for vlan, lines in split_vlans(hp_obj.send_command(command)):
+                    outputs[VLAN_COMMAND + str(vlan)] = "\n".join(lines)
+        return cls(hp_obj.hostname, outputs)
+
+    def to_dict(self):
+        """Returns the snapshot as a json serializable dictionary"""
+        return {
+            "hostname": self.hostname,
+            "taken_at": self.taken_at,
+            "probe": self.probe._asdict() if self.probe else None,
+            "outputs": self.outputs,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Creates a DeviceSnapshot from a dictionary returned by to_dict()"""
+        from .probe import Probe
+
+        probe = data.get("probe")
+        return cls(
+            data["hostname"],
+            data["outputs"],
+            data.get("taken_at"),
+            Probe(**probe) if probe else None,
+        )
+
+    def save(self, path):
+        """Saves the snapshot to a json file, gzip compressed if the path
+        ends in .gz
+
+        Parameters
+        ----------
+        path : str
+            The file to write the snapshot to.
+        """
+        with open_recording(path, "wt") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path):
+        """Loads a snapshot saved with save()
+
+        Parameters
+        ----------
+        path : str
+            The file to read the snapshot from.
+        """
+        with open_recording(path, "rt") as f:
+            return cls.from_dict(json.load(f))
+
+    def save_captures(self, path):
+        """Writes the snapshot to a directory of capture files which can be
+        replayed with HP.from_captures()
+
+        Parameters
+        ----------
+        path : str
+            The directory to write the capture files to.
+        """
+        save_captures(self.outputs, path)
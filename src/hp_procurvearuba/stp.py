@@ -0,0 +1,217 @@
+"""The stp module parses the output of show spanning-tree into a SpanningTree
+
+model in a single pass over its lines
+
+The global output of every spanning tree mode and the per-vlan output of
+show spanning-tree vlan <vlan> are read into the same model, which holds the
+mode, enabled state, root status, switch mac address and port table of the
+switch. The output of show spanning-tree vlan for a list of vlans, such as
+1-10,20, is split into one model per vlan, so the state of many rpvst vlans
+is read with one command. All patterns are compiled once, when the module is
+imported.
+
+"""
+from collections import namedtuple
+import re
+
+from .records import StpPort
+
+FIELD = re.compile(r"^\s+(?P<name>[A-Z][^:\[]*?)\s+(?:\[No\]\s+)?:\s*(?P<value>.*)$")
+PORT_HEADER = re.compile(r"^\s+Port\s+Type\s")
+RULE = re.compile(r"^\s+-{3,}")
+VLAN_ID = re.compile(r"^\s+VLAN ID\s+:\s*(?P<vlan>\d+)")
+VLAN_COMMAND = "show spanning-tree vlan "
+MAX_COMMAND_LENGTH = 200
+ROOT = "This switch is root"
+
+STP_STATES = frozenset(
+    ["Forwarding", "Blocking", "Disabled", "Learning", "Listening", "Discarding"]
+)
+STP_ROLES = frozenset(
+    ["Root", "Designated", "Alternate", "Backup", "Disabled", "Master"]
+)
+FORCE_VERSION_MODES = ("MSTP", "RSTP", "STP-compatible")
+
+SpanningTree = namedtuple(
+    "SpanningTree",
+    ["hostname", "vlan", "mode", "enabled", "is_root", "switch_mac", "ports"],
+)
+SpanningTree.__doc__ = """The spanning tree state of a switch, or of one vlan"""
+
+
+def parse_spanning_tree(lines, hostname=None, vlan=None):
+    """Returns the SpanningTree model of show spanning-tree output.
+
+    Parameters
+    ----------
+    lines : str or iterable of str
+        The output of show spanning-tree or show spanning-tree vlan <vlan>,
+        as one string or line by line.
+    hostname : str
+        The hostname of the switch, recorded in the port records.
+    vlan : int
+        The vlan of show spanning-tree vlan <vlan> output.
+    """
+    if isinstance(lines, str):
+        lines = lines.splitlines()
+    fields = {}
+    ports = []
+    is_root = False
+    table = None
+    for line in lines:
+        if table:
+            if not line.strip():
+                table = None
+                continue
+            port = parse_port(hostname, vlan, line)
+            if port is not None:
+                ports.append(port)
+            continue
+        if ROOT in line:
+            is_root = True
+        if table is False:
+            table = bool(RULE.match(line))
+            continue
+        if PORT_HEADER.match(line):
+            table = False
+            continue
+        match = FIELD.match(line)
+        if match:
+            fields.setdefault(match.group("name"), match.group("value").strip())
+    enabled = fields.get("STP Enabled")
+    return SpanningTree(
+        hostname,
+        vlan,
+        _mode(fields),
+        None if enabled is None else enabled == "Yes",
+        is_root,
+        fields.get("Switch MAC Address"),
+        tuple(ports),
+    )
+
+
+def expand_vlans(vlans):
+    """Returns the sorted list of vlan ids of a vlan, a list of vlans or a
+    vlan range such as 1-10,20.
+
+    Raises ValueError if a vlan id is not a number.
+    """
+    if isinstance(vlans, int):
+        vlans = [vlans]
+    elif isinstance(vlans, str):
+        vlans = vlans.split(",")
+    expanded = set()
+    for vlan in vlans:
+        first, _, last = str(vlan).partition("-")
+        expanded.update(range(int(first), int(last or first) + 1))
+    return sorted(expanded)
+
+
+def compact_vlans(vlans):
+    """Returns the vlan ids as a vlan range such as 1-10,20, as accepted by the
+    switch"""
+    ranges = []
+    for vlan in expand_vlans(vlans):
+        if ranges and ranges[-1][1] == vlan - 1:
+            ranges[-1][1] = vlan
+        else:
+            ranges.append([vlan, vlan])
+    return ",".join(
+        str(first) if first == last else f"{first}-{last}" for first, last in ranges
+    )
+
+
+def vlan_commands(vlans, max_length=MAX_COMMAND_LENGTH):
+    """Returns the fewest show spanning-tree vlan commands covering the vlans,
+    each no longer than max_length characters"""
+    commands = []
+    for part in compact_vlans(vlans).split(","):
+        if part and commands and len(commands[-1]) + 1 + len(part) <= max_length:
+            commands[-1] += "," + part
+        elif part:
+            commands.append(VLAN_COMMAND + part)
+    return commands
+
+
+def split_vlans(lines):
+    """Yields the vlan id and the lines of each vlan of show spanning-tree vlan
+    output, the lines of each vlan headed by the global lines before the
+    first vlan"""
+    if isinstance(lines, str):
+        lines = lines.splitlines()
+    header = []
+    vlan = None
+    section = []
+    for line in lines:
+        match = VLAN_ID.match(line)
+        if match:
+            if vlan is not None:
+                yield vlan, header + section
+            vlan = int(match.group("vlan"))
+            section = [line]
+        elif vlan is None:
+            header.append(line)
+        else:
+            section.append(line)
+    if vlan is not None:
+        yield vlan, header + section
+
+
+def parse_vlans(lines, hostname=None):
+    """Returns the SpanningTree model of each vlan of show spanning-tree vlan
+    output, keyed on the vlan id.
+
+    Parameters
+    ----------
+    lines : str or iterable of str
+        The output of show spanning-tree vlan for one vlan or a list of vlans,
+        as one string or line by line.
+    hostname : str
+        The hostname of the switch, recorded in the port records.
+    """
+    return {
+        vlan: parse_spanning_tree(section, hostname, vlan)
+        for vlan, section in split_vlans(lines)
+    }
+
+
+def _mode(fields):
+    """Returns the spanning tree mode from the fields of the output"""
+    if fields.get("Mode") == "RPVST":
+        return "RPVST"
+    force_version = fields.get("Force Version", "")
+    for mode in FORCE_VERSION_MODES:
+        if force_version.startswith(mode):
+            return mode
+    return None
+
+
+def parse_port(hostname, vlan, line):
+    """Returns an StpPort record for a row of the spanning tree port table, or
+    None if the line is not a port row"""
+    if ":" in line:
+        return None
+    tokens = line.replace("|", " ").split()
+    states = [i for i, token in enumerate(tokens) if token in STP_STATES]
+    if len(tokens) < 3 or not states:
+        return None
+    state = states[-1]
+    after_state = state + 1
+    middle, rest = tokens[1:state], tokens[after_state:]
+    role = middle.pop() if middle and middle[-1] in STP_ROLES else ""
+    port_type = ""
+    if middle and not (middle[0].isdigit() or middle[0] == "Auto"):
+        port_type = middle.pop(0)
+    middle += [""] * (2 - len(middle))
+    rest += [""] * (4 - len(rest))
+    return StpPort(
+        hostname,
+        vlan,
+        tokens[0],
+        port_type,
+        middle[0],
+        middle[1],
+        role,
+        tokens[state],
+        *rest[:4],
+    )
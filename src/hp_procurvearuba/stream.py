@@ -0,0 +1,101 @@
+"""The stream module reads the output of a command line by line as it arrives
+
+from the SSH channel
+
+netmiko's send_command collects the whole output of a command before
+returning it, and the HP methods then split it into a list of lines, so a
+large show run or show mac-address is held in memory several times over.
+channel_lines() yields each line as soon as it is complete, so a parser can
+consume the output as it arrives and stop once it has found its answer.
+
+"""
+import io
+import time
+
+PROMPT_TERMINATORS = ("#", ">")
+
+
+def iter_lines(output):
+    """Yields the lines of output held in a string, without splitting it into
+    a list first"""
+    for line in io.StringIO(output):
+        yield line.rstrip("\r\n")
+
+
+def channel_lines(connection, command_string, read_timeout=10.0, loop_delay=0.01):
+    """Sends a command on a netmiko connection and yields its output line by
+    line, without the command echo and the trailing prompt.
+
+    If the generator is closed before the prompt is read, the rest of the
+    output is read and discarded, leaving the session ready for the next
+    command.
+
+    Parameters
+    ----------
+    connection : HPProcurveSSH
+        The netmiko connection to the switch.
+    command_string : str
+        The command to send.
+    read_timeout : int or float
+        Number of seconds to wait for more output before raising ReadTimeout.
+    loop_delay : float
+        Number of seconds to sleep while the channel has no data.
+    """
+    prompt = connection.base_prompt
+    connection.clear_buffer()
+    connection.write_channel(command_string + connection.RETURN)
+    pending = ""
+    first_line = True
+    try:
+        for data in _read(connection, read_timeout, loop_delay):
+            pending += data
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                if first_line:
+                    first_line = False
+                    if command_string in line:
+                        continue
+                yield line
+            if _is_prompt(pending, prompt):
+                return
+    except GeneratorExit:
+        _drain(connection, pending, prompt, read_timeout, loop_delay)
+        raise
+
+
+def _drain(connection, pending, prompt, read_timeout, loop_delay):
+    """Reads and discards the rest of the output of a command up to the
+    prompt"""
+    if _is_prompt(pending, prompt):
+        return
+    for data in _read(connection, read_timeout, loop_delay):
+        pending = (pending + data).rsplit("\n", 1)[-1]
+        if _is_prompt(pending, prompt):
+            return
+
+
+def _read(connection, read_timeout, loop_delay):
+    """Yields the data read from the channel until read_timeout seconds pass
+    without any"""
+    deadline = time.monotonic() + read_timeout
+    while True:
+        data = connection.read_channel()
+        if data:
+            deadline = time.monotonic() + read_timeout
+            yield data
+        elif time.monotonic() > deadline:
+            from netmiko.exceptions import ReadTimeout
+
+            raise ReadTimeout(
+                f"no output from {connection.host} within {read_timeout} seconds"
+            )
+        else:
+            time.sleep(loop_delay)
+
+
+def _is_prompt(line, prompt):
+    """Returns True if the line is the prompt of the switch"""
+    line = line.strip()
+    return (
+        bool(prompt) and line.startswith(prompt) and line.endswith(PROMPT_TERMINATORS)
+    )
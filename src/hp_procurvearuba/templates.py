@@ -0,0 +1,253 @@
+"""The templates module parses show command output with TextFSM templates
+
+compiled once per process
+
+netmiko loads the ntc-templates index and compiles the template again for
+every send_command(..., use_textfsm=True). The TemplateRegistry maps each
+command sent by the HP class straight to its template, compiles it on first
+use and keeps the compiled state machine for later calls. Templates for
+commands the ntc set does not cover, such as show power-over-ethernet brief
+and show vlan ports, ship with the package, and register() adds more.
+
+"""
+import os
+import threading
+
+PLATFORM = "hp_procurve"
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "template_files")
+
+NTC_TEMPLATES = {
+    "show arp": "hp_procurve_show_arp.textfsm",
+    "show int brief": "hp_procurve_show_interfaces_brief.textfsm",
+    "show interfaces brief": "hp_procurve_show_interfaces_brief.textfsm",
+    "show interfaces": "hp_procurve_show_interfaces.textfsm",
+    "show lldp info remote-device": "hp_procurve_show_lldp_info_remote-device.textfsm",
+    "show mac-address": "hp_procurve_show_mac-address.textfsm",
+    "show port-security": "hp_procurve_show_port-security.textfsm",
+    "show system": "hp_procurve_show_system.textfsm",
+    "show trunks": "hp_procurve_show_trunks.textfsm",
+    "show vlans": "hp_procurve_show_vlans.textfsm",
+}
+
+PACKAGE_TEMPLATES = {
+    "show power-over-ethernet brief": (
+        "hp_procurve_show_power-over-ethernet_brief.textfsm"
+    ),
+}
+
+PACKAGE_PREFIX_TEMPLATES = {
+    "show vlan ports": "hp_procurve_show_vlan_ports.textfsm",
+}
+
+
+class CompiledTemplate:
+    """A TextFSM template compiled once and reused for every parse"""
+
+    def __init__(self, path):
+        """
+        Parameters
+        ----------
+        path : str
+            The path of the TextFSM template file.
+        """
+        self.path = path
+        self._fsm = None
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"CompiledTemplate({os.path.basename(self.path)})"
+
+    def parse(self, output):
+        """Returns the rows of the output as a list of dictionaries keyed on
+        the lower case template values"""
+        with self._lock:
+            self._compile()
+            self._fsm.Reset()
+            rows = self._fsm.ParseText(output)
+            return [dict(zip(self._header, row)) for row in rows]
+
+    def parse_lines(self, lines):
+        """Returns the rows of output read line by line, such as from
+        HP.stream_command(), without joining the lines first"""
+        with self._lock:
+            self._compile()
+            self._fsm.Reset()
+            for line in lines:
+                self._fsm.ParseText(line, eof=False)
+            rows = self._fsm.ParseText("", eof=True)
+            return [dict(zip(self._header, row)) for row in rows]
+
+    def _compile(self):
+        """Compiles the template on first use"""
+        if self._fsm is None:
+            import textfsm
+
+            with open(self.path, "r") as f:
+                self._fsm = textfsm.TextFSM(f)
+            self._header = [value.lower() for value in self._fsm.header]
+
+
+class TemplateRegistry:
+    """Class TemplateRegistry maps commands to compiled TextFSM templates"""
+
+    def __init__(self, ntc_template_dir=None):
+        """
+        Parameters
+        ----------
+        ntc_template_dir : str
+            The ntc-templates directory, found by netmiko when not given.
+        """
+        self.ntc_template_dir = ntc_template_dir
+        self._templates = {}
+        self._prefixes = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return (
+            f"TemplateRegistry({len(self._templates) + len(self._prefixes)} commands)"
+        )
+
+    def register(self, command, template, prefix=False):
+        """Registers the TextFSM template of a command, replacing any template
+        registered for it before.
+
+        Parameters
+        ----------
+        command : str
+            The command as sent by the HP class, such as 'show vlans'.
+        template : str
+            The path of the TextFSM template file.
+        prefix : bool
+            Set to True to use the template for every command starting with
+            the command, such as 'show vlan ports' for 'show vlan ports 23'.
+        """
+        self._load()
+        compiled = CompiledTemplate(template)
+        if prefix:
+            self._prefixes[command.strip()] = compiled
+        else:
+            self._templates[command.strip()] = compiled
+
+    def template_for(self, command):
+        """Returns the CompiledTemplate of a command, or None if no template
+        is registered for it"""
+        self._load()
+        command = command.strip()
+        compiled = self._templates.get(command)
+        if compiled is None:
+            for prefix in self._prefixes:
+                if command.startswith(prefix + " "):
+                    return self._prefixes[prefix]
+        return compiled
+
+    def parse(self, command, output):
+        """Returns the output of a command parsed with its template.
+
+        Commands with no registered template, such as abbreviated commands,
+        are parsed through the ntc-templates index by netmiko. As with
+        netmiko, the output is returned unchanged when the template finds no
+        rows.
+
+        Parameters
+        ----------
+        command : str
+            The command which produced the output.
+        output : str
+            The raw output of the command.
+        """
+        compiled = self.template_for(command)
+        if compiled is None:
+            from netmiko.utilities import structured_data_converter
+
+            return structured_data_converter(
+                output, command=command, platform=PLATFORM, use_textfsm=True
+            )
+        rows = compiled.parse(output)
+        return rows if rows else output
+
+    def parse_lines(self, command, lines):
+        """Returns the rows of the output of a command read line by line,
+        empty if no template is registered for the command or the template
+        finds no rows.
+
+        Parameters
+        ----------
+        command : str
+            The command which produced the output.
+        lines : iterable of str
+            The lines of output of the command.
+        """
+        compiled = self.template_for(command)
+        if compiled is None:
+            return []
+        return compiled.parse_lines(lines)
+
+    def _load(self):
+        """Registers the ntc and package templates on first use"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            ntc_template_dir = self.ntc_template_dir or ntc_templates_dir()
+            for command, filename in NTC_TEMPLATES.items():
+                path = os.path.join(ntc_template_dir, filename)
+                self._templates.setdefault(command, CompiledTemplate(path))
+            for command, filename in PACKAGE_TEMPLATES.items():
+                path = os.path.join(TEMPLATE_DIR, filename)
+                self._templates.setdefault(command, CompiledTemplate(path))
+            for command, filename in PACKAGE_PREFIX_TEMPLATES.items():
+                path = os.path.join(TEMPLATE_DIR, filename)
+                self._prefixes.setdefault(command, CompiledTemplate(path))
+            self._loaded = True
+
+
+def ntc_templates_dir():
+    """Returns the ntc-templates directory, from the NET_TEXTFSM environment
+    variable as netmiko does, else from the installed ntc-templates package,
+    without importing netmiko"""
+    template_dir = os.environ.get("NET_TEXTFSM")
+    if template_dir:
+        return os.path.expanduser(template_dir)
+    try:
+        import ntc_templates
+    except ImportError:
+        from netmiko.utilities import get_template_dir
+
+        return get_template_dir()
+    return os.path.join(os.path.dirname(ntc_templates.__file__), "templates")
+
+
+REGISTRY = TemplateRegistry()
+
+
+def register(command, template, prefix=False):
+    """Registers the TextFSM template of a command with the registry used by
+    every HP object, see TemplateRegistry.register()"""
+    REGISTRY.register(command, template, prefix)
+
+
+def parse(command, output):
+    """Parses the output of a command with the registry used by every HP
+    object, see TemplateRegistry.parse()"""
+    return REGISTRY.parse(command, output)
+
+
+def parse_lines(command, lines):
+    """Parses the output of a command line by line with the registry used by
+    every HP object, see TemplateRegistry.parse_lines()"""
+    return REGISTRY.parse_lines(command, lines)
+
+
+def rows(output):
+    """Returns the rows of parsed output, or an empty list if the output
+    could not be parsed"""
+    return output if isinstance(output, list) else []
+
+
+def parse_count(value):
+    """Returns the number of a parsed counter such as 1,276,448,234, or 0 if
+    it is empty"""
+    value = (value or "").replace(",", "").strip()
+    return int(value) if value else 0
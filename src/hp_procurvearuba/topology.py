@@ -0,0 +1,350 @@
+"""The topology module discovers how a fleet of switches is linked by crawling
+
+lldp neighbors outward from seed switches
+
+Each switch is polled once, for its lldp neighbors, port status and running
+configuration, and the switches found as neighbors are polled in parallel
+in the next wave, so the crawl takes one round of SSH per hop rather than
+one per switch. The links found are held in a Topology graph indexed by
+switch and by vlan, which answers questions such as the path vlan 300 takes
+between two switches or the trunks slower than 10G without any further SSH
+traffic. The graph is saved to json with the time it was discovered, and is
+only discovered again once it is older than its time to live.
+
+"""
+from collections import deque, namedtuple
+import json
+import re
+import time
+
+from .addresses import normalize_vlan
+from .fleet import HPFleet, device_hostname
+from .replay import open_recording
+from .templates import rows
+
+SPEED = re.compile(r"^(?P<speed>\d+)(?P<gig>Gig|G)?", re.IGNORECASE)
+
+Link = namedtuple(
+    "Link",
+    [
+        "hostname",
+        "port",
+        "neighbor",
+        "neighbor_port",
+        "mode",
+        "speed",
+        "untagged",
+        "tagged",
+    ],
+)
+Link.__doc__ = """A link from a port of a switch to its lldp neighbor. speed is
+in Mbit/s, untagged is the untagged vlan id of the port and tagged the tuple of
+its tagged vlan ids."""
+
+
+def parse_speed(mode):
+    """Returns the speed in Mbit/s of a port mode such as 1000FDx or 10GigFD,
+    or None if the mode has no speed"""
+    match = SPEED.match(mode or "")
+    if match is None:
+        return None
+    speed = int(match.group("speed"))
+    return speed * 1000 if match.group("gig") else speed
+
+
+def switch_links(hp_obj):
+    """Returns the list of Link from a switch to its lldp neighbors which
+    name themselves, from one show lldp info remote-device, show int brief
+    and show run"""
+    neighbors = rows(
+        hp_obj.send_command("show lldp info remote-device", use_textfsm=True)
+    )
+    neighbors = [n for n in neighbors if n["neighbor_sysname"]]
+    if not neighbors:
+        return []
+    modes = {
+        port["port"]: port["mode"]
+        for port in rows(hp_obj.send_command("show int brief", use_textfsm=True))
+    }
+    config = hp_obj.running_config()
+    links = []
+    for neighbor in neighbors:
+        port = neighbor["local_port"]
+        vlans = config.port_vlans(config.logical_port(port))
+        mode = modes.get(port)
+        links.append(
+            Link(
+                hp_obj.hostname,
+                port,
+                neighbor["neighbor_sysname"],
+                neighbor["neighbor_portid"],
+                mode,
+                parse_speed(mode),
+                vlans.untagged,
+                vlans.tagged,
+            )
+        )
+    return links
+
+
+class Topology:
+    """Class Topology holds the lldp links of a fleet of switches, indexed by
+    switch and by vlan"""
+
+    def __init__(self, links=(), discovered_at=None, errors=None):
+        """
+        Parameters
+        ----------
+        links : iterable of Link
+            The links reported by each switch. A link between two polled
+            switches is reported by both, once from each end.
+        discovered_at : float
+            The epoch time the links were discovered, defaults to now.
+        errors : dict
+            The error of each switch which could not be polled.
+        """
+        self.links = []
+        self.discovered_at = discovered_at or time.time()
+        self.errors = dict(errors or {})
+        self._adjacency = {}
+        self._incoming = {}
+        self._vlans = {}
+        for link in links:
+            self.add(link)
+
+    def __repr__(self):
+        return f"Topology({len(self.switches())} switches, {len(self.links)} links)"
+
+    def __len__(self):
+        return len(self.links)
+
+    def add(self, link):
+        """Adds a Link to the graph and its indexes"""
+        self.links.append(link)
+        self._adjacency.setdefault(link.hostname, {}).setdefault(
+            link.neighbor, []
+        ).append(link)
+        self._incoming.setdefault(link.neighbor, {}).setdefault(
+            link.hostname, []
+        ).append(link)
+        for vlan in _vlans(link):
+            self._vlans.setdefault(vlan, []).append(link)
+
+    def switches(self):
+        """Returns the sorted hostnames of the switches in the graph, polled
+        or only seen as a neighbor"""
+        return sorted(set(self._adjacency) | set(self._incoming))
+
+    def neighbors(self, hostname):
+        """Returns the sorted hostnames of the lldp neighbors of a switch"""
+        return sorted(
+            set(self._adjacency.get(hostname, ()))
+            | set(self._incoming.get(hostname, ()))
+        )
+
+    def links_from(self, hostname, neighbor=None):
+        """Returns the links reported by a switch, only those to a neighbor if
+        given"""
+        adjacent = self._adjacency.get(hostname, {})
+        if neighbor is not None:
+            return list(adjacent.get(neighbor, ()))
+        return [link for links in adjacent.values() for link in links]
+
+    def links_carrying(self, vlan):
+        """Returns the links whose port carries a vlan, tagged or untagged"""
+        return list(self._vlans.get(normalize_vlan(vlan), ()))
+
+    def links_slower_than(self, speed):
+        """Returns the links whose port runs slower than a speed in Mbit/s,
+        such as 10000 for 10G"""
+        return [
+            link for link in self.links if link.speed is not None and link.speed < speed
+        ]
+
+    def path(self, source, target, vlan=None):
+        """Returns the shortest list of links from one switch to another, only
+        over links carrying a vlan if given, or None if there is no path.
+
+        Parameters
+        ----------
+        source : str
+            The hostname of the first switch.
+        target : str
+            The hostname of the last switch.
+        vlan : int or str
+            The vlan the links must carry, on the ports at both ends when
+            both switches were polled.
+        """
+        previous = {source: None}
+        queue = deque([source])
+        while queue:
+            hostname = queue.popleft()
+            if hostname == target:
+                break
+            for link in self._hops(hostname, vlan):
+                if link.neighbor not in previous:
+                    previous[link.neighbor] = link
+                    queue.append(link.neighbor)
+        if target not in previous:
+            return None
+        path = []
+        while previous[target] is not None:
+            link = previous[target]
+            path.append(link)
+            target = link.hostname
+        return path[::-1]
+
+    def is_fresh(self, ttl):
+        """Returns True if the graph was discovered less than ttl seconds ago"""
+        return ttl is None or time.time() - self.discovered_at < ttl
+
+    def to_dict(self):
+        """Returns the graph as a json serializable dictionary"""
+        return {
+            "discovered_at": self.discovered_at,
+            "errors": self.errors,
+            "links": [link._asdict() for link in self.links],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Creates a Topology from a dictionary returned by to_dict()"""
+        links = [
+            Link(**dict(link, tagged=tuple(link["tagged"]))) for link in data["links"]
+        ]
+        return cls(links, data["discovered_at"], data.get("errors"))
+
+    def save(self, path):
+        """Saves the graph to a json file, gzip compressed if the path ends
+        in .gz"""
+        with open_recording(path, "wt") as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path, ttl=None):
+        """Loads a graph saved with save(), or returns None if the file does
+        not exist or the graph is older than ttl seconds"""
+        try:
+            with open_recording(path, "rt") as f:
+                topology = cls.from_dict(json.load(f))
+        except FileNotFoundError:
+            return None
+        return topology if topology.is_fresh(ttl) else None
+
+    @classmethod
+    def discover(cls, fleet, seeds=None, max_hops=None):
+        """Crawls the lldp neighbors of a fleet outward from seed switches,
+        polling each switch of the fleet once and each wave of neighbors in
+        parallel.
+
+        Parameters
+        ----------
+        fleet : HPFleet
+            The inventory of switches which may be polled. Neighbors which
+            are not in the inventory are added to the graph but not polled.
+        seeds : list of str
+            The hostnames to start from, every switch of the fleet by default.
+        max_hops : int
+            Number of waves of neighbors polled after the seeds, unlimited by
+            default.
+        """
+        devices = {device_hostname(device): device for device in fleet.devices}
+        wave = list(devices) if seeds is None else [s for s in seeds if s in devices]
+        polled = set()
+        topology = cls()
+        hops = 0
+        while wave:
+            polled.update(wave)
+            crawl = HPFleet(
+                [devices[hostname] for hostname in wave],
+                max_workers=fleet.max_workers,
+                timeout=fleet.timeout,
+                factory=fleet.factory,
+                disconnect=fleet.disconnect,
+                pool=fleet.pool,
+            )
+            found = set()
+            for result in crawl.run(switch_links):
+                if not result.ok:
+                    topology.errors[result.hostname] = str(result.error)
+                    continue
+                for link in result.result:
+                    topology.add(link)
+                    found.add(link.neighbor)
+            hops += 1
+            if max_hops is not None and hops > max_hops:
+                break
+            wave = sorted(h for h in found - polled if h in devices)
+        topology.discovered_at = time.time()
+        return topology
+
+    @classmethod
+    def cached(cls, path, fleet, ttl=3600, **kwargs):
+        """Loads the graph saved at path if it is younger than ttl seconds,
+        else discovers it again and saves it.
+
+        Parameters
+        ----------
+        path : str
+            The json file holding the graph.
+        fleet : HPFleet
+            The fleet to crawl when the saved graph is missing or stale.
+        ttl : int or float
+            Number of seconds a discovered graph stays valid.
+        **kwargs :
+            Keyword arguments passed on to discover(), such as seeds.
+        """
+        topology = cls.load(path, ttl)
+        if topology is None:
+            topology = cls.discover(fleet, **kwargs)
+            topology.save(path)
+        return topology
+
+    def _hops(self, hostname, vlan):
+        """Returns the links leaving a switch, from the links it reported and
+        from those its neighbors reported towards it"""
+        hops = self.links_from(hostname)
+        reported = {link.neighbor for link in hops}
+        for other, links in self._incoming.get(hostname, {}).items():
+            if other not in reported:
+                hops += [_reverse(link) for link in links]
+        if vlan is not None:
+            vlan = normalize_vlan(vlan)
+            hops = [
+                link
+                for link in hops
+                if vlan in _vlans(link)
+                and all(vlan in _vlans(peer) for peer in self._peers(link))
+            ]
+        return hops
+
+    def _peers(self, link):
+        """Returns the links reported from the other end of a link"""
+        return [
+            peer
+            for peer in self._adjacency.get(link.neighbor, {}).get(link.hostname, ())
+            if peer.port == link.neighbor_port
+        ]
+
+
+def _vlans(link):
+    """Returns the vlan ids carried by a link"""
+    vlans = set(link.tagged)
+    if link.untagged is not None:
+        vlans.add(link.untagged)
+    return vlans
+
+
+def _reverse(link):
+    """Returns a link seen from its neighbor, for neighbors which were not
+    polled"""
+    return Link(
+        link.neighbor,
+        link.neighbor_port,
+        link.hostname,
+        link.port,
+        link.mode,
+        link.speed,
+        link.untagged,
+        link.tagged,
+    )
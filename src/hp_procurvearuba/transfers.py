@@ -0,0 +1,223 @@
+"""The transfers module runs copy and boot commands to completion, answering
+
+their questions and following their progress instead of waiting on timers
+
+A transfer is complete when the switch prints its prompt again or, for the
+commands which reboot the switch, when the session drops. Questions such as
+continue [y/n]? and password: are answered as they are asked, and the
+save current configuration [y/n/^C]? asked before a reboot is answered with y,
+saving the configuration. Progress bars are parsed into TransferProgress
+records as they are drawn, and error lines mark the transfer as failed, so
+each transfer takes as long as it needs and ends in a TransferResult.
+
+"""
+from collections import namedtuple
+import re
+import time
+
+from .stream import PROMPT_TERMINATORS, _is_prompt
+
+QUESTION = re.compile(r"\[y/n(?:/\^C)?\]|\(y/n\)", re.IGNORECASE)
+CONFIRM = re.compile(r"(?:\[y/n(?:/\^C)?\]|\(y/n\))\??\s*$", re.IGNORECASE)
+PASSWORD = re.compile(r"password:\s*$", re.IGNORECASE)
+REBOOT = re.compile(r"reboot", re.IGNORECASE)
+PROGRESS = re.compile(
+    r"(?P<percent>\d{1,3})%\s+(?P<transferred>[\d.]+[KMG]?)/(?P<total>[\d.]+[KMG]?)"
+)
+BYTE_COUNTER = re.compile(r"^\s*(?P<transferred>\d{1,3}(?:,\d{3})+)\s*$")
+FAILURE = re.compile(
+    r"\b(?:error|fail(?:ed|ure)?|timed out|time-out|unable|invalid|denied|refused"
+    r"|not found|aborted|no such file)\b",
+    re.IGNORECASE,
+)
+LINE_BREAK = re.compile(r"[\r\n]")
+
+TransferProgress = namedtuple(
+    "TransferProgress", ["hostname", "command", "percent", "transferred", "total"]
+)
+TransferProgress.__doc__ = """The progress of a transfer as drawn by the switch"""
+
+TransferResult = namedtuple(
+    "TransferResult",
+    ["hostname", "command", "success", "message", "progress", "elapsed", "output"],
+)
+TransferResult.__doc__ = """The outcome of a copy or boot command"""
+
+
+def run_transfer(
+    connection,
+    command_string,
+    hostname=None,
+    password=None,
+    reboots=False,
+    timeout=1800,
+    loop_delay=0.1,
+    on_progress=None,
+):
+    """Sends a copy or boot command on a netmiko connection and reads its
+    output until the transfer completes, fails or times out.
+
+    Parameters
+    ----------
+    connection : HPProcurveSSH
+        The netmiko connection to the switch.
+    command_string : str
+        The copy or boot command to send.
+    hostname : str
+        The hostname of the switch, recorded in the result.
+    password : str
+        The answer to a password prompt, such as that of an sftp server. An
+        empty line is sent when no password is given.
+    reboots : bool
+        Set to True if the switch reboots once the command succeeds, so that
+        the session dropping completes the transfer.
+    timeout : int or float
+        Number of seconds after which a transfer which has not completed is
+        reported as failed.
+    loop_delay : float
+        Number of seconds to sleep while the channel has no data.
+    on_progress : callable
+        Called with a TransferProgress record whenever the switch redraws
+        its progress bar.
+    """
+    started = time.monotonic()
+    reader = _TransferReader(hostname, command_string, on_progress)
+    prompt = connection.base_prompt
+    connection.clear_buffer()
+    connection.write_channel(command_string + connection.RETURN)
+    while True:
+        try:
+            data = connection.read_channel()
+        except (EOFError, OSError):
+            return reader.result(started, reboots, dropped=True)
+        if data:
+            answer = reader.feed(data, password)
+            if answer is not None:
+                connection.write_channel(answer + connection.RETURN)
+            elif _is_prompt(reader.pending, prompt):
+                return reader.result(started, reboots)
+        elif _closed(connection):
+            return reader.result(started, reboots, dropped=True)
+        if time.monotonic() - started > timeout:
+            return reader.result(
+                started, reboots, failure=f"no completion within {timeout} seconds"
+            )
+        if not data:
+            time.sleep(loop_delay)
+
+
+def replay_transfer(
+    output, command_string, hostname=None, reboots=False, on_progress=None
+):
+    """Returns the TransferResult of the recorded output of a copy or boot
+    command, reporting its progress as run_transfer() does"""
+    started = time.monotonic()
+    reader = _TransferReader(hostname, command_string, on_progress)
+    reader.feed(output, None)
+    return reader.result(started, reboots, dropped=reboots)
+
+
+def parse_progress(line):
+    """Returns the percent, transferred and total amount drawn on a progress
+    bar, such as 12M/24M, or the number of bytes of a byte counter with no
+    percent or total, or None if the line shows no progress"""
+    match = PROGRESS.search(line)
+    if match:
+        return (
+            int(match.group("percent")),
+            match.group("transferred"),
+            match.group("total"),
+        )
+    match = BYTE_COUNTER.match(line)
+    if match:
+        return None, int(match.group("transferred").replace(",", "")), None
+    return None
+
+
+class _TransferReader:
+    """Splits the output of a transfer into lines, answering questions and
+    recording progress and failures as they are read"""
+
+    def __init__(self, hostname, command_string, on_progress):
+        self.hostname = hostname
+        self.command_string = command_string
+        self.on_progress = on_progress
+        self.lines = []
+        self.pending = ""
+        self.progress = None
+        self.failure = None
+        self.confirmed_reboot = False
+
+    def feed(self, data, password):
+        """Reads data from the channel and returns the answer to a question
+        it ends in, or None"""
+        *lines, self.pending = LINE_BREAK.split(self.pending + data)
+        for line in lines:
+            self._line(line)
+        question = self.pending.strip()
+        if CONFIRM.search(question):
+            self._line(self.pending)
+            self.pending = ""
+            return "y"
+        if PASSWORD.search(question):
+            self._line(self.pending)
+            self.pending = ""
+            return password or ""
+        return None
+
+    def result(self, started, reboots, dropped=False, failure=None):
+        """Returns the TransferResult of the output read so far"""
+        if self.pending.strip():
+            pending, self.pending = self.pending, ""
+            if not _looks_like_prompt(pending):
+                self._line(pending)
+        failure = failure or self.failure
+        if failure is None and reboots and not (dropped and self.confirmed_reboot):
+            failure = "the switch did not reboot"
+        if failure is None and dropped and not reboots:
+            failure = "the session dropped before the transfer completed"
+        if failure is not None:
+            success, message = False, failure
+        elif reboots:
+            success, message = True, "rebooting"
+        else:
+            success = True
+            message = self.lines[-1] if self.lines else "transfer complete"
+        return TransferResult(
+            self.hostname,
+            self.command_string,
+            success,
+            message,
+            self.progress,
+            time.monotonic() - started,
+            "\n".join(self.lines),
+        )
+
+    def _line(self, line):
+        line = line.strip()
+        if not line or self.command_string in line:
+            return
+        progress = parse_progress(line)
+        if progress is not None:
+            # progress bars are redrawn in place, only the latest is kept
+            self.progress = TransferProgress(
+                self.hostname, self.command_string, *progress
+            )
+            if self.on_progress is not None:
+                self.on_progress(self.progress)
+            return
+        self.lines.append(line)
+        if QUESTION.search(line) and REBOOT.search(line):
+            self.confirmed_reboot = True
+        elif self.failure is None and FAILURE.search(line):
+            self.failure = line
+
+
+def _looks_like_prompt(line):
+    return line.strip().endswith(PROMPT_TERMINATORS)
+
+
+def _closed(connection):
+    """Returns True if the SSH channel of a netmiko connection has closed"""
+    channel = getattr(connection, "remote_conn", None)
+    return bool(getattr(channel, "closed", False))
@@ -1,28 +1,55 @@
-from procurvearuba import HP
+from hp_procurvearuba import HP
+from hp_procurvearuba.fleet import device_hostname
+import os
 import yaml
 import pytest
 import mock
 
-with open('devices.yml', 'r') as f:
-    device_data = yaml.safe_load(f)
-    device_data = device_data.pop('devices')
-    device_data = device_data
+CAPTURES = os.path.join(os.path.dirname(__file__), 'captures')
+
+
+def load_devices():
+    if not os.path.exists('devices.yml'):
+        return []
+    with open('devices.yml', 'r') as f:
+        device_data = yaml.safe_load(f)
+    return device_data.pop('devices')
+
+
+def connect(hostname):
+    # run against the live switch when it is listed in devices.yml, otherwise
+    # replay the output captured from it under tests/captures
+    for device in load_devices():
+        if device_hostname(device) == hostname:
+            return HP(**device)
+    return HP.from_captures(os.path.join(CAPTURES, hostname))
+
+
+def switch_fixture(hostname):
+    @pytest.fixture(scope='module')
+    def fixture(request):
+        hp_obj = connect(hostname)
+
+        def fin():
+            hp_obj.disconnect()
+
+        request.addfinalizer(fin)
+        return hp_obj
+    return fixture
 
 #pytest fixture for test_mocks.py
 @pytest.fixture(scope='module')
 def mocked_hp_connect():
-    for device in device_data:
+    devices = load_devices()
+    if not devices:
+        pytest.skip('devices.yml not found, skipping tests against live switches')
+    for device in devices:
         hp_obj = HP(**device)
     return mock.Mock(spec=hp_obj)
 
-#pyest fixture for test_funcs.py
-@pytest.fixture(scope='module')
-def hp_connect(request):
-    for device in device_data:
-        hp_obj = HP(**device)
-
-    def fin():
-        hp_obj.disconnect()
-
-    request.addfinalizer(fin)
-    return hp_obj
+#pytest fixtures for test_funcs.py
+hp_connect = switch_fixture('HP_1')  # RSTP
+rpvst_connect = switch_fixture('HP_2')
+mstp_connect = switch_fixture('HP_3')
+stp_connect = switch_fixture('HP_4')  # STP-compatible
+stp_disabled_connect = switch_fixture('HP_5')
@@ -0,0 +1,54 @@
+import os
+
+from hp_procurvearuba import ConfigArchive, HPFleet
+from hp_procurvearuba.archive import normalize_config
+
+CONFIG = '''
+Running configuration:
+
+; J9728A Configuration Editor; Created on release #WB.16.04.0016
+; Ver #14:01.44.00.04.19.02.13.98.82.34.61.18.28.f3.84.9c.63.ff.37.27:05
+hostname "HP_1"   
+vlan 1
+   name "DEFAULT_VLAN"
+   exit
+'''
+
+
+def objects(path):
+    return [name for _, _, names in os.walk(path / 'objects') for name in names]
+
+def test_normalize_config():
+    assert normalize_config(CONFIG) == 'hostname "HP_1"\nvlan 1\n   name "DEFAULT_VLAN"\n   exit\n'
+    assert normalize_config(CONFIG) == normalize_config(CONFIG.replace('WB.16.04.0016', 'WB.16.10.0012'))
+
+def test_unchanged_config_records_pointer(tmp_path):
+    archive = ConfigArchive(str(tmp_path))
+    first = archive.store('HP_1', CONFIG)
+    second = archive.store('HP_1', CONFIG.replace('\n', '\r\n'))
+    assert first.changed and not second.changed
+    assert first.sha256 == second.sha256
+    assert len(objects(tmp_path)) == 1
+    assert len(archive.history('HP_1')) == 2
+    assert archive.changes('HP_1') == [first]
+
+def test_changed_config_and_dedup_across_switches(tmp_path):
+    archive = ConfigArchive(str(tmp_path))
+    archive.store('HP_1', CONFIG)
+    archive.store('HP_2', CONFIG)
+    changed = archive.store('HP_1', CONFIG + 'ntp enable\n')
+    assert changed.changed
+    assert len(objects(tmp_path)) == 2
+    assert archive.checkout('HP_1').endswith('ntp enable\n')
+    assert 'ntp enable' not in archive.checkout('HP_1', 0)
+    assert archive.hostnames() == ['HP_1', 'HP_2']
+    assert archive.latest('HP_3') is None
+
+def test_archive_fleet_from_replay(hp_connect, tmp_path):
+    fleet = HPFleet([{'hostname': 'HP_1'}], factory=lambda **kwargs: hp_connect, disconnect=False)
+    results = fleet.archive_configs(str(tmp_path))
+    assert results[0].ok
+    entry = results[0].result
+    assert entry.sha256 in ConfigArchive(str(tmp_path))
+    assert fleet.archive_configs(str(tmp_path))[0].result.changed is False
+    assert 'hostname "HP_1"' in ConfigArchive(str(tmp_path)).checkout('HP_1')
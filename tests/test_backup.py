@@ -0,0 +1,84 @@
+import hashlib
+import threading
+import time
+
+from hp_procurvearuba import FleetBackup, HPFleet
+from hp_procurvearuba.backup import read_manifest
+from hp_procurvearuba.transfers import TransferResult
+
+
+class FakeHP:
+    active = {}
+    peak = {}
+    timeouts = []
+    lock = threading.Lock()
+
+    def __init__(self, hostname, failures=0):
+        self.hostname = hostname
+        self.failures = failures
+
+    def tftp_backup_config(self, server, timeout=1800):
+        FakeHP.timeouts.append(timeout)
+        with self.lock:
+            FakeHP.active[server] = FakeHP.active.get(server, 0) + 1
+            FakeHP.peak[server] = max(FakeHP.peak.get(server, 0), FakeHP.active[server])
+        time.sleep(0.02)
+        with self.lock:
+            FakeHP.active[server] -= 1
+        command = f'copy startup-config tftp {server} {self.hostname}_2021-10-14'
+        if self.failures:
+            self.failures -= 1
+            return TransferResult(self.hostname, command, False, 'TFTP download failed', None, 0, '')
+        return TransferResult(self.hostname, command, True, 'TFTP download in progress.', None, 0, '')
+
+    def sftp_backup_config(self, server, username=None, password=None, timeout=1800):
+        if password != 'password':
+            raise ConnectionError('authentication failed')
+        return self.tftp_backup_config(server, timeout)
+
+    def disconnect(self):
+        pass
+
+
+def fleet(devices, timeout=None):
+    FakeHP.peak.clear()
+    FakeHP.timeouts.clear()
+    return HPFleet(devices, max_workers=8, timeout=timeout, factory=FakeHP)
+
+def test_backup_limits_transfers_per_server():
+    devices = [{'hostname': f'HP_{n}'} for n in range(6)]
+    devices += [{'hostname': 'HP_other', 'backup_server': '192.168.1.4'}]
+    records = FleetBackup(fleet(devices), '192.168.1.3', per_server=2).run_all()
+    assert all(record.success for record in records)
+    assert FakeHP.peak['192.168.1.3'] == 2
+    assert {r.hostname: r.server for r in records}['HP_other'] == '192.168.1.4'
+
+def test_backup_timeout_applies_to_each_transfer():
+    devices = [{'hostname': f'HP_{n}'} for n in range(6)]
+    records = FleetBackup(fleet(devices, timeout=0.05), '192.168.1.3', per_server=1).run_all()
+    assert all(record.success for record in records)
+    assert FakeHP.timeouts == [0.05] * 6
+
+def test_backup_retries_with_backoff():
+    devices = [{'hostname': 'HP_1', 'failures': 2}, {'hostname': 'HP_2', 'failures': 5}]
+    records = {r.hostname: r for r in FleetBackup(fleet(devices), '192.168.1.3', retries=2, backoff=0).run()}
+    assert records['HP_1'].success and records['HP_1'].attempts == 3
+    assert not records['HP_2'].success
+    assert records['HP_2'].error == 'TFTP download failed'
+
+def test_backup_errors_are_recorded():
+    records = FleetBackup(fleet([{'hostname': 'HP_1'}]), '192.168.1.3', protocol='sftp', retries=0).run_all()
+    assert records[0].error == 'authentication failed'
+
+def test_backup_manifest(tmp_path):
+    (tmp_path / 'HP_1_2021-10-14').write_bytes(b'hostname "HP_1"\n')
+    manifest = tmp_path / 'manifest.json'
+    records = fleet([{'hostname': 'HP_1'}]).backup('192.168.1.3', manifest=str(manifest), server_dirs=str(tmp_path))
+    assert records[0].filename == 'HP_1_2021-10-14'
+    assert records[0].size == 16
+    assert records[0].sha256 == hashlib.sha256(b'hostname "HP_1"\n').hexdigest()
+    assert read_manifest(manifest) == records
+
+def test_backup_replayed(hp_connect):
+    records = HPFleet([{'hostname': 'HP_1'}], factory=lambda **kwargs: hp_connect).backup('192.168.1.3')
+    assert records[0].success
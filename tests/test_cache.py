@@ -0,0 +1,88 @@
+from hp_procurvearuba import HP
+from hp_procurvearuba.cache import CommandCache
+import mock
+import os
+import pytest
+
+CAPTURES = os.path.join(os.path.dirname(__file__), 'captures')
+
+
+@pytest.fixture
+def cached_hp():
+    with mock.patch('hp_procurvearuba.procurvearuba.HPProcurveSSH') as ssh:
+        ssh.return_value.send_command.side_effect = lambda cmd, **kwargs: cmd + ' output'
+        yield HP('HP_1', device_type='hp_procurve', ip='192.168.1.1')
+
+def test_cache_hit(cached_hp):
+    cached_hp.send_command('show spanning-tree')
+    cached_hp.send_command('show spanning-tree')
+    assert cached_hp.HPProcurveSSH.send_command.call_count == 1
+    assert cached_hp.cache_info().hits == 1
+    assert cached_hp.cache_info().misses == 1
+
+def test_cache_keyed_on_use_textfsm(cached_hp):
+    cached_hp.send_command('show clock', use_textfsm=True)
+    cached_hp.send_command('show clock')
+    cached_hp.send_command('show clock', use_textfsm=True)
+    # the parsed output is parsed from the cached raw output
+    assert cached_hp.HPProcurveSSH.send_command.call_count == 1
+    assert ('show clock', True) in cached_hp.cache
+    assert ('show clock', False) in cached_hp.cache
+
+def test_cache_counts_one_lookup_per_call(cached_hp):
+    cached_hp.send_command('show clock', use_textfsm=True)
+    assert cached_hp.cache_info()[:2] == (0, 1)
+    cached_hp.send_command('show clock', use_textfsm=True)
+    assert cached_hp.cache_info()[:2] == (1, 1)
+    cached_hp.send_command('show clock')
+    assert cached_hp.cache_info()[:2] == (2, 1)
+
+def test_cache_returns_copies_of_parsed_output():
+    hp_obj = HP.from_captures(os.path.join(CAPTURES, 'HP_1'))
+    rows = hp_obj.send_command('show vlans', use_textfsm=True)
+    count = len(rows)
+    rows.clear()
+    assert len(hp_obj.send_command('show vlans', use_textfsm=True)) == count
+
+def test_running_config_counts_one_lookup():
+    hp_obj = HP.from_captures(os.path.join(CAPTURES, 'HP_1'))
+    hp_obj.running_config()
+    hp_obj.running_config()
+    assert hp_obj.cache_info()[:2] == (1, 1)
+
+def test_cache_invalidate(cached_hp):
+    cached_hp.send_command('show spanning-tree')
+    cached_hp.invalidate('show spanning-tree')
+    cached_hp.send_command('show spanning-tree')
+    assert cached_hp.HPProcurveSSH.send_command.call_count == 2
+
+def test_cache_refresh(cached_hp):
+    cached_hp.send_command('show spanning-tree')
+    assert cached_hp.refresh('show spanning-tree') == 'show spanning-tree output'
+    assert cached_hp.HPProcurveSSH.send_command.call_count == 2
+
+def test_cache_cleared_by_multiline_timing(cached_hp):
+    cached_hp.send_command('show spanning-tree')
+    cached_hp.send_multiline_timing(['boot system flash secondary', 'y'])
+    assert len(cached_hp.cache) == 0
+
+def test_cache_ttl_expiry():
+    cache = CommandCache(ttl=10)
+    with mock.patch('hp_procurvearuba.cache.time.monotonic', side_effect=[0, 5, 20]):
+        cache.set(('show vlans', True), 'vlans')
+        assert cache.get(('show vlans', True)) == 'vlans'
+        assert cache.get(('show vlans', True)) is None
+
+def test_cache_lru_eviction():
+    cache = CommandCache(maxsize=2)
+    cache.set(('show arp', True), 'arp')
+    cache.set(('show vlans', True), 'vlans')
+    cache.get(('show arp', True))
+    cache.set(('show system', False), 'system')
+    assert ('show arp', True) in cache
+    assert ('show vlans', True) not in cache
+
+def test_cache_disabled():
+    cache = CommandCache(ttl=0)
+    cache.set(('show arp', True), 'arp')
+    assert len(cache) == 0
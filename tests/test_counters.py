@@ -0,0 +1,55 @@
+from hp_procurvearuba import HP
+import os
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from hp_procurvearuba.counters import CounterStore, counter_deltas  # noqa: E402
+
+CAPTURES = os.path.join(os.path.dirname(__file__), 'captures', 'HP_1')
+
+
+def sample(errors_rx, port='1'):
+    return [{'port': port, 'total_bytes': '0', 'total_frames': '0', 'errors_rx': errors_rx, 'drops_tx': '0'}]
+
+def test_counter_deltas_wrap_and_reset():
+    deltas = counter_deltas([2**32 - 10, 100, 5, 1000], [5, 50, 7, 1000])
+    assert deltas.tolist() == [15, 50, 2, 0]
+
+def test_rates():
+    store = CounterStore(depth=4)
+    for minute, errors in enumerate(['0', '10', '1,030', '1,090', '1,150']):
+        store.add('HP_1', sample(errors), taken_at=minute * 60)
+    assert store.rates('errors_rx')[0] * 60 == pytest.approx(60)
+    assert store.rates('errors_rx', window=3)[0] * 60 == pytest.approx(380)
+
+def test_rates_single_sample_is_nan():
+    store = CounterStore()
+    store.add('HP_1', sample('5'), taken_at=0)
+    assert np.isnan(store.rates('errors_rx')[0])
+    assert store.exceeding('errors_rx', 0) == []
+
+def test_exceeding_after_reset():
+    store = CounterStore()
+    store.add('HP_1', sample('900') + sample('0', port='2'), taken_at=0)
+    store.add('HP_1', sample('30') + sample('100', port='2'), taken_at=60)
+    assert [(r.port, r.per_minute) for r in store.exceeding('errors_rx', 20)] == [('2', 100), ('1', 30)]
+
+def test_collect_from_switch():
+    hp_obj = HP.from_captures(CAPTURES)
+    store = CounterStore()
+    store.collect(hp_obj)
+    store.collect(hp_obj)
+    assert len(store) == 6
+    assert ('HP_1', '24') in store.ports
+    assert hp_obj.cache.info().hits == 0
+
+def test_many_ports():
+    store = CounterStore(depth=8)
+    ports = [str(port) for port in range(1, 1001)]
+    for minute in range(3):
+        output = [sample(str(minute * int(port)), port)[0] for port in ports]
+        store.add('HP_1', output, taken_at=minute * 60)
+    rates = store.exceeding('errors_rx', 900, window=2)
+    assert [r.port for r in rates[:2]] == ['1000', '999']
+    assert len(rates) == 100
@@ -0,0 +1,111 @@
+from hp_procurvearuba import HP, HPFleet
+from hp_procurvearuba.exporter import MetricsExporter, Sample, render_metrics
+import os
+import urllib.error
+import urllib.request
+import pytest
+import time
+
+CAPTURES = os.path.join(os.path.dirname(__file__), 'captures')
+
+
+class Factory:
+    def __init__(self, broken=()):
+        self.opened = 0
+        self.broken = set(broken)
+
+    def __call__(self, hostname, **kwargs):
+        self.opened += 1
+        if hostname in self.broken:
+            raise ConnectionError(f'{hostname} unreachable')
+        return HP.from_captures(os.path.join(CAPTURES, hostname))
+
+
+def exporter(factory, hostnames=('HP_1', 'HP_2')):
+    fleet = HPFleet([{'hostname': hostname} for hostname in hostnames], factory=factory)
+    return MetricsExporter(fleet, interval=3600)
+
+def test_render_metrics():
+    page = render_metrics([
+        Sample('hp_port_up', (('hostname', 'HP_1'), ('port', '1')), 1),
+        Sample('hp_switch_up', (('hostname', 'HP "1"'),), 0),
+    ])
+    assert page.splitlines() == [
+        '# HELP hp_switch_up 1 if the last poll of the switch succeeded',
+        '# TYPE hp_switch_up gauge',
+        'hp_switch_up{hostname="HP \\"1\\""} 0',
+        '# HELP hp_port_up 1 if the port link is up',
+        '# TYPE hp_port_up gauge',
+        'hp_port_up{hostname="HP_1",port="1"} 1',
+    ]
+
+def test_poll():
+    metrics = exporter(Factory())
+    metrics.poll()
+    page = metrics.metrics().decode()
+    assert 'hp_switch_up{hostname="HP_1"} 1' in page
+    assert 'hp_port_up{hostname="HP_1",port="3"} 0' in page
+    assert 'hp_port_rx_errors_total{hostname="HP_1",port="2"} 17' in page
+    assert 'hp_stp_root{hostname="HP_1"} 1' in page
+    assert 'hp_poe_port_delivering{hostname="HP_1",port="1"} 1' in page
+    assert 'hp_ntp_enabled{hostname="HP_1"} 0' in page
+    assert 'hp_collector_up{hostname="HP_2",collector="poe"} 0' in page
+    assert 'hp_stp_enabled{hostname="HP_2"} 1' in page
+
+def test_failed_switch_keeps_last_samples():
+    factory = Factory()
+    metrics = exporter(factory, ['HP_1'])
+    metrics.poll()
+    factory.broken.add('HP_1')
+    metrics.poll()
+    page = metrics.metrics().decode()
+    assert 'hp_switch_up{hostname="HP_1"} 0' in page
+    assert 'hp_port_up{hostname="HP_1",port="1"} 1' in page
+    assert 'hp_last_poll_timestamp_seconds{hostname="HP_1"}' in page
+
+def test_scrapes_do_not_poll():
+    factory = Factory()
+    metrics = exporter(factory, ['HP_1'])
+    host, port = metrics.serve(port=0)
+    try:
+        while metrics.polls == 0:
+            time.sleep(0.01)
+        for _ in range(3):
+            with urllib.request.urlopen(f'http://{host}:{port}/metrics') as response:
+                assert response.headers['Content-Type'].startswith('text/plain')
+                assert b'hp_switch_up{hostname="HP_1"} 1' in response.read()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f'http://{host}:{port}/')
+    finally:
+        metrics.stop()
+    assert factory.opened == 1
+
+def test_failures_are_logged(caplog):
+    factory = Factory(broken=['HP_1'])
+    metrics = exporter(factory)
+    metrics.poll()
+    messages = [r.getMessage() for r in caplog.records]
+    assert 'poll of HP_1 failed' in messages
+    assert 'collector poe failed on HP_2' in messages
+    assert any(r.exc_info for r in caplog.records)
+
+def test_unreachable_lazy_switch_is_down(monkeypatch):
+    class Unreachable:
+        def __init__(self, *args, **kwargs):
+            raise ConnectionError('no route to host')
+
+    monkeypatch.setattr('hp_procurvearuba.procurvearuba._ssh_class', lambda: Unreachable)
+    metrics = exporter(lambda hostname, **kwargs: HP(hostname, lazy=True), ['HP_1'])
+    metrics.poll()
+    page = metrics.metrics().decode()
+    assert 'hp_switch_up{hostname="HP_1"} 0' in page
+    assert 'hp_collector_up' not in page
+
+def test_switch_failing_every_collector_is_down():
+    metrics = exporter(Factory(), ['HP_1'])
+    metrics.collectors = {'ports': metrics.collectors['ports']}
+    metrics.poll()
+    assert 'hp_switch_up{hostname="HP_1"} 1' in metrics.metrics().decode()
+    metrics.collectors = {'fails': lambda hp_obj: 1 / 0}
+    metrics.poll()
+    assert 'hp_switch_up{hostname="HP_1"} 0' in metrics.metrics().decode()
@@ -0,0 +1,58 @@
+from hp_procurvearuba import HPFleet
+import time
+
+
+class FakeHP:
+    def __init__(self, hostname, delay=0, fail=False, **kwargs):
+        self.hostname = hostname
+        self.delay = delay
+        self.fail = fail
+        self.disconnected = False
+
+    def find_switch_serial_number(self):
+        time.sleep(self.delay)
+        if self.fail:
+            raise ValueError('no serial number')
+        return self.hostname + '_serial'
+
+    def disconnect(self):
+        self.disconnected = True
+
+
+devices = [
+    {'hostname': 'HP_1'},
+    {'hostname': 'HP_2', 'fail': True},
+    {'hostname': 'HP_3', 'delay': 0.2},
+]
+
+def test_fleet_run_method():
+    fleet = HPFleet(devices, max_workers=3, factory=FakeHP)
+    results = {r.hostname: r for r in fleet.run('find_switch_serial_number')}
+    assert results['HP_1'].ok and results['HP_1'].result == 'HP_1_serial'
+    assert isinstance(results['HP_2'].error, ValueError)
+    assert results['HP_3'].result == 'HP_3_serial'
+
+def test_fleet_results_arrive_as_completed():
+    fleet = HPFleet(devices, max_workers=3, factory=FakeHP)
+    results = list(fleet.run('find_switch_serial_number'))
+    assert results[-1].hostname == 'HP_3'
+
+def test_fleet_run_callable():
+    fleet = HPFleet(devices[:1], factory=FakeHP)
+    results = fleet.run_all(lambda hp, suffix: hp.hostname + suffix, '_x')
+    assert results[0].result == 'HP_1_x'
+
+def test_fleet_timeout():
+    slow = [{'hostname': 'HP_1', 'delay': 2}, {'hostname': 'HP_2'}]
+    fleet = HPFleet(slow, max_workers=2, timeout=0.2, factory=FakeHP)
+    start = time.monotonic()
+    results = {r.hostname: r for r in fleet.run('find_switch_serial_number')}
+    assert time.monotonic() - start < 1.5
+    assert isinstance(results['HP_1'].error, TimeoutError)
+    assert results['HP_2'].ok
+
+def test_fleet_from_yaml(tmp_path):
+    inventory = tmp_path / 'devices.yml'
+    inventory.write_text('devices:\n- hostname: HP_1\n  ip: 192.168.1.1\n')
+    fleet = HPFleet.from_yaml(str(inventory), factory=FakeHP)
+    assert len(fleet) == 1
@@ -1,92 +1,92 @@
-def test_find_rpvst_mode(hp_connect, capsys):
-    hp_connect.find_stp_mode()
+def test_find_rpvst_mode(rpvst_connect, capsys):
+    rpvst_connect.find_stp_mode(display=True)
     captured = capsys.readouterr()
     assert 'RPVST' in captured.out
 
-def test_find_mstp_mode(hp_connect, capsys):
-    hp_connect.find_stp_mode()
+def test_find_mstp_mode(mstp_connect, capsys):
+    mstp_connect.find_stp_mode(display=True)
     captured = capsys.readouterr()
     assert 'MSTP' in captured.out
 
 def test_find_rstp_mode(hp_connect, capsys):
-    hp_connect.find_stp_mode()
+    hp_connect.find_stp_mode(display=True)
     captured = capsys.readouterr()
     assert 'RSTP' in captured.out
 
-def test_find_stp_mode(hp_connect, capsys):
-    hp_connect.find_stp_mode()
+def test_find_stp_mode(stp_connect, capsys):
+    stp_connect.find_stp_mode(display=True)
     captured = capsys.readouterr()
     assert 'STP-compatible' in captured.out
 
-def test_find_stp_disabled_switch(hp_connect, capsys):
-    hp_connect.find_stp_disabled_switch()
+def test_find_stp_disabled_switch(stp_disabled_connect, capsys):
+    stp_disabled_connect.find_stp_disabled_switch(display=True)
     captured = capsys.readouterr()
-    assert hp_connect.hostname in captured.out
+    assert stp_disabled_connect.hostname in captured.out
 
 def test_find_stp_enabled_switch(hp_connect, capsys):
-    hp_connect.find_stp_enabled_switch()
+    hp_connect.find_stp_enabled_switch(display=True)
     captured = capsys.readouterr()
     assert hp_connect.hostname in captured.out
 
 def test_find_stp_root(hp_connect, capsys):
-    hp_connect.find_stp_root()
+    hp_connect.find_stp_root(display=True)
     captured = capsys.readouterr()
     assert hp_connect.hostname in captured.out
 
-def test_find_stp_root_rpvst_vlan(hp_connect, capsys):
-    hp_connect.find_stp_root(rpvst_vlan=100)
+def test_find_stp_root_rpvst_vlan(rpvst_connect, capsys):
+    rpvst_connect.find_stp_root(rpvst_vlan=100, display=True)
     captured = capsys.readouterr()
-    assert hp_connect.hostname in captured.out
+    assert rpvst_connect.hostname in captured.out
 
 def test_find_stp_forwarding_port(hp_connect, capsys):
-    hp_connect.find_stp_forwarding_port()
+    hp_connect.find_stp_forwarding_port(display=True)
     captured = capsys.readouterr()
     assert 'Forwarding' in captured.out
 
-def test_find_stp_forwarding_port_rpvst(hp_connect, capsys):
-    hp_connect.find_stp_forwarding_port(rpvst_vlan=100)
+def test_find_stp_forwarding_port_rpvst(rpvst_connect, capsys):
+    rpvst_connect.find_stp_forwarding_port(rpvst_vlan=100, display=True)
     captured = capsys.readouterr()
     assert 'Forwarding' in captured.out
 
 def test_find_stp_blocking_port(hp_connect, capsys):
-    hp_connect.find_stp_blocking_port()
+    hp_connect.find_stp_blocking_port(display=True)
     captured = capsys.readouterr()
     assert 'Blocking' in captured.out
 
-def test_find_stp_blocking_port_rpvst(hp_connect, capsys):
-    hp_connect.find_stp_blocking_port(rpvst_vlan=100)
+def test_find_stp_blocking_port_rpvst(rpvst_connect, capsys):
+    rpvst_connect.find_stp_blocking_port(rpvst_vlan=100, display=True)
     captured = capsys.readouterr()
     assert 'Blocking' in captured.out
 
 def test_find_stp_disabled_port(hp_connect, capsys):
-    hp_connect.find_stp_disabled_port()
+    hp_connect.find_stp_disabled_port(display=True)
     captured = capsys.readouterr()
     assert 'Disabled' in captured.out
 
-def test_find_stp_disabled_port_rpvst(hp_connect, capsys):
-    hp_connect.find_stp_disabled_port(rpvst_vlan=100)
+def test_find_stp_disabled_port_rpvst(rpvst_connect, capsys):
+    rpvst_connect.find_stp_disabled_port(rpvst_vlan=100, display=True)
     captured = capsys.readouterr()
     assert 'Disabled' in captured.out
 
 def test_find_mac_address_port(hp_connect, capsys):
     mac = ['1458d0-13258c']
-    hp_connect.find_mac_address_port(mac)
+    hp_connect.find_mac_address_port(mac, display=True)
     captured = capsys.readouterr()
     assert hp_connect.hostname in captured.out
 
 def test_find_mac_address_port_multiple_mac_port(hp_connect, capsys):
     mac = ['1458d0-13258c']
-    hp_connect.find_mac_address_port(mac, multiple_mac_port=True)
+    hp_connect.find_mac_address_port(mac, multiple_mac_port=True, display=True)
     captured = capsys.readouterr()
     assert hp_connect.hostname in captured.out
 
 def test_find_vlans(hp_connect, capsys):
-    hp_connect.find_vlans([100])
+    hp_connect.find_vlans([100], display=True)
     captured = capsys.readouterr()
     assert hp_connect.hostname in captured.out
 
 def test_find_intrusion_alerts(hp_connect, capsys):
-    hp_connect.find_intrusion_alerts()
+    hp_connect.find_intrusion_alerts(display=True)
     captured = capsys.readouterr()
     assert hp_connect.hostname in captured.out
 
@@ -178,89 +178,89 @@ def test_tftp_load_firmware_reboot(hp_connect, capsys):
     assert 'Rebooting' in captured.out
 
 def test_find_firmware_version(hp_connect, capsys):
-    hp_connect.find_firmware_version()
+    hp_connect.find_firmware_version(display=True)
     captured = capsys.readouterr()
     assert hp_connect.hostname in captured.out
 
 def test_find_switch_mac_address(hp_connect, capsys):
-    hp_connect.find_switch_mac_address()
+    hp_connect.find_switch_mac_address(display=True)
     captured = capsys.readouterr()
     assert hp_connect.hostname in captured.out
 
 def test_find_switch_mac_address_switch_mac_addr(hp_connect, capsys):
     switch_mac_addr = ['288023-4c77c0']
-    hp_connect.find_switch_mac_address(switch_mac_addr)
+    hp_connect.find_switch_mac_address(switch_mac_addr, display=True)
     captured = capsys.readouterr()
     assert hp_connect.hostname in captured.out
 
 def test_find_switch_serial_number(hp_connect, capsys):
-    hp_connect.find_switch_serial_number()
+    hp_connect.find_switch_serial_number(display=True)
     captured = capsys.readouterr()
     assert hp_connect.hostname in captured.out
 
 def test_find_ports_down(hp_connect, capsys):
-    hp_connect.find_ports_down()
+    hp_connect.find_ports_down(display=True)
     captured = capsys.readouterr()
     assert 'Down' in captured.out
 
 def test_find_ports_up(hp_connect, capsys):
-    hp_connect.find_ports_up()
+    hp_connect.find_ports_up(display=True)
     captured = capsys.readouterr()
     assert 'Up' in captured.out
 
 def test_find_ip_from_mac_address(hp_connect, capsys):
     mac_address = ['1458d0-13537a']
-    hp_connect.find_ip_from_mac_address(mac_address)
+    hp_connect.find_ip_from_mac_address(mac_address, display=True)
     captured = capsys.readouterr()
     assert hp_connect.hostname in captured.out
 
 def test_find_mac_from_ip_address(hp_connect, capsys):
     ip_address = ['192.168.1.3']
-    hp_connect.find_mac_from_ip_address(ip_address)
+    hp_connect.find_mac_from_ip_address(ip_address, display=True)
     captured = capsys.readouterr()
     assert hp_connect.hostname in captured.out
 
 def test_find_port_security_enabled_ports(hp_connect, capsys):
-    hp_connect.find_port_security_enabled_ports()
+    hp_connect.find_port_security_enabled_ports(display=True)
     captured = capsys.readouterr()
     assert 'Static' in captured.out
 
 def test_find_port_security_disabled_ports(hp_connect, capsys):
-    hp_connect.find_port_security_disabled_ports()
+    hp_connect.find_port_security_disabled_ports(display=True)
     captured = capsys.readouterr()
     assert 'Continuous' in captured.out
 
 def test_find_jumbo_vlan(hp_connect, capsys):
-    hp_connect.find_jumbo_vlan([100])
+    hp_connect.find_jumbo_vlan([100], display=True)
     captured = capsys.readouterr()
     assert hp_connect.hostname in captured.out
 
 def test_find_voice_vlan(hp_connect, capsys):
-    hp_connect.find_voice_vlan(50)
+    hp_connect.find_voice_vlan(50, display=True)
     captured = capsys.readouterr()
     assert hp_connect.hostname in captured.out
 
 def test_find_poe_enabled_ports(hp_connect, capsys):
-    hp_connect.find_poe_enabled_ports()
+    hp_connect.find_poe_enabled_ports(display=True)
     captured = capsys.readouterr()
     assert 'Yes' in captured.out
 
 def test_find_poe_disabled_ports(hp_connect, capsys):
-    hp_connect.find_poe_disabled_ports()
+    hp_connect.find_poe_disabled_ports(display=True)
     captured = capsys.readouterr()
     assert 'No' in captured.out
 
 def test_find_poe_switch_status(hp_connect, capsys):
-    hp_connect.find_poe_switch_status()
+    hp_connect.find_poe_switch_status(display=True)
     captured = capsys.readouterr()
     assert hp_connect.hostname in captured.out
 
 def test_find_ntp_config(hp_connect, capsys):
-    hp_connect.find_ntp_config()
+    hp_connect.find_ntp_config(display=True)
     captured = capsys.readouterr()
     assert '192.168.1.1' in captured.out
 
 def test_find_ntp_status(hp_connect, capsys):
-    hp_connect.find_ntp_status()
+    hp_connect.find_ntp_status(display=True)
     captured = capsys.readouterr()
     assert 'Disabled' in captured.out
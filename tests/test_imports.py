@@ -0,0 +1,46 @@
+import os
+import subprocess
+import sys
+
+CAPTURES = os.path.join(os.path.dirname(__file__), 'captures', 'HP_1')
+
+REPLAY = f'''
+import sys
+from hp_procurvearuba import HP
+hp = HP.from_captures({CAPTURES!r})
+assert hp.find_stp_mode()[0].mode == 'RSTP'
+assert hp.find_ports_up()
+print(','.join(sorted({{name.split('.')[0] for name in sys.modules}})))
+'''
+
+
+def run(code):
+    return subprocess.run(
+        [sys.executable, '-c', code], check=True, capture_output=True, text=True
+    ).stdout.strip().split(',')
+
+
+def test_import_does_not_load_transports():
+    loaded = run('import sys, hp_procurvearuba; print(",".join(sys.modules))')
+    assert not [name for name in loaded if name.startswith(('netmiko', 'paramiko', 'textfsm', 'numpy'))]
+
+
+def test_replay_does_not_load_netmiko():
+    loaded = run(REPLAY)
+    assert 'netmiko' not in loaded
+    assert 'paramiko' not in loaded
+
+
+def test_lazy_exports():
+    import hp_procurvearuba
+
+    assert hp_procurvearuba.ConnectionPool.__name__ == 'ConnectionPool'
+    assert 'MacIndex' in dir(hp_procurvearuba)
+    assert set(hp_procurvearuba.__all__) >= {'HP', 'HPFleet', 'MacIndex'}
+
+
+def test_ssh_class_resolves_on_access():
+    from hp_procurvearuba import procurvearuba
+    from netmiko.hp import HPProcurveSSH
+
+    assert procurvearuba.HPProcurveSSH is HPProcurveSSH
@@ -0,0 +1,130 @@
+from hp_procurvearuba import HP, Instrumentation
+from hp_procurvearuba.instrument import Event, HistogramSink, JsonLogSink
+import io
+import json
+import os
+
+CAPTURES = os.path.join(os.path.dirname(__file__), 'captures', 'HP_1')
+
+
+class ListSink:
+    def __init__(self):
+        self.events = []
+
+    def record(self, event):
+        self.events.append(event)
+
+
+def instrumented(*sinks, profile=False):
+    instrumentation = Instrumentation(sinks, profile=profile)
+    return HP.from_captures(CAPTURES, instrumentation=instrumentation), instrumentation
+
+
+def test_events_are_labelled_with_the_method():
+    sink = ListSink()
+    hp, _ = instrumented(sink)
+    hp.find_ports_up(display=True)
+    phases = [(e.phase, e.command) for e in sink.events]
+    assert phases == [
+        ('wire', 'show int brief'),
+        ('parse', 'show int brief'),
+        ('render', 'ports_status'),
+        ('method', None),
+    ]
+    assert {e.method for e in sink.events} == {'find_ports_up'}
+    assert {e.hostname for e in sink.events} == {hp.hostname}
+    wire = sink.events[0]
+    assert wire.size > 0
+    assert all(e.seconds >= 0 for e in sink.events)
+
+
+def test_cached_commands_are_not_timed_again():
+    sink = ListSink()
+    hp, _ = instrumented(sink)
+    hp.find_ports_up()
+    hp.find_ports_down()
+    wires = [e for e in sink.events if e.phase == 'wire']
+    assert len(wires) == 1
+
+
+def test_nested_methods_label_with_the_innermost():
+    sink = ListSink()
+    hp, _ = instrumented(sink)
+    hp.find_stp_mode()
+    methods = [e.method for e in sink.events if e.phase == 'method']
+    assert methods[-1] == 'find_stp_mode'
+    assert any(e.phase == 'parse' and e.command == 'show spanning-tree' for e in sink.events)
+
+
+def test_histogram_sink():
+    sink = HistogramSink(buckets=(0.1, 1))
+    sink.record(Event('HP_1', 'find_ports_up', 'show int brief', 'wire', 0.05, 100))
+    sink.record(Event('HP_1', 'find_ports_up', 'show int brief', 'wire', 0.5, 200))
+    sink.record(Event('HP_2', 'find_ports_up', 'show int brief', 'wire', 2, 300))
+    sink.record(Event('HP_1', 'find_ports_up', 'show int brief', 'parse', 0.01, 0))
+    assert sink.histogram('wire') == [1, 1, 1]
+    assert sink.histogram('wire', hostname='HP_1') == [1, 1, 0]
+    assert sink.histogram('parse', command='show int brief') == [1, 0, 0]
+    wire, parse = sink.summary()
+    assert wire.key == ('wire', 'show int brief')
+    assert wire.count == 3
+    assert wire.size == 600
+    assert wire.p50 == 1
+    assert wire.p95 == 2
+    assert wire.max == 2
+    assert parse.count == 1
+    by_host = {s.key: s.count for s in sink.summary(by=('hostname',))}
+    assert by_host == {('HP_1',): 3, ('HP_2',): 1}
+
+
+def test_histogram_sink_from_hp():
+    sink = HistogramSink()
+    hp, _ = instrumented(sink)
+    hp.find_ports_up()
+    hp.find_stp_mode()
+    assert sum(sink.histogram('method', method='find_ports_up')) == 1
+    assert sum(sink.histogram('wire', command='show int brief')) == 1
+
+
+def test_json_log_sink():
+    f = io.StringIO()
+    hp, _ = instrumented(JsonLogSink(f))
+    hp.find_ports_up()
+    events = [json.loads(line) for line in f.getvalue().splitlines()]
+    assert events[0]['phase'] == 'wire'
+    assert events[0]['command'] == 'show int brief'
+    assert events[0]['method'] == 'find_ports_up'
+    assert 'time' in events[0]
+
+
+def test_json_log_sink_path(tmp_path):
+    path = str(tmp_path / 'events.jsonl')
+    sink = JsonLogSink(path)
+    sink.record(Event('HP_1', None, 'show run', 'wire', 0.1, 10))
+    sink.close()
+    with open(path) as f:
+        assert json.loads(f.read())['command'] == 'show run'
+
+
+def test_profile():
+    hp, instrumentation = instrumented(profile=True)
+    assert instrumentation.stats() is None
+    hp.find_ports_up()
+    stats = instrumentation.stats()
+    assert stats is not None
+    assert any(name == 'find_ports_up' for _, _, name in stats.stats)
+
+
+def test_stream_command_is_timed():
+    sink = ListSink()
+    hp, _ = instrumented(sink)
+    lines = list(hp.stream_command('show run'))
+    wire, = [e for e in sink.events if e.phase == 'wire']
+    assert wire.command == 'show run'
+    assert wire.size >= sum(len(line) for line in lines)
+
+
+def test_not_instrumented():
+    hp = HP.from_captures(CAPTURES)
+    assert hp.instrumentation is None
+    assert hp.find_ports_up()
@@ -0,0 +1,62 @@
+from hp_procurvearuba import HP
+from hp_procurvearuba.addresses import normalize_ip, normalize_vlan
+import os
+import pytest
+
+CAPTURES = os.path.join(os.path.dirname(__file__), 'captures')
+
+
+@pytest.fixture
+def hp_obj():
+    return HP.from_captures(os.path.join(CAPTURES, 'HP_1'))
+
+def test_normalize_ip():
+    assert normalize_ip(' 192.168.001.003 ') == '192.168.1.3'
+    assert normalize_ip('FE80:0::1') == 'fe80::1'
+    with pytest.raises(ValueError):
+        normalize_ip('192.168.1.256')
+
+def test_normalize_vlan():
+    assert normalize_vlan(100) == normalize_vlan(' 100') == '100'
+
+def test_lookup_vlans(hp_obj):
+    results = hp_obj.lookup_vlans([100, '50', 999])
+    assert results[100].name == 'SERVERS'
+    assert results['50'].vlan_id == '50'
+    assert results[999] is None
+
+def test_lookup_ip_addresses(hp_obj):
+    results = hp_obj.lookup_ip_addresses(['14:58:D0:13:53:7A', '00:00:00:00:00:01'])
+    assert [r.ip for r in results['14:58:D0:13:53:7A']] == ['192.168.1.3']
+    assert results['00:00:00:00:00:01'] == []
+
+def test_lookup_mac_addresses(hp_obj):
+    results = hp_obj.lookup_mac_addresses(['192.168.001.003', '10.0.0.1'])
+    assert results['192.168.001.003'].mac == '1458d0-13537a'
+    assert results['10.0.0.1'] is None
+
+def test_lookup_mac_address_ports(hp_obj):
+    results = hp_obj.lookup_mac_address_ports(['1458d0.13258c', '288023-aa1101'])
+    assert [r.port for r in results['1458d0.13258c']] == ['2']
+    assert results['288023-aa1101'] == []
+    results = hp_obj.lookup_mac_address_ports(['288023-aa1101'], multiple_mac_port=True)
+    assert [r.port for r in results['288023-aa1101']] == ['24']
+
+def test_find_methods_normalize(hp_obj):
+    assert hp_obj.find_vlans(['100', 300])[0].vlan_id == '100'
+    assert hp_obj.find_ip_from_mac_address(['1458.d013.537a'])[0].ip == '192.168.1.3'
+    assert hp_obj.find_mac_from_ip_address(['192.168.1.003'])[0].mac == '1458d0-13537a'
+
+def test_lookup_skips_malformed_queries(hp_obj):
+    results = hp_obj.lookup_vlans([100, 'ten'])
+    assert results[100].name == 'SERVERS'
+    assert results['ten'] is None
+    results = hp_obj.lookup_mac_addresses(['192.168.1.3', '192.168.1.256'])
+    assert results['192.168.1.3'].mac == '1458d0-13537a'
+    assert results['192.168.1.256'] is None
+    results = hp_obj.lookup_ip_addresses(['1458d0-13537a', 'not a mac'])
+    assert [r.ip for r in results['1458d0-13537a']] == ['192.168.1.3']
+    assert results['not a mac'] == []
+    results = hp_obj.lookup_mac_address_ports(['1458d0.13258c', '1458d0'])
+    assert [r.port for r in results['1458d0.13258c']] == ['2']
+    assert results['1458d0'] == []
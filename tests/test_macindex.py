@@ -0,0 +1,84 @@
+from hp_procurvearuba import HP, HPFleet
+from hp_procurvearuba.addresses import normalize_mac
+from hp_procurvearuba.macindex import MacIndex, uplink_ports
+import os
+import pytest
+
+CAPTURES = os.path.join(os.path.dirname(__file__), 'captures')
+
+
+def replay(hostname, broken=False, **kwargs):
+    if broken:
+        raise ConnectionError(f'{hostname} unreachable')
+    return HP.from_captures(os.path.join(CAPTURES, hostname))
+
+
+@pytest.fixture
+def index():
+    return MacIndex.from_switches([replay('HP_1'), replay('HP_2')])
+
+@pytest.mark.parametrize('mac', [
+    '3c4a92-0a0b0c', '3C:4A:92:0A:0B:0C', '3c-4a-92-0a-0b-0c', '3c4a.920a.0b0c', '3c4a920a0b0c',
+])
+def test_normalize_mac(mac):
+    assert normalize_mac(mac) == '3c4a92-0a0b0c'
+
+def test_normalize_mac_invalid():
+    with pytest.raises(ValueError):
+        normalize_mac('3c4a92-0a0b')
+
+def test_index_excludes_uplinks(index):
+    assert [(r.hostname, r.port, r.vlan) for r in index.lookup('14:58:d0:13:53:7a')] == [('HP_1', '1', '100')]
+    assert [(r.hostname, r.port) for r in index.lookup('3c4a920a0b0c')] == [('HP_2', '5')]
+    assert [(r.hostname, r.port) for r in index.lookup('288023-aa1101')] == [('HP_1', '24')]
+    assert '1458d0-13258c' in index
+    assert 'not a mac' not in index
+
+def test_uplink_ports_need_a_sysname():
+    lldp_output = replay('HP_6').send_command('show lldp info remote-device', use_textfsm=True)
+    assert uplink_ports(lldp_output) == {'5', '24'}
+    assert uplink_ports(lldp_output, {'HP_1', 'HP_6'}) == {'24'}
+
+def test_index_finds_hosts_behind_phones_and_access_points():
+    index = MacIndex.from_switches([replay('HP_1'), replay('HP_6')])
+    assert [(r.hostname, r.port) for r in index.lookup('3c4a92-0a0b0d')] == [('HP_6', '5')]
+    assert [(r.hostname, r.port) for r in index.lookup('1458d0-aaaaaa')] == [('HP_6', '7')]
+    assert [(r.hostname, r.port) for r in index.lookup('1458d0-13537a')] == [('HP_1', '1')]
+
+def test_index_from_fleet_leaves_out_ports_to_failed_switches():
+    fleet = HPFleet([{'hostname': 'HP_6'}, {'hostname': 'HP_1'}], factory=replay)
+    index = MacIndex.from_fleet(fleet)
+    assert [(r.hostname, r.port) for r in index.lookup('1458d0-13537a')] == [('HP_1', '1')]
+    fleet = HPFleet([{'hostname': 'HP_6'}, {'hostname': 'HP_1', 'broken': True}], factory=replay)
+    index = MacIndex.from_fleet(fleet)
+    assert index.lookup('1458d0-13537a') == []
+
+def test_index_lookup_many(index):
+    results = index.lookup_many(['1458d0-13258c', '00:00:00:00:00:01'])
+    assert results['1458d0-13258c'][0].port == '2'
+    assert results['00:00:00:00:00:01'] == []
+
+def test_index_from_fleet():
+    fleet = HPFleet([{'hostname': 'HP_1'}, {'hostname': 'HP_2'}, {'hostname': 'HP_3'}], factory=replay)
+    index = MacIndex.from_fleet(fleet)
+    assert index.hostnames == {'HP_1', 'HP_2'}
+    assert list(index.errors) == ['HP_3']
+    assert index.lookup('3c4a92-0a0b0c')[0].hostname == 'HP_2'
+
+def test_index_save_load(index, tmp_path):
+    path = str(tmp_path / 'macs.json.gz')
+    index.save(path)
+    loaded = MacIndex.load(path)
+    assert loaded.locations == index.locations
+    loaded.remove('HP_2')
+    assert loaded.lookup('3c4a92-0a0b0c') == []
+
+def test_find_mac_address_port_behind_access_point():
+    records = replay('HP_6').find_mac_address_port(['1458d0-aaaaaa'])
+    assert [(r.port, r.mac) for r in records] == [('7', '1458d0-aaaaaa')]
+
+def test_find_mac_address_port_uplinks():
+    hp_obj = replay('HP_1')
+    assert hp_obj.find_mac_address_port(['28:80:23:cc:00:01']) == []
+    records = hp_obj.find_mac_address_port(['28:80:23:cc:00:01'], multiple_mac_port=True)
+    assert [(r.port, r.mac) for r in records] == [('23', '288023-cc0001')]
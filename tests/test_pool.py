@@ -0,0 +1,79 @@
+from hp_procurvearuba import ConnectionPool, HPFleet
+import mock
+import pytest
+
+device = {'hostname': 'HP_1', 'device_type': 'hp_procurve', 'host': '192.168.1.1',
+          'username': 'admin', 'password': 'password'}
+
+
+@pytest.fixture
+def ssh():
+    with mock.patch('hp_procurvearuba.procurvearuba.HPProcurveSSH') as ssh:
+        ssh.side_effect = lambda *args, **kwargs: mock.Mock(**{'is_alive.return_value': True})
+        yield ssh
+
+def test_pool_connects_lazily(ssh):
+    pool = ConnectionPool()
+    with pool.lease(**device) as hp_obj:
+        assert not hp_obj.connected
+        hp_obj.send_command('show version')
+    assert ssh.call_count == 1
+
+def test_pool_reuses_session(ssh):
+    pool = ConnectionPool()
+    with pool.lease(**device) as first:
+        first.send_command('show version')
+    with pool.lease(**device) as second:
+        second.refresh('show version')
+    assert first is second
+    assert ssh.call_count == 1
+    with pool.lease(**dict(device, username='other')) as third:
+        assert third is not first
+
+def test_pool_health_check(ssh):
+    pool = ConnectionPool(keepalive=0)
+    with pool.lease(**device) as first:
+        first.send_command('show version')
+    first.HPProcurveSSH.is_alive.return_value = False
+    dead = first.HPProcurveSSH
+    with pool.lease(**device) as second:
+        second.send_command('show version')
+    assert dead.disconnect.called
+    assert ssh.call_count == 2
+
+def test_pool_evicts_least_recently_used(ssh):
+    pool = ConnectionPool(maxsize=1)
+    first = pool.acquire(**device)
+    second = pool.acquire(**device)
+    first.send_command('show version')
+    connection = first.HPProcurveSSH
+    pool.release(first)
+    pool.release(second)
+    assert connection.disconnect.called
+    assert len(pool) == 1
+
+def test_pool_prunes_idle_sessions(ssh):
+    pool = ConnectionPool(idle_timeout=0)
+    with pool.lease(**device) as hp_obj:
+        hp_obj.send_command('show version')
+    connection = hp_obj.HPProcurveSSH
+    assert pool.prune() == 1
+    assert connection.disconnect.called
+
+def test_pool_keepalives(ssh):
+    pool = ConnectionPool()
+    with pool.lease(**device) as hp_obj:
+        hp_obj.send_command('show version')
+    pool.send_keepalives()
+    assert len(pool) == 1
+    hp_obj.HPProcurveSSH.is_alive.return_value = False
+    pool.send_keepalives()
+    assert len(pool) == 0
+
+def test_fleet_with_pool(ssh):
+    with ConnectionPool() as pool:
+        fleet = HPFleet([device], pool=pool)
+        for _ in range(2):
+            results = fleet.run_all(lambda hp_obj: hp_obj.refresh('show version'))
+            assert results[0].ok
+        assert ssh.call_count == 1
@@ -0,0 +1,61 @@
+from hp_procurvearuba import HP, HPFleet
+import os
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from hp_procurvearuba.porttable import PortRow, PortTable  # noqa: E402
+
+CAPTURES = os.path.join(os.path.dirname(__file__), 'captures')
+
+
+@pytest.fixture
+def table():
+    return PortTable.from_switches([HP.from_captures(os.path.join(CAPTURES, 'HP_1'))])
+
+def test_columns_are_encoded(table):
+    assert len(table) == 6
+    assert table.categories('status') == ['Up', 'Down']
+    assert table.column('status').tolist() == [0, 0, 1, 1, 0, 0]
+    assert table.column('errors_rx').tolist() == [0, 17, 0, 0, 0, 0]
+
+def test_select_matches_find_methods(table):
+    hp_obj = HP.from_captures(os.path.join(CAPTURES, 'HP_1'))
+    assert [r.port for r in table.select(status='Down')] == [r.port for r in hp_obj.find_ports_down()]
+    assert [r.port for r in table.select(intrusion_alert='Yes')] == [r.port for r in hp_obj.find_intrusion_alerts()]
+    assert [r.port for r in table.select(learn_mode='Continuous')] == [
+        r.port for r in hp_obj.find_port_security_disabled_ports()
+    ]
+    assert [r.port for r in table.select(power_enable='Yes')] == [r.port for r in hp_obj.find_poe_enabled_ports()]
+
+def test_select_row(table):
+    row = table.select(port='23')[0]
+    assert isinstance(row, PortRow)
+    assert (row.hostname, row.status, row.drops_tx, row.power_enable) == ('HP_1', 'Up', 12, None)
+
+def test_mask_and_conditions(table):
+    assert table.count(power_enable=None) == 2
+    assert table.count(status=['Up', 'Down']) == 6
+    assert table.count(status='Testing') == 0
+    assert table.count(table.column('total_bytes') > 10**9, status='Up') == 2
+
+def test_group_by(table):
+    assert table.count_by('learn_mode') == {'Static': 2, 'Continuous': 4}
+    assert table.count_by('hostname', status='Down') == {'HP_1': 2}
+    assert table.sum_by('hostname', 'total_bytes') == {'HP_1': 1276448234 + 963012 + 88231003 + 4211921380}
+
+def test_add_replaces_switch(table):
+    table.add('HP_1', {'show int brief': [{'port': '1', 'status': 'Down'}]})
+    assert len(table) == 1
+    assert table.count_by('status') == {'Down': 1}
+    table.remove('HP_1')
+    assert len(table) == 0 and table.count(status='Down') == 0
+
+def factory(hostname, **kwargs):
+    return HP.from_captures(os.path.join(CAPTURES, hostname))
+
+def test_from_fleet():
+    fleet = HPFleet([{'hostname': 'HP_1'}, {'hostname': 'HP_2'}], factory=factory)
+    table = fleet.port_table()
+    assert table.hostnames == ['HP_1']
+    assert 'HP_2' in table.errors
@@ -0,0 +1,71 @@
+from hp_procurvearuba import HP, HPFleet, SnapshotPoller
+from hp_procurvearuba.probe import Probe, parse_uptime, probe, unchanged
+from hp_procurvearuba.replay import ReplayConnection, load_captures
+from hp_procurvearuba.snapshot import DeviceSnapshot
+import mock
+import os
+
+CAPTURES = os.path.join(os.path.dirname(__file__), 'captures', 'HP_1')
+
+
+def replay(**changes):
+    outputs = dict(load_captures(CAPTURES)[1], **changes)
+    return mock.Mock(wraps=ReplayConnection('HP_1', outputs))
+
+def heavy_calls(connection):
+    return [c for c in connection.send_command.call_args_list if c.args[0] == 'show mac-address']
+
+def test_parse_uptime():
+    assert parse_uptime('23 days') == 23 * 86400
+    assert parse_uptime('2 hours 5 mins') == 7500
+    assert parse_uptime('') is None
+
+def test_probe_ignores_session_events():
+    hp_obj = HP('HP_1', connection=replay())
+    first = probe(hp_obj)
+    assert first.uptime == 23 * 86400
+    log = load_captures(CAPTURES)[1]['show logging -r']
+    login = 'I 10/14/21 11:00:00 00179 mgr: SME SSH from 192.168.1.10 - MANAGER Mode\n'
+    marker = '----\n'
+    hp_obj = HP('HP_1', connection=replay(**{'show logging -r': log.replace(marker, marker + login, 1)}))
+    assert probe(hp_obj) == first
+
+def test_unchanged():
+    probe_a = Probe('HP_1', 100, 'a')
+    assert unchanged(probe_a, Probe('HP_1', 160, 'a'))
+    assert not unchanged(probe_a, Probe('HP_1', 10, 'a'))
+    assert not unchanged(probe_a, Probe('HP_1', 160, 'b'))
+    assert not unchanged(None, probe_a)
+
+def test_poller_skips_unchanged_switch():
+    connection = replay()
+    fleet = HPFleet([{'hostname': 'HP_1'}], factory=lambda **kwargs: HP('HP_1', connection=connection))
+    poller = SnapshotPoller(fleet)
+    first = poller.poll_all()[0]
+    assert first.changed and len(heavy_calls(connection)) == 1
+    second = poller.poll_all()[0]
+    assert not second.changed and second.snapshot is first.snapshot
+    assert len(heavy_calls(connection)) == 1
+
+def test_poller_collects_changed_switch():
+    log = load_captures(CAPTURES)[1]['show logging -r']
+    event = 'I 10/15/21 09:00:00 00076 ports: port 5 is now on-line\n'
+    changed_log = log.replace('----\n', '----\n' + event, 1)
+    connections = iter([replay(), replay(**{'show logging -r': changed_log})])
+    fleet = HPFleet([{'hostname': 'HP_1'}], factory=lambda **kwargs: HP('HP_1', connection=next(connections)))
+    poller = SnapshotPoller(fleet)
+    poller.poll_all()
+    assert poller.poll_all()[0].changed
+
+def test_poller_collects_switch_without_probe():
+    outputs = load_captures(CAPTURES)[1]
+    del outputs['show logging -r']
+    fleet = HPFleet([{'hostname': 'HP_1'}], factory=lambda **kwargs: HP('HP_1', connection=ReplayConnection('HP_1', outputs)))
+    poller = SnapshotPoller(fleet)
+    assert poller.poll_all()[0].changed
+    assert poller.poll_all()[0].changed
+
+def test_snapshot_saves_probe(tmp_path):
+    snapshot = DeviceSnapshot('HP_1', {}, probe=Probe('HP_1', 100, 'a'))
+    snapshot.save(str(tmp_path / 'HP_1.json'))
+    assert DeviceSnapshot.load(str(tmp_path / 'HP_1.json')).probe == snapshot.probe
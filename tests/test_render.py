@@ -0,0 +1,22 @@
+from hp_procurvearuba import render
+from hp_procurvearuba.records import PortStatus, SerialNumber, StpMode
+
+
+def test_render_switch_serial_number(capsys):
+    render.render('find_switch_serial_number', 'HP_1', [SerialNumber('HP_1', 'SG59FLX6CK')])
+    captured = capsys.readouterr()
+    assert 'SG59FLX6CK' in captured.out
+
+def test_render_ports_down(capsys):
+    records = [PortStatus('HP_1', '3', 'Down'), PortStatus('HP_1', '4', 'Down')]
+    render.render('find_ports_down', 'HP_1', records)
+    captured = capsys.readouterr()
+    assert 'number of ports down: 2' in captured.out
+
+def test_render_stp_mode_not_enabled(capsys):
+    render.stp_mode('HP_1', [StpMode('HP_1', None)])
+    captured = capsys.readouterr()
+    assert 'CHECK SPANNING TREE IS ENABLED' in captured.out
+
+def test_records_are_slotted():
+    assert PortStatus.__slots__ == ()
@@ -0,0 +1,113 @@
+from hp_procurvearuba import HP
+from hp_procurvearuba.replay import (
+    CommandNotCaptured,
+    ReplayConnection,
+    capture_command,
+    capture_filename,
+    load_captures,
+)
+from hp_procurvearuba.records import StpRoot
+from hp_procurvearuba.snapshot import DeviceSnapshot
+import os
+import pytest
+
+CAPTURES = os.path.join(os.path.dirname(__file__), 'captures')
+
+
+class SendingReplay(ReplayConnection):
+    sent = ()
+
+    def stream_command(self, command_string):
+        self.sent = list(self.sent) + [command_string]
+        return super().stream_command(command_string)
+
+
+@pytest.mark.parametrize('command', [
+    'show spanning-tree vlan 100',
+    'copy startup-config sftp 192.168.1.3 HP_1_2021-10-13',
+    'show interfaces 1/1',
+    'show run | include 100%',
+])
+def test_capture_filename_roundtrip(command):
+    filename = capture_filename(command)
+    assert '/' not in filename
+    assert capture_command(filename) == command
+
+def test_capture_filename():
+    assert capture_filename('show spanning-tree vlan 100') == 'show_spanning-tree_vlan_100.txt'
+
+def test_from_captures_directory():
+    hp_obj = HP.from_captures(os.path.join(CAPTURES, 'HP_1'))
+    assert hp_obj.hostname == 'HP_1'
+    assert hp_obj.find_firmware_version()[0].version == 'WB.16.04.0016'
+
+def test_from_captures_cassette(tmp_path):
+    hostname, outputs = load_captures(os.path.join(CAPTURES, 'HP_3'))
+    path = str(tmp_path / 'HP_3.json.gz')
+    DeviceSnapshot(hostname, outputs).save(path)
+    hp_obj = HP.from_captures(path)
+    assert hp_obj.hostname == 'HP_3'
+    assert hp_obj.find_stp_mode()[0].mode == 'MSTP'
+
+def test_save_captures(tmp_path):
+    snapshot = DeviceSnapshot('HP_9', {'show run | include ntp': 'ntp enable\n'})
+    snapshot.save_captures(str(tmp_path / 'HP_9'))
+    hp_obj = HP.from_captures(str(tmp_path / 'HP_9'))
+    assert hp_obj.hostname == 'HP_9'
+    assert hp_obj.send_command('show run | include ntp') == 'ntp enable\n'
+
+def test_multiline_prefix_match():
+    connection = ReplayConnection('HP_1', {
+        'copy sftp flash': 'flash\n',
+        'copy sftp flash 192.168.1.3': 'longest\n',
+        'boot system flash': 'boot\n',
+    })
+    output = connection.send_multiline_timing(
+        ['copy sftp flash 192.168.1.3 WB_16_04_0016.swi secondary', 'y', '\n']
+    )
+    assert output == 'longest\n'
+    with pytest.raises(CommandNotCaptured):
+        connection.send_multiline_timing(['copy tftp flash 192.168.1.3 a.swi', 'y'])
+
+def test_command_not_captured():
+    hp_obj = HP.from_captures(os.path.join(CAPTURES, 'HP_5'))
+    assert hp_obj.find_stp_disabled_switch()[0].hostname == 'HP_5'
+    with pytest.raises(CommandNotCaptured):
+        hp_obj.find_ports_up()
+
+def test_trunk_vlans_from_running_config():
+    hostname, outputs = load_captures(os.path.join(CAPTURES, 'HP_1'))
+    outputs = {k: v for k, v in outputs.items() if not k.startswith('show vlan ports')}
+    hp_obj = HP(hostname, connection=ReplayConnection(hostname, outputs))
+    records = hp_obj.list_vlans_on_trunk()
+    assert [(r.neighbor, r.port, r.vlan_id) for r in records] == [
+        ('HP_2', '23', '100'), ('HP_2', '23', '300'), ('HP_3', '24', '100'), ('HP_3', '24', '300'),
+    ]
+    assert records[0].vlan_name == 'SERVERS'
+
+def test_trunk_vlans_skip_neighbors_without_sysname(capsys):
+    hp_obj = HP.from_captures(os.path.join(CAPTURES, 'HP_6'))
+    records = hp_obj.list_vlans_on_trunk(display=True)
+    assert {r.port for r in records} == {'5', '24'}
+    unnamed, = [r for r in records if r.vlan_id == '200']
+    assert unnamed.vlan_name == ''
+    assert 'HP_1' in capsys.readouterr().out
+    records = hp_obj.find_trunk_port_speed()
+    assert [(r.neighbor, r.port) for r in records] == [('SEP0004F2AABBCC', '5'), ('HP_1', '24')]
+
+def test_find_vlans_on_trunk_exact_match():
+    hp_obj = HP.from_captures(os.path.join(CAPTURES, 'HP_1'))
+    assert hp_obj.find_vlans_on_trunk([10, 30]) == []
+    assert {r.vlan_id for r in hp_obj.find_vlans_on_trunk(['300'])} == {'300'}
+
+def test_find_trunk_port_speed():
+    records = HP.from_captures(os.path.join(CAPTURES, 'HP_2')).find_trunk_port_speed()
+    assert ('HP_1', '23', '1000FDx') in [(r.neighbor, r.port, r.mode) for r in records]
+
+def test_find_stp_root_vlan_range():
+    connection = SendingReplay(*load_captures(os.path.join(CAPTURES, 'HP_2')))
+    hp_obj = HP('HP_2', connection=connection)
+    assert hp_obj.find_stp_root('100-300') == [StpRoot('HP_2', 100)]
+    assert [p.vlan for p in hp_obj.find_stp_forwarding_port([100, 300])] == [100, 100, 300, 300]
+    assert hp_obj.find_stp_root(300) == []
+    assert connection.sent == ['show spanning-tree vlan 100-300']
@@ -0,0 +1,68 @@
+from hp_procurvearuba.runconfig import expand_ports, parse_running_config
+
+CONFIG = '''
+Running configuration:
+
+; J9850A Configuration Editor; Created on release #KB.16.10.0012
+hostname "Core 1"
+interface A1-A2
+   name "uplink"
+   disable
+   exit
+interface Trk1
+   name "to access"
+   exit
+trunk A23-A24 trk1 lacp
+vlan 10
+   name "USERS"
+   untagged A1,A5-A7
+   tagged Trk1
+   exit
+vlan 20
+   name "VOICE"
+   tagged A1-A2,Trk1
+   voice
+   exit
+spanning-tree
+spanning-tree mode rapid-pvst
+spanning-tree priority 4
+spanning-tree Trk1 priority 4
+spanning-tree vlan 10 priority 2
+port-security A5-A6 learn-mode static address-limit 2 action send-disable
+'''
+
+
+def test_expand_ports():
+    assert expand_ports('1-3,23-24') == ['1', '2', '3', '23', '24']
+    assert expand_ports('A1,A5-A7') == ['A1', 'A5', 'A6', 'A7']
+    assert expand_ports('1/1-1/3') == ['1/1', '1/2', '1/3']
+    assert expand_ports('Trk1') == ['Trk1']
+
+def test_vlan_port_index():
+    config = parse_running_config(CONFIG)
+    assert config.hostname == 'Core 1'
+    assert config.vlan(10).untagged == ('A1', 'A5', 'A6', 'A7')
+    assert config.port_vlans('A1') == ('A1', '10', ('20',))
+    assert config.port_vlans('Trk1').tagged == ('10', '20')
+    assert config.logical_port('A23') == 'Trk1' and config.logical_port('A1') == 'A1'
+    assert config.port_vlans('B1') == ('B1', None, ())
+    assert config.ports_in_vlan('20') == ('A1', 'A2', 'Trk1')
+    assert config.vlan(20).voice and config.vlan(999) is None
+
+def test_interfaces_stp_and_port_security():
+    config = parse_running_config(CONFIG.splitlines())
+    assert config.interface('A2') == ('A2', 'uplink', False, ())
+    assert config.interface('Trk1').enabled
+    assert config.stp.enabled and config.stp.mode == 'rapid-pvst' and config.stp.priority == '4'
+    assert config.stp.ports['Trk1'] == ('priority 4',)
+    assert config.stp.options == ('vlan 10 priority 2',)
+    assert config.port_security['A6'].address_limit == '2'
+    assert config.port_security['A6'].action == 'send-disable'
+
+def test_running_config_cached_per_session(hp_connect):
+    config = hp_connect.running_config()
+    assert config is hp_connect.running_config()
+    assert config.snmp.communities == {'public': 'unrestricted'}
+    assert config.ntp.servers == ('192.168.1.1',)
+    hp_connect.invalidate('show run')
+    assert hp_connect.running_config() is not config
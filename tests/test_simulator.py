@@ -0,0 +1,187 @@
+from hp_procurvearuba import HP, HPFleet, Topology
+from hp_procurvearuba.replay import ReplayConnection
+from hp_procurvearuba.simulator import (
+    MORE,
+    SimulatedSwitch,
+    SimulatorServer,
+    simulated_fleet,
+)
+import paramiko
+import pytest
+import time
+
+
+def replay(switch):
+    return HP(switch.hostname, connection=ReplayConnection(switch.hostname, switch.outputs()))
+
+
+@pytest.fixture(scope='module')
+def server():
+    switches = simulated_fleet(3, stp_modes=('RPVST', 'MSTP', 'RSTP'), macs=500, arps=200)
+    with SimulatorServer(switches) as server:
+        yield server
+
+
+@pytest.mark.parametrize('mode', ['RSTP', 'MSTP', 'STP-compatible', 'RPVST'])
+def test_stp_modes(mode):
+    hp = replay(SimulatedSwitch('SIM_1', stp_mode=mode))
+    assert hp.find_stp_mode()[0].mode == mode
+    assert hp.find_stp_enabled_switch()
+    assert hp.find_stp_root(10 if mode == 'RPVST' else None)
+
+
+def test_stp_disabled():
+    hp = replay(SimulatedSwitch('SIM_1', stp_mode=None))
+    assert hp.find_stp_disabled_switch()
+
+
+def test_stp_mode_must_be_known():
+    with pytest.raises(ValueError):
+        SimulatedSwitch('SIM_1', stp_mode='PVST')
+
+
+def test_table_sizes():
+    switch = SimulatedSwitch('SIM_1', ports=48, vlans=6, macs=1000, arps=300)
+    hp = replay(switch)
+    assert len(hp.find_ports_up()) + len(hp.find_ports_down()) == 48
+    assert len(hp.send_command('show mac-address', use_textfsm=True)) == 1000
+    assert len(hp.send_command('show arp', use_textfsm=True)) == 300
+    assert len(hp.send_command('show vlans', use_textfsm=True)) == 6
+    assert len(hp.running_config().vlans) == 6
+    assert hp.find_voice_vlan(10)
+    assert hp.find_jumbo_vlan([20])
+
+
+def test_same_seed_same_tables():
+    first = SimulatedSwitch('SIM_1', seed=1).output('show mac-address')
+    assert SimulatedSwitch('SIM_1', seed=1).output('show mac-address') == first
+    assert SimulatedSwitch('SIM_1', seed=2).output('show mac-address') != first
+
+
+def test_counters_increase():
+    switch = SimulatedSwitch('SIM_1')
+    before = switch.output('show interfaces')
+    assert switch.output('show interfaces') != before
+    assert switch.output('show mac-address') == switch.output('show mac-address')
+
+
+def test_unknown_command():
+    assert SimulatedSwitch('SIM_1').output('show foo').startswith('Invalid input')
+
+
+def test_fleet_chain():
+    switches = {s.hostname: s for s in simulated_fleet(4, stp_modes=('RSTP', 'RPVST'))}
+    fleet = HPFleet(
+        [{'hostname': hostname} for hostname in switches],
+        factory=lambda hostname, **kwargs: replay(switches[hostname]),
+    )
+    topology = Topology.discover(fleet)
+    assert topology.switches() == ['SIM_1', 'SIM_2', 'SIM_3', 'SIM_4']
+    assert len(topology.path('SIM_1', 'SIM_4', vlan=10)) == 3
+    assert [s.stp_mode for s in switches.values()] == ['RSTP', 'RPVST', 'RSTP', 'RPVST']
+
+
+def test_ssh_find_methods(server):
+    switch = server.switches[0]
+    hp = HP(**server.devices()[0])
+    try:
+        assert hp.find_prompt() == 'SIM_1#'
+        assert hp.find_stp_mode()[0].mode == 'RPVST'
+        assert len(hp.find_stp_root('1-30')) == 4
+        assert len(hp.send_command('show mac-address', use_textfsm=True)) == 500
+        assert hp.find_ntp_config()
+        assert hp.find_firmware_version()[0].version == 'WB.16.04.0016'
+        lines = list(hp.stream_command('show run', cache=False))
+        assert lines[0] == 'Running configuration:'
+        assert hp.find_vlans_on_trunk([10])[0].neighbor == 'SIM_2'
+        assert len(hp.find_ports_up()) == sum(p['up'] for p in switch._ports.values())
+    finally:
+        hp.disconnect()
+
+
+def test_ssh_transfers(server):
+    hp = HP(**server.devices()[1])
+    progress = []
+    result = hp.tftp_load_firmware('192.168.1.3', 'WB_16_10.swi', 'secondary', on_progress=progress.append)
+    assert result.success
+    assert progress[-1].percent == 100
+    assert hp.sftp_backup_config('192.168.1.3', 'backup', 'secret').success
+    assert hp.find_stp_mode()[0].mode == 'MSTP'
+    result = hp.boot_system_flash('secondary')
+    assert result.success
+    assert not hp.connected
+
+
+def test_ssh_unsaved_configuration():
+    switch = SimulatedSwitch('UNSAVED', unsaved=True)
+    with SimulatorServer([switch]) as server:
+        hp = HP(**server.devices()[0])
+        result = hp.boot_system_flash('secondary')
+    assert result.success
+    assert 'save current configuration' in result.output
+    assert not switch.unsaved
+    assert replay(SimulatedSwitch('UNSAVED', unsaved=True)).boot_system_flash('secondary').success
+
+
+def test_ssh_fleet(server):
+    fleet = HPFleet(server.devices())
+    results = {r.hostname: r for r in fleet.run('find_stp_mode')}
+    assert [results[h].result[0].mode for h in ('SIM_1', 'SIM_2', 'SIM_3')] == ['RPVST', 'MSTP', 'RSTP']
+
+
+def test_ssh_wrong_password(server):
+    device = dict(server.devices()[0], password='wrong')
+    with pytest.raises(Exception):
+        HP(**device)
+
+
+def shell(server, hostname):
+    client = paramiko.SSHClient()
+    client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    client.connect(
+        '127.0.0.1',
+        port=server.ports[hostname],
+        username='manager',
+        password='manager',
+        allow_agent=False,
+        look_for_keys=False,
+    )
+    channel = client.invoke_shell()
+    channel.settimeout(5)
+    return client, channel
+
+
+def read_until(channel, text):
+    received = ''
+    while text not in received:
+        received += channel.recv(65536).decode()
+    return received
+
+
+def test_ssh_paging(server):
+    client, channel = shell(server, 'SIM_3')
+    try:
+        assert 'any key to continue' in read_until(channel, 'any key to continue')
+        channel.send(' ')
+        read_until(channel, 'SIM_3# ')
+        channel.send('show mac-address\n')
+        first = read_until(channel, MORE)
+        assert first.count('\n') < 30
+        channel.send('q')
+        read_until(channel, 'SIM_3# ')
+        channel.send('no page\n')
+        read_until(channel, 'SIM_3# ')
+        channel.send('show mac-address\n')
+        output = read_until(channel, server.switches[2].mac_table[-1][0])
+        assert MORE not in output
+    finally:
+        client.close()
+
+
+def test_latency():
+    with SimulatorServer([SimulatedSwitch('SLOW', latency=0.3)]) as server:
+        hp = HP(**server.devices()[0])
+        started = time.monotonic()
+        hp.find_stp_mode()
+        assert time.monotonic() - started >= 0.3
+        hp.disconnect()
@@ -0,0 +1,62 @@
+from hp_procurvearuba import HP
+from hp_procurvearuba.replay import CommandNotCaptured, ReplayConnection, load_captures
+from hp_procurvearuba.snapshot import DeviceSnapshot
+import mock
+import os
+import pytest
+
+CAPTURES = os.path.join(os.path.dirname(__file__), 'captures', 'HP_1')
+
+
+def captured_outputs():
+    return load_captures(CAPTURES)[1]
+
+
+@pytest.fixture
+def snapshot():
+    return DeviceSnapshot('HP_1', captured_outputs())
+
+def test_snapshot_collect():
+    connection = mock.Mock(wraps=ReplayConnection('HP_1', captured_outputs()))
+    hp_obj = HP('HP_1', connection=connection)
+    snapshot = hp_obj.snapshot()
+    assert 'show spanning-tree vlan 100' not in snapshot.outputs
+    calls = connection.send_command.call_count
+    snapshot.find_ports_up()
+    snapshot.find_stp_mode()
+    assert connection.send_command.call_count == calls
+
+def test_snapshot_find_methods(snapshot):
+    assert snapshot.find_stp_mode()[0].mode == 'RSTP'
+    assert [r.port for r in snapshot.find_ports_down()] == ['3', '4']
+    assert snapshot.find_switch_serial_number()[0].serial_number == 'SG59FLX6CK'
+    assert snapshot.find_ntp_config()[0].server == '192.168.1.1'
+
+def test_snapshot_mac_address_port(snapshot):
+    records = snapshot.find_mac_address_port(['1458d0-13537a', '288023-aa1101'])
+    assert [(r.port, r.mac) for r in records] == [('1', '1458d0-13537a')]
+    records = snapshot.find_mac_address_port(['288023-aa1101'], multiple_mac_port=True)
+    assert records[0].port == '24'
+
+def test_snapshot_missing_command(snapshot):
+    with pytest.raises(CommandNotCaptured):
+        snapshot.find_stp_root(rpvst_vlan=200)
+
+@pytest.mark.parametrize('filename', ['snapshot.json', 'snapshot.json.gz'])
+def test_snapshot_save_load(snapshot, tmp_path, filename):
+    path = str(tmp_path / filename)
+    snapshot.save(path)
+    loaded = DeviceSnapshot.load(path)
+    assert loaded.hostname == 'HP_1'
+    assert loaded.taken_at == snapshot.taken_at
+    assert loaded.find_vlans([100]) == snapshot.find_vlans([100])
+
+def test_snapshot_collect_rpvst():
+    outputs = captured_outputs()
+    rpvst = load_captures(os.path.join(os.path.dirname(CAPTURES), 'HP_2'))[1]
+    outputs.update((k, v) for k, v in rpvst.items() if k.startswith('show spanning-tree'))
+    connection = mock.Mock(wraps=ReplayConnection('HP_1', outputs))
+    snapshot = HP('HP_1', connection=connection).snapshot()
+    assert snapshot.find_stp_root('100,300') == [('HP_1', 100)]
+    sent = [c.args[0] for c in connection.send_command.call_args_list]
+    assert [c for c in sent if c.startswith('show spanning-tree vlan')] == ['show spanning-tree vlan 1,50,100,300']
@@ -0,0 +1,74 @@
+from hp_procurvearuba.stp import (
+    compact_vlans,
+    expand_vlans,
+    parse_spanning_tree,
+    parse_vlans,
+    vlan_commands,
+)
+import os
+import pytest
+
+CAPTURES = os.path.join(os.path.dirname(__file__), 'captures')
+
+
+def capture(hostname, command='show spanning-tree'):
+    with open(os.path.join(CAPTURES, hostname, command.replace(' ', '_') + '.txt')) as f:
+        return f.read()
+
+@pytest.mark.parametrize('hostname, mode, enabled', [
+    ('HP_1', 'RSTP', True),
+    ('HP_2', 'RPVST', True),
+    ('HP_3', 'MSTP', True),
+    ('HP_4', 'STP-compatible', True),
+    ('HP_5', 'RSTP', False),
+])
+def test_parse_mode(hostname, mode, enabled):
+    stp = parse_spanning_tree(capture(hostname), hostname)
+    assert stp.mode == mode
+    assert stp.enabled is enabled
+
+def test_parse_port_table():
+    stp = parse_spanning_tree(capture('HP_1'), 'HP_1')
+    assert stp.is_root
+    assert stp.switch_mac == '288023-4c77c0'
+    assert [(p.port, p.state) for p in stp.ports] == [
+        ('1', 'Forwarding'), ('2', 'Forwarding'), ('3', 'Disabled'),
+        ('4', 'Disabled'), ('23', 'Blocking'), ('24', 'Forwarding'),
+    ]
+    assert stp.ports[4].designated_bridge == '288023-cc0000'
+    assert stp.ports[4].edge == 'No'
+
+def test_parse_rpvst_vlan():
+    lines = iter(capture('HP_2', 'show spanning-tree vlan 300').splitlines())
+    stp = parse_spanning_tree(lines, 'HP_2', 300)
+    assert not stp.is_root
+    assert [(p.vlan, p.port, p.role, p.state) for p in stp.ports] == [
+        (300, '1', 'Designated', 'Forwarding'),
+        (300, '23', 'Root', 'Forwarding'),
+    ]
+
+def test_parse_empty():
+    stp = parse_spanning_tree('')
+    assert (stp.mode, stp.enabled, stp.is_root, stp.ports) == (None, None, False, ())
+
+def test_expand_vlans():
+    assert expand_vlans(100) == [100]
+    assert expand_vlans('1-3,10') == [1, 2, 3, 10]
+    assert expand_vlans(['300', 100, '5-6']) == [5, 6, 100, 300]
+
+def test_compact_vlans():
+    assert compact_vlans([5, 1, 2, 3, 10, '11']) == '1-3,5,10-11'
+
+def test_vlan_commands():
+    assert vlan_commands([100, 300, 101]) == ['show spanning-tree vlan 100-101,300']
+    commands = vlan_commands(range(2, 800, 2), max_length=100)
+    assert all(len(command) <= 100 for command in commands)
+    assert expand_vlans(','.join(c[len('show spanning-tree vlan '):] for c in commands)) == list(range(2, 800, 2))
+
+def test_parse_vlans():
+    output = capture('HP_2', 'show spanning-tree vlan 100') + capture('HP_2', 'show spanning-tree vlan 300')
+    trees = parse_vlans(output, 'HP_2')
+    assert list(trees) == [100, 300]
+    assert trees[100].is_root and not trees[300].is_root
+    assert trees[300].mode == 'RPVST'
+    assert [(p.vlan, p.port) for p in trees[300].ports] == [(300, '1'), (300, '23')]
@@ -0,0 +1,71 @@
+from hp_procurvearuba import HP
+from hp_procurvearuba.replay import ReplayConnection
+from hp_procurvearuba.stream import channel_lines
+from netmiko.exceptions import ReadTimeout
+import pytest
+
+
+class FakeChannel:
+    RETURN = '\n'
+    base_prompt = 'HP_1'
+    host = '192.168.1.1'
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        self.written = []
+
+    def clear_buffer(self):
+        pass
+
+    def write_channel(self, data):
+        self.written.append(data)
+
+    def read_channel(self):
+        return self.chunks.pop(0) if self.chunks else ''
+
+
+class CountingReplay(ReplayConnection):
+    def stream_command(self, command_string):
+        self.read = 0
+        for line in super().stream_command(command_string):
+            self.read += 1
+            yield line
+
+
+def test_channel_lines():
+    channel = FakeChannel(['show run\n', 'hostname "HP_1"\nntp ', 'server 192.168.1.1\n', '', 'HP_1# '])
+    lines = list(channel_lines(channel, 'show run', read_timeout=1, loop_delay=0))
+    assert lines == ['hostname "HP_1"', 'ntp server 192.168.1.1']
+    assert channel.written == ['show run\n']
+
+def test_channel_lines_close_drains():
+    channel = FakeChannel(['show run\nline 1\n', 'line 2\n', 'line 3\nHP_1#', 'next command'])
+    lines = channel_lines(channel, 'show run', read_timeout=1, loop_delay=0)
+    assert next(lines) == 'line 1'
+    lines.close()
+    assert channel.chunks == ['next command']
+
+def test_channel_lines_timeout():
+    channel = FakeChannel(['show run\nline 1\n'])
+    with pytest.raises(ReadTimeout):
+        list(channel_lines(channel, 'show run', read_timeout=0.05, loop_delay=0.01))
+
+def test_stream_command_caches_complete_output():
+    hp_obj = HP('HP_1', connection=ReplayConnection('HP_1', {'show vlans': 'a\nb\n'}))
+    assert list(hp_obj.stream_command('show vlans')) == ['a', 'b']
+    assert hp_obj.send_command('show vlans') == 'a\nb'
+    assert list(hp_obj.stream_command('show vlans')) == ['a', 'b']
+
+def test_stream_command_early_exit_not_cached():
+    hp_obj = HP('HP_1', connection=ReplayConnection('HP_1', {'show vlans': 'a\nb\n'}))
+    assert next(hp_obj.stream_command('show vlans')) == 'a'
+    assert ('show vlans', False) not in hp_obj.cache
+
+def test_find_ntp_config_parses_show_run_once():
+    config = 'hostname "HP_1"\nntp server 192.168.1.1\n' + 'vlan 1\n' * 1000
+    connection = CountingReplay('HP_1', {'show run': config})
+    hp_obj = HP('HP_1', connection=connection)
+    assert hp_obj.find_ntp_config()[0].server == '192.168.1.1'
+    assert hp_obj.running_config().vlan(1) is not None
+    assert connection.read == 1002
+    assert ('show run', False) not in hp_obj.cache
@@ -0,0 +1,49 @@
+from hp_procurvearuba import templates
+from hp_procurvearuba.templates import TemplateRegistry
+import os
+
+CAPTURES = os.path.join(os.path.dirname(__file__), 'captures', 'HP_1')
+
+
+def capture(command):
+    with open(os.path.join(CAPTURES, command.replace(' ', '_') + '.txt')) as f:
+        return f.read()
+
+def test_parse_poe_brief():
+    rows = templates.parse('show power-over-ethernet brief', capture('show power-over-ethernet brief'))
+    assert [(r['port'], r['power_enable'], r['detection_status']) for r in rows] == [
+        ('1', 'Yes', 'Delivering'), ('2', 'Yes', 'Delivering'),
+        ('3', 'No', 'Disabled'), ('4', 'Yes', 'Searching'),
+    ]
+
+def test_parse_vlan_ports_prefix():
+    rows = templates.parse('show vlan ports 23', capture('show vlan ports 23'))
+    assert [(r['ports'], r['vlan_id'], r['name']) for r in rows] == [
+        ('23', '100', 'SERVERS'), ('23', '300', 'USERS'),
+    ]
+
+def test_parse_compiled_once():
+    compiled = templates.REGISTRY.template_for('show mac-address')
+    first = templates.parse('show mac-address', capture('show mac-address'))
+    fsm = compiled._fsm
+    second = templates.parse('show mac-address', capture('show mac-address'))
+    assert compiled._fsm is fsm
+    assert first == second
+    assert first[0] == {'mac': '1458d0-13537a', 'port': '1', 'vlan': '100'}
+
+def test_parse_no_rows():
+    assert templates.parse('show vlan ports 99', '') == ''
+
+def test_parse_unregistered_command():
+    assert templates.parse('show clock', 'Mon Jan  1 00:00:00 2024') == 'Mon Jan  1 00:00:00 2024'
+
+def test_register(tmp_path):
+    template = tmp_path / 'show_clock.textfsm'
+    template.write_text('Value TIME (\\S+)\n\nStart\n  ^\\w+\\s+\\w+\\s+\\d+\\s+${TIME} -> Record\n')
+    registry = TemplateRegistry()
+    registry.register('show clock', str(template))
+    assert registry.parse('show clock', 'Mon Jan  1 00:00:00 2024') == [{'time': '00:00:00'}]
+    assert registry.template_for('show clock detail') is None
+
+def test_rows():
+    assert templates.rows('% Invalid input') == []
@@ -0,0 +1,70 @@
+import os
+
+from hp_procurvearuba import HP, HPFleet, Topology
+from hp_procurvearuba.topology import Link, parse_speed, switch_links
+
+CAPTURES = os.path.join(os.path.dirname(__file__), 'captures')
+
+
+class Factory:
+    def __init__(self):
+        self.polled = []
+
+    def __call__(self, hostname, **kwargs):
+        self.polled.append(hostname)
+        return HP.from_captures(os.path.join(CAPTURES, hostname))
+
+
+def fleet(factory):
+    return HPFleet([{'hostname': f'HP_{n}'} for n in range(1, 4)], factory=factory)
+
+def test_parse_speed():
+    assert parse_speed('1000FDx') == 1000
+    assert parse_speed('10GigFD') == 10000
+    assert parse_speed('Auto') is None
+
+def test_switch_links():
+    links = switch_links(HP.from_captures(os.path.join(CAPTURES, 'HP_1')))
+    assert links[0] == Link('HP_1', '23', 'HP_2', '23', '1000FDx', 1000, None, ('100', '300'))
+    assert links[1].neighbor == 'HP_3' and links[1].tagged == ('100', '300')
+
+def test_switch_links_skip_neighbors_without_sysname():
+    links = switch_links(HP.from_captures(os.path.join(CAPTURES, 'HP_6')))
+    assert [(link.port, link.neighbor) for link in links] == [('5', 'SEP0004F2AABBCC'), ('24', 'HP_1')]
+    topology = Topology(links)
+    assert '' not in topology.switches()
+    assert topology.neighbors('HP_6') == ['HP_1', 'SEP0004F2AABBCC']
+
+def test_discover_from_seed_polls_each_switch_once():
+    factory = Factory()
+    topology = Topology.discover(fleet(factory), seeds=['HP_2'])
+    assert sorted(factory.polled) == ['HP_1', 'HP_2', 'HP_3']
+    assert factory.polled[0] == 'HP_2'
+    assert topology.switches() == ['HP_1', 'HP_2', 'HP_3']
+    assert topology.neighbors('HP_1') == ['HP_2', 'HP_3']
+    assert len(topology.links_from('HP_1')) == 2
+
+def test_discover_max_hops():
+    factory = Factory()
+    topology = Topology.discover(fleet(factory), seeds=['HP_2'], max_hops=0)
+    assert factory.polled == ['HP_2']
+    assert topology.neighbors('HP_2') == ['HP_1']
+
+def test_vlan_path_and_slow_links():
+    topology = Topology.discover(fleet(Factory()), seeds=['HP_1'])
+    path = topology.path('HP_2', 'HP_3', vlan=300)
+    assert [(link.hostname, link.port, link.neighbor) for link in path] == [('HP_2', '23', 'HP_1'), ('HP_1', '24', 'HP_3')]
+    assert topology.path('HP_2', 'HP_3', vlan=100) is None
+    assert {(link.hostname, link.port) for link in topology.links_carrying(100)} == {('HP_1', '23'), ('HP_1', '24'), ('HP_2', '23')}
+    assert len(topology.links_slower_than(10000)) == 4
+
+def test_topology_cached_with_ttl(tmp_path):
+    path = str(tmp_path / 'topology.json.gz')
+    factory = Factory()
+    first = fleet(factory).topology(cache=path, ttl=60)
+    second = fleet(factory).topology(cache=path, ttl=60)
+    assert len(factory.polled) == 3
+    assert second.links == first.links
+    assert Topology.load(path, ttl=0) is None
+    fleet(factory).topology(cache=path, ttl=0)
+    assert len(factory.polled) == 6
@@ -0,0 +1,119 @@
+from hp_procurvearuba import HP
+from hp_procurvearuba.replay import ReplayConnection
+from hp_procurvearuba.transfers import parse_progress, replay_transfer, run_transfer
+
+
+class FakeChannel:
+    RETURN = '\n'
+    base_prompt = 'HP_1'
+    host = '192.168.1.1'
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        self.written = []
+        self.remote_conn = self
+
+    @property
+    def closed(self):
+        return not self.chunks
+
+    def clear_buffer(self):
+        pass
+
+    def write_channel(self, data):
+        self.written.append(data)
+
+    def read_channel(self):
+        return self.chunks.pop(0) if self.chunks else ''
+
+
+FLASH = 'copy sftp flash admin@192.168.1.3 WB_16_04_0016.swi secondary'
+
+
+def test_transfer_answers_questions_and_waits_for_prompt():
+    progress = []
+    channel = FakeChannel([
+        FLASH + '\n',
+        'The Secondary OS Image will be deleted, continue [y/n]? ',
+        "admin@192.168.1.3's password: ",
+        ' 00:00:07 |============           |  50%   12M/24M\r',
+        '',
+        ' 00:00:14 |=======================| 100%   24M/24M\r\n',
+        'Validating and Writing System Software to the Filesystem ...\n',
+        '',
+        'HP_1# ',
+        'next command',
+    ])
+    result = run_transfer(
+        channel, FLASH, hostname='HP_1', password='secret', loop_delay=0, on_progress=progress.append
+    )
+    assert result.success
+    assert result.message == 'Validating and Writing System Software to the Filesystem ...'
+    assert channel.written == [FLASH + '\n', 'y\n', 'secret\n']
+    assert [p.percent for p in progress] == [50, 100]
+    assert result.progress.total == '24M'
+    assert channel.chunks == ['next command']
+
+def test_transfer_failure_line():
+    channel = FakeChannel(['copy tftp flash 192.168.1.3 a.swi primary\n', 'TFTP download failed: File not found.\n', 'HP_1# '])
+    result = run_transfer(channel, 'copy tftp flash 192.168.1.3 a.swi primary', loop_delay=0)
+    assert not result.success
+    assert result.message == 'TFTP download failed: File not found.'
+
+def test_transfer_reboot_completes_when_session_drops():
+    channel = FakeChannel(['boot system flash secondary\n', 'System will be rebooted from secondary image. Do you want to continue [y/n]? '])
+    result = run_transfer(channel, 'boot system flash secondary', reboots=True, loop_delay=0)
+    assert result.success
+    assert channel.written[-1] == 'y\n'
+
+def test_transfer_answers_save_configuration():
+    channel = FakeChannel([
+        'boot system flash secondary\n',
+        'Do you want to save current configuration [y/n/^C]? ',
+        'y\n',
+        'System will be rebooted from secondary image. Do you want to continue [y/n]? ',
+    ])
+    result = run_transfer(channel, 'boot system flash secondary', reboots=True, loop_delay=0)
+    assert result.success
+    assert channel.written == ['boot system flash secondary\n', 'y\n', 'y\n']
+
+def test_transfer_reboot_not_reached():
+    channel = FakeChannel(['copy tftp startup-config 192.168.1.3 cfg\n', 'HP_1# '])
+    result = run_transfer(channel, 'copy tftp startup-config 192.168.1.3 cfg', reboots=True, loop_delay=0)
+    assert not result.success
+
+def test_transfer_timeout():
+    channel = FakeChannel(['copy startup-config tftp 192.168.1.3 HP_1\n'] + [' '] * 1000)
+    result = run_transfer(channel, 'copy startup-config tftp 192.168.1.3 HP_1', timeout=0, loop_delay=0)
+    assert not result.success
+    assert 'no completion' in result.message
+
+def test_parse_progress():
+    assert parse_progress(' 00:00:14 |=====| 100%   24M/24M') == (100, '24M', '24M')
+    assert parse_progress('00,131,072') == (None, 131072, None)
+    assert parse_progress('SFTP download in progress.') is None
+
+def test_replay_transfer_failure():
+    result = replay_transfer('\nError: Transfer timed out.\n', 'copy tftp flash 1.1.1.1 a.swi primary')
+    assert not result.success
+
+def test_failed_firmware_load_does_not_reboot(capsys):
+    connection = ReplayConnection('HP_1', {
+        'copy tftp flash': 'TFTP download failed: File not found.\n',
+        'boot system flash': 'System will be rebooted from secondary image. Do you want to continue [y/n]? y\n',
+    })
+    result = HP('HP_1', connection=connection).tftp_load_firmware('192.168.1.3', 'a.swi', 'secondary', reboot=True)
+    assert not result.success
+    assert 'Rebooting' not in capsys.readouterr().out
+
+def test_firmware_load_over_channel(capsys):
+    channel = FakeChannel(['copy tftp flash 192.168.1.3 a.swi secondary\n', 'Validating ...\n', 'HP_1# '])
+    result = HP('HP_1', connection=channel).tftp_load_firmware('192.168.1.3', 'a.swi', 'secondary')
+    assert result.success
+    assert 'Firmware loaded for HP_1' in capsys.readouterr().out
+
+def test_replayed_transfers(hp_connect):
+    assert hp_connect.sftp_backup_config('192.168.1.3').success
+    result = hp_connect.sftp_load_firmware('192.168.1.3', 'WB_16_04_0016.swi', 'secondary')
+    assert result.progress.percent == 100
+    assert hp_connect.tftp_load_config('192.168.1.3', 'HP_1_2021-10-14').success